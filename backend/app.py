@@ -3,18 +3,46 @@ NAVIQ Backend API
 Flask application with SQLite database integration.
 """
 
+import atexit
+import gc
+import json
 import os
+import re
 import sys
+import time
 
 # Fix imports for running directly
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from repository.db_repo import db_repository
-from database.db_setup import init_database
+from repository.practice_repo import PracticeRepository
+from repository.progress_repo import ProgressRepository
+from repository.factory import backend_from_env, create_repository, data_dir_from_env
+from repository.snapshot_repo import SnapshotRepository
+from repository.sync_repo import SyncRepository
+from database.db_setup import (DB_PATH, init_database, init_practice_database, init_progress_database,
+                               init_sync_database)
+from monitoring.sampling_profiler import profiler
+from services.catalogue_service import INSIGHT_CATEGORIES, CatalogueService
+from services import sse
+from services.duplicate_service import DuplicateService
+from services.event_hub import MAX_SUBSCRIBERS, QUEUE_SIZE, EventHub
+from services.events_service import ENTITIES, EventsService
+from services.guide_service import MAX_SOURCES, GuideService
+from services.insights_service import MAX_BUCKETS, InsightsService
+from services.interview_service import InterviewService
+from services.practice_service import PracticeService
+from services.progress_rollups import GRAINS, SKETCH_METRICS, ProgressRollups
+from services.progress_service import ProgressService
+from services.recommend_service import MAX_SIMILAR, RecommendService
+from services.roadmap_service import RoadmapService
+from services.search_service import KIND_IDS, SearchService
+from services.suggest_service import KIND_PRIORITY, MAX_SUGGESTIONS, SuggestService
+from services.sync_service import MAX_SYNC_PAGE, SYNC_PAGE, ReaderLease, SyncService
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -22,6 +50,111 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Initialize database on startup
 init_database()
+init_practice_database()
+init_progress_database()
+init_sync_database()
+
+# Upper bound on the number of plans in one /api/roadmap/batch request
+MAX_BATCH_PLANS = int(os.environ.get('NAVIQ_MAX_BATCH_PLANS', 10000))
+# Longest roadmap span, in days, that /api/roadmap and the batch will plan
+MAX_ROADMAP_DAYS = 365
+DAYS_ERROR = f"days must be between 1 and {MAX_ROADMAP_DAYS}"
+
+# Optional shared secret for /api/admin endpoints (open when unset)
+ADMIN_TOKEN = os.environ.get('NAVIQ_ADMIN_TOKEN')
+
+# What POST /api/interview does with a near-duplicate question: warn, reject or off
+DUPLICATE_POLICY = os.environ.get('NAVIQ_DUPLICATE_POLICY', 'warn').lower()
+DUPLICATE_POLICIES = ('warn', 'reject', 'off')
+
+# Progress event ingestion: buffer size, flush interval, what a full buffer
+# does (reject or drop-oldest) and PRAGMA synchronous (off, normal, full)
+PROGRESS_BUFFER = int(os.environ.get('NAVIQ_PROGRESS_BUFFER', 65536))
+PROGRESS_FLUSH_MS = int(os.environ.get('NAVIQ_PROGRESS_FLUSH_MS', 200))
+PROGRESS_OVERFLOW = os.environ.get('NAVIQ_PROGRESS_OVERFLOW', 'reject').lower()
+PROGRESS_SYNC = os.environ.get('NAVIQ_PROGRESS_SYNC', 'normal')
+# Upper bound on the number of events in one /api/progress/events request
+MAX_PROGRESS_EVENTS = 1000
+
+# Change events (/api/events): queued events per subscriber before it is
+# evicted, subscribers per worker, and the client reconnect delay
+EVENTS_QUEUE = int(os.environ.get('NAVIQ_EVENTS_QUEUE', QUEUE_SIZE))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('NAVIQ_EVENTS_MAX_SUBSCRIBERS', MAX_SUBSCRIBERS))
+EVENTS_RETRY_MS = 3000
+
+# Preload mode builds the catalogue before gunicorn forks (see gunicorn.conf.py)
+PRELOAD = os.environ.get('NAVIQ_PRELOAD', '').lower() in ('1', 'true', 'yes')
+
+# Reads go through the backend named by NAVIQ_BACKEND (see repository.factory);
+# preload defaults to the in-memory snapshot. Writes always go to the database.
+BACKEND = backend_from_env('snapshot' if PRELOAD else 'sqlite')
+read_repository = create_repository(BACKEND, db_repository, data_dir_from_env())
+catalogue = read_repository if isinstance(read_repository, SnapshotRepository) else None
+
+catalogue_service = CatalogueService(read_repository)
+interview_service = InterviewService(read_repository)
+roadmap_service = RoadmapService(read_repository)
+search_service = SearchService(db_repository)
+# Caches that follow change_log hold pruning back at their seq
+sync_repository = SyncRepository()
+# The database backends follow catalogue writes through the change_log
+suggest_service = SuggestService(
+    read_repository, change_log=db_repository if BACKEND in ('sqlite', 'snapshot') else None,
+    lease=ReaderLease(sync_repository, "suggest"))
+guide_service = GuideService(db_repository, lease=ReaderLease(sync_repository, "guide"))
+recommend_service = RecommendService(db_repository, lease=ReaderLease(sync_repository, "recommend"))
+duplicate_service = DuplicateService(
+    db_repository, path=os.environ.get('NAVIQ_MINHASH_PATH') or f"{DB_PATH}.minhash",
+    lease=ReaderLease(sync_repository, "duplicate"))
+atexit.register(duplicate_service.save)
+practice_repository = PracticeRepository()
+practice_service = PracticeService(db_repository, practice_repository)
+progress_repository = ProgressRepository(synchronous=PROGRESS_SYNC)
+progress_service = ProgressService(
+    progress_repository, capacity=PROGRESS_BUFFER, flush_interval=PROGRESS_FLUSH_MS / 1000,
+    overflow=PROGRESS_OVERFLOW, rollups=ProgressRollups(db_repository.get_milestone_counts))
+atexit.register(progress_service.close)
+insights_service = InsightsService(progress_repository, catalogue_service, db_repository)
+sync_service = SyncService(db_repository, sync_repository)
+events_service = EventsService(db_repository, EventHub(EVENTS_QUEUE, EVENTS_MAX_SUBSCRIBERS),
+                               lease=ReaderLease(sync_repository, "events"))
+atexit.register(events_service.close)
+
+
+def json_response(key, build):
+    """Return build() as JSON, from the snapshot's serialised cache in preload mode."""
+    if catalogue is None:
+        return jsonify(build())
+    return Response(catalogue.serialized(key, build), mimetype='application/json')
+
+
+@app.before_request
+def profiler_enter_route():
+    """Tag the worker thread with its route while the sampler is running."""
+    if profiler.running:
+        rule = request.url_rule
+        profiler.enter_route(f"{request.method} {rule.rule if rule else request.path}")
+
+
+@app.teardown_request
+def profiler_exit_route(exc=None):
+    """Untag the worker thread once the request is done."""
+    profiler.exit_route()
+
+
+@app.after_request
+def notify_change_events(response):
+    """Wake the change-event poller after a successful write, so this worker's subscribers hear at once."""
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        events_service.notify()
+    return response
+
+
+def admin_required():
+    """Return an error response when the admin token does not match, else None."""
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Admin token required"}), 403
+    return None
 
 
 # ============== HEALTH CHECK ==============
@@ -37,19 +170,37 @@ def health_check():
 @app.route('/api/roles', methods=['GET'])
 def get_roles():
     """Get all available roles."""
-    roles = db_repository.get_all_roles()
-    return jsonify(roles)
+    return json_response('roles', catalogue_service.get_roles)
 
 
 @app.route('/api/roles/<int:role_id>', methods=['GET'])
 def get_role(role_id):
     """Get a specific role by ID."""
-    role = db_repository.get_role_by_id(role_id)
+    role = catalogue_service.get_role(role_id)
     if not role:
         return jsonify({"error": "Role not found"}), 404
     return jsonify(role)
 
 
+@app.route('/api/roles/<int:role_id>/similar', methods=['GET'])
+def get_similar_roles(role_id):
+    """Get the roles closest to a role, by roadmap and description content."""
+    limit = min(max(parse_int(request.args.get('limit'), 5), 1), MAX_SIMILAR)
+    result = recommend_service.similar_roles(role_id, limit=limit)
+    if result is None:
+        return jsonify({"error": "Role not found"}), 404
+    return jsonify(result)
+
+
+@app.route('/api/roles/<int:role_id>/shared-milestones/<int:target_id>', methods=['GET'])
+def get_shared_milestones(role_id, target_id):
+    """Get the milestones two roles share and the target role's remaining ones."""
+    result = recommend_service.shared_milestones(role_id, target_id)
+    if result is None:
+        return jsonify({"error": "Role not found"}), 404
+    return jsonify(result)
+
+
 @app.route('/api/roles', methods=['POST'])
 def create_role():
     """Create a new role."""
@@ -63,6 +214,8 @@ def create_role():
         icon=data.get('icon', 'code'),
         color=data.get('color', '#7f9a7d')
     )
+    if role_id is None:
+        return jsonify({"error": "A role with that name already exists"}), 409
     return jsonify({"id": role_id, "message": "Role created successfully"}), 201
 
 
@@ -77,6 +230,8 @@ def update_role(role_id):
         icon=data.get('icon'),
         color=data.get('color')
     )
+    if success is None:
+        return jsonify({"error": "A role with that name already exists"}), 409
     if not success:
         return jsonify({"error": "Role not found or no changes made"}), 404
     return jsonify({"message": "Role updated successfully"})
@@ -95,34 +250,30 @@ def delete_role(role_id):
 
 @app.route('/api/interview', methods=['GET'])
 def get_interview_questions():
-    """Get interview questions for a specific role."""
+    """Get interview questions for a role, optionally filtered by difficulty and focus."""
     role = request.args.get('role')
     if not role:
         return jsonify({"error": "Role parameter is required"}), 400
     
-    questions = db_repository.get_questions_for_role(role)
-    if not questions:
-        return jsonify([])
+    difficulty = request.args.get('difficulty')
+    focus = request.args.get('focus')
+    if difficulty or focus:
+        if not interview_service.has_role(role):
+            role = suggest_service.resolve_role(role) or role
+        return jsonify(interview_service.find_questions(role, difficulty=difficulty, focus=focus))
     
-    # Format response to match frontend expectations
-    formatted = []
-    for q in questions:
-        formatted.append({
-            "id": q['id'],
-            "question": q['question'],
-            "focus": q['focus'],
-            "difficulty": q['difficulty'],
-            "answer": q['answer'],
-            "followUp": q['follow_up']
-        })
+    if not interview_service.has_role(role):
+        role = suggest_service.resolve_role(role)
+        if not role or not interview_service.has_role(role):
+            return jsonify([])
     
-    return jsonify(formatted)
+    return json_response(('interview', role), lambda: interview_service.find_questions(role))
 
 
 @app.route('/api/interview/role/<int:role_id>', methods=['GET'])
 def get_questions_by_role_id(role_id):
     """Get interview questions by role ID."""
-    questions = db_repository.get_questions_by_role_id(role_id)
+    questions = interview_service.get_questions_by_role_id(role_id)
     return jsonify(questions)
 
 
@@ -133,7 +284,17 @@ def create_question():
     
     if not data or 'role_id' not in data or 'question' not in data:
         return jsonify({"error": "role_id and question are required"}), 400
-    
+
+    policy = str(data.get('on_duplicate', DUPLICATE_POLICY)).lower()
+    if policy not in DUPLICATE_POLICIES:
+        return jsonify({"error": f"on_duplicate must be one of {', '.join(DUPLICATE_POLICIES)}"}), 400
+    duplicates = []
+    if policy != 'off':
+        duplicates = duplicate_service.find_duplicates(data['role_id'], data['question'])
+        if duplicates and policy == 'reject':
+            return jsonify({"error": "A near-duplicate question already exists for this role",
+                            "duplicates": duplicates}), 409
+
     question_id = db_repository.add_question(
         role_id=data['role_id'],
         question=data['question'],
@@ -142,7 +303,11 @@ def create_question():
         answer=data.get('answer', ''),
         follow_up=data.get('follow_up', '')
     )
-    return jsonify({"id": question_id, "message": "Question created successfully"}), 201
+    response = {"id": question_id, "message": "Question created successfully"}
+    if duplicates:
+        response["warning"] = "Similar questions already exist for this role"
+        response["duplicates"] = duplicates
+    return jsonify(response), 201
 
 
 @app.route('/api/interview/<int:question_id>', methods=['PUT'])
@@ -164,6 +329,95 @@ def delete_question(question_id):
     return jsonify({"message": "Question deleted successfully"})
 
 
+# ============== PRACTICE API ==============
+
+# Learners are identified by an ID the client chooses (there are no accounts)
+USER_ID = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+USER_ID_ERROR = "user is required (1-64 letters, digits, '_', '.', ':' or '-')"
+
+
+def learner_id(value):
+    return value if isinstance(value, str) and USER_ID.match(value) else None
+
+
+@app.route('/api/practice/next', methods=['GET'])
+def get_next_practice_question():
+    """Get the next question a learner should practise for a role (spaced repetition)."""
+    user_id = learner_id(request.args.get('user'))
+    if user_id is None:
+        return jsonify({"error": USER_ID_ERROR}), 400
+    name = request.args.get('role')
+    if not name:
+        return jsonify({"error": "Role parameter is required"}), 400
+
+    role = catalogue_service.get_role_by_name(name)
+    if role is None:
+        resolved = suggest_service.resolve_role(name)
+        role = catalogue_service.get_role_by_name(resolved) if resolved else None
+    if role is None:
+        return jsonify({"error": "Role not found"}), 404
+    result = practice_service.next_question(user_id, role['id'])
+    result["role"] = {"id": role['id'], "name": role['name']}
+    return jsonify(result)
+
+
+@app.route('/api/practice/answer', methods=['POST'])
+def record_practice_answer():
+    """Record a learner's answer and self-grade (0-5) and reschedule the question."""
+    data = request.get_json(silent=True) or {}
+    user_id = learner_id(data.get('user'))
+    if user_id is None:
+        return jsonify({"error": USER_ID_ERROR}), 400
+    question_id, grade = data.get('question_id'), data.get('grade')
+    # bool is an int subclass; true/false are not grades or question ids
+    if (not isinstance(question_id, int) or not isinstance(grade, int)
+            or isinstance(question_id, bool) or isinstance(grade, bool) or not 0 <= grade <= 5):
+        return jsonify({"error": "question_id and a grade from 0 to 5 are required"}), 400
+    answer = data.get('answer')
+    if answer is not None and not isinstance(answer, str):
+        return jsonify({"error": "answer must be a string"}), 400
+
+    result = practice_service.record_answer(user_id, question_id, grade, answer)
+    if result is None:
+        return jsonify({"error": "Question not found"}), 404
+    progress_service.record([progress_service.parse_event(user_id, {
+        "type": "question_practised", "role_id": result["role_id"], "ref_id": question_id, "value": grade,
+    }, time.time())])
+    return jsonify(result)
+
+
+# ============== PROGRESS API ==============
+
+@app.route('/api/progress/events', methods=['POST'])
+def record_progress_events():
+    """Accept one progress event, or a batch as {"events": [...]}, for buffered writing."""
+    data = request.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) and 'events' in data else [data]
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "An event object or a non-empty events list is required"}), 400
+    if len(events) > MAX_PROGRESS_EVENTS:
+        return jsonify({"error": f"At most {MAX_PROGRESS_EVENTS} events per request"}), 413
+
+    now = time.time()
+    rows = []
+    for i, event in enumerate(events):
+        if not isinstance(event, dict):
+            return jsonify({"error": f"events[{i}]: must be an object"}), 400
+        user_id = learner_id(event.get('user'))
+        if user_id is None:
+            return jsonify({"error": f"events[{i}]: {USER_ID_ERROR}"}), 400
+        try:
+            rows.append(progress_service.parse_event(user_id, event, now))
+        except ValueError as e:
+            return jsonify({"error": f"events[{i}]: {e}"}), 400
+
+    if not progress_service.record(rows):
+        return jsonify({"error": "Too many progress events right now, retry shortly"}), 503, {"Retry-After": "1"}
+    return jsonify({"accepted": len(rows)}), 202
+
+
 # ============== ROADMAP API ==============
 
 @app.route('/api/roadmap', methods=['GET'])
@@ -175,70 +429,62 @@ def get_roadmap():
     if not goal:
         return jsonify({"error": "Goal parameter is required"}), 400
     
-    try:
-        days = int(days_str)
-    except ValueError:
-        days = 30
-    
-    roadmap = db_repository.get_roadmap_for_role(goal)
+    days = parse_int(days_str, 30)
+    if not 1 <= days <= MAX_ROADMAP_DAYS:
+        return jsonify({"error": DAYS_ERROR}), 400
     
+    roadmap = roadmap_service.get_roadmap(goal, days)
+    if not roadmap:
+        # Not an exact role name; try "python dev", "Devops", "Pyhton Developer"...
+        resolved = suggest_service.resolve_role(goal)
+        roadmap = roadmap_service.get_roadmap(resolved, days) if resolved and resolved != goal else None
     if not roadmap:
         return jsonify({"error": "Roadmap not found for this goal"}), 404
+    return jsonify(roadmap)
+
+
+def parse_int(value, default):
+    """Parse an integer parameter, falling back to `default` when it is not a number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@app.route('/api/roadmap/batch', methods=['POST'])
+def plan_roadmaps():
+    """Plan many (goal, days) roadmaps at once, streamed back as NDJSON."""
+    data = request.get_json(silent=True)
+    items = data.get('requests') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "A non-empty list of requests is required"}), 400
+    if len(items) > MAX_BATCH_PLANS:
+        return jsonify({"error": f"At most {MAX_BATCH_PLANS} requests per batch"}), 400
     
-    # Calculate steps based on duration
-    milestones = roadmap.get('milestones', [])
-    total_milestones = len(milestones)
-    
-    if total_milestones == 0:
-        return jsonify({
-            "goal": goal,
-            "days": days,
-            "overview": roadmap.get('overview', ''),
-            "milestones": []
-        })
-    
-    # Distribute days across milestones
-    days_per_milestone = days // total_milestones
-    
-    formatted_milestones = []
-    current_day = 1
-    
-    for milestone in milestones:
-        end_day = min(current_day + days_per_milestone - 1, days)
-        formatted_milestones.append({
-            "title": milestone['title'],
-            "details": milestone['details'],
-            "outcomes": milestone.get('outcomes', []),
-            "resources": milestone.get('resources', []),
-            "startDay": current_day,
-            "endDay": end_day,
-            "duration": f"Days {current_day}-{end_day}"
-        })
-        current_day = end_day + 1
+    # Goals that are not role names are resolved like GET /api/roadmap does
+    known = {role['name'] for role in catalogue_service.get_roles()}
+    resolved = {}
+    pairs = []
+    for i, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        days = parse_int(item.get('days', 30), 30)
+        if not 1 <= days <= MAX_ROADMAP_DAYS:
+            return jsonify({"error": f"requests[{i}]: {DAYS_ERROR}"}), 400
+        goal = item.get('goal')
+        if isinstance(goal, str) and goal not in known:
+            if goal not in resolved:
+                resolved[goal] = suggest_service.resolve_role(goal) or goal
+            goal = resolved[goal]
+        pairs.append((goal if isinstance(goal, str) else None, days))
     
-    return jsonify({
-        "goal": goal,
-        "days": days,
-        "overview": roadmap.get('overview', ''),
-        "milestones": formatted_milestones
-    })
+    lines = (json.dumps(plan, separators=(',', ':')) + '\n' for plan in roadmap_service.plan_batch(pairs))
+    return Response(lines, mimetype='application/x-ndjson')
 
 
 @app.route('/api/roadmap/goals', methods=['GET'])
 def get_roadmap_goals():
     """Get all available roadmap goals (roles with roadmaps)."""
-    roles = db_repository.get_all_roles()
-    goals = []
-    for role in roles:
-        roadmap = db_repository.get_roadmap_for_role(role['name'])
-        if roadmap:
-            goals.append({
-                "name": role['name'],
-                "icon": role['icon'],
-                "color": role['color'],
-                "overview": roadmap.get('overview', '')
-            })
-    return jsonify(goals)
+    return json_response('goals', roadmap_service.list_goals)
 
 
 # ============== STUDY TOPICS API ==============
@@ -246,8 +492,7 @@ def get_roadmap_goals():
 @app.route('/api/study', methods=['GET'])
 def get_study_topics():
     """Get all study topics with resources."""
-    topics = db_repository.get_all_study_topics()
-    return jsonify(topics)
+    return json_response('study', catalogue_service.get_study_topics)
 
 
 @app.route('/api/study', methods=['POST'])
@@ -282,25 +527,52 @@ def create_study_topic():
 
 @app.route('/api/insights', methods=['GET'])
 def get_career_insights():
-    """Get career insights, optionally filtered by category."""
+    """Get a learner's insights (?user=), or their cohort's, optionally for one role and category."""
+    user = request.args.get('user')
+    user_id = learner_id(user)
+    if user is not None and user_id is None:
+        return jsonify({"error": USER_ID_ERROR}), 400
     category = request.args.get('category')
-    insights = db_repository.get_career_insights(category)
-    
-    # Group by category for frontend
-    if not category:
-        grouped = {"readiness": [], "velocity": [], "market": []}
-        for insight in insights:
-            cat = insight.get('category', 'readiness')
-            if cat in grouped:
-                grouped[cat].append({
-                    "id": insight['id'],
-                    "label": insight['label'],
-                    "value": insight['value'],
-                    "meta": insight['meta']
-                })
-        return jsonify(grouped)
-    
-    return jsonify(insights)
+    if category and category not in INSIGHT_CATEGORIES:
+        return jsonify({"error": f"category must be one of {', '.join(INSIGHT_CATEGORIES)}"}), 400
+    role_id = parse_int(request.args.get('role'), None)
+
+    if user_id is not None:
+        insights = insights_service.learner_insights(user_id, role_id)
+    else:
+        insights = insights_service.cohort_insights(role_id)
+    return jsonify(insights[category] if category else insights)
+
+
+@app.route('/api/insights/timeline', methods=['GET'])
+def get_insights_timeline():
+    """Get a learner's (?user=) or a cohort's progress per day, week or month."""
+    user = request.args.get('user')
+    user_id = learner_id(user)
+    if user is not None and user_id is None:
+        return jsonify({"error": USER_ID_ERROR}), 400
+    grain = request.args.get('grain', 'week')
+    if grain not in GRAINS:
+        return jsonify({"error": f"grain must be one of {', '.join(GRAINS)}"}), 400
+    limit = parse_int(request.args.get('limit'), 12)
+    if limit < 1 or limit > MAX_BUCKETS[grain]:
+        return jsonify({"error": f"limit must be between 1 and {MAX_BUCKETS[grain]} for {grain}"}), 400
+    return jsonify(insights_service.timeline(grain, user_id, parse_int(request.args.get('role'), None), limit))
+
+
+@app.route('/api/insights/rank', methods=['GET'])
+def get_insights_rank():
+    """Get a learner's percentile among a role's learners for one metric (?metric=readiness)."""
+    user_id = learner_id(request.args.get('user'))
+    if user_id is None:
+        return jsonify({"error": USER_ID_ERROR}), 400
+    metric = request.args.get('metric', 'readiness')
+    if metric not in SKETCH_METRICS:
+        return jsonify({"error": f"metric must be one of {', '.join(SKETCH_METRICS)}"}), 400
+    rank = insights_service.rank(user_id, parse_int(request.args.get('role'), 0), metric)
+    if rank is None:
+        return jsonify({"error": "No progress recorded for this learner, role and metric"}), 404
+    return jsonify(rank)
 
 
 @app.route('/api/insights', methods=['POST'])
@@ -339,6 +611,268 @@ def delete_career_insight(insight_id):
     return jsonify({"message": "Insight deleted successfully"})
 
 
+# ============== SYNC API ==============
+
+@app.route('/api/sync', methods=['GET'])
+def sync_changes():
+    """Get the catalogue rows written since ?since=<version>, one change per row; no since: the current version."""
+    since = request.args.get('since')
+    if since is None:
+        return jsonify({"version": sync_service.version()})
+    since = parse_int(since, -1)
+    if since < 0:
+        return jsonify({"error": "since must be a version (a non-negative integer)"}), 400
+    client = request.args.get('client')
+    client_id = learner_id(client)
+    if client is not None and client_id is None:
+        return jsonify({"error": "client must be 1-64 letters, digits, '_', '.', ':' or '-'"}), 400
+    limit = parse_int(request.args.get('limit'), SYNC_PAGE)
+    if limit < 1 or limit > MAX_SYNC_PAGE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_SYNC_PAGE}"}), 400
+
+    result = sync_service.changes(since, client_id, limit)
+    if result is None:
+        return jsonify({"error": "Version too old or unknown; reload and sync from the current version",
+                        "version": sync_service.version()}), 410
+    return jsonify(result)
+
+
+@app.route('/api/events', methods=['GET'])
+def change_events():
+    """Stream catalogue changes as Server-Sent Events: {"entity", "id", "op", "version"} per written row.
+
+    ?entities=role,question narrows the stream. Each event's ID is its
+    version, so a reconnecting client (Last-Event-ID, or ?since=) first gets
+    the changes it missed; a "reset" event means refetch instead. A client
+    that falls too far behind gets "evicted" and should reconnect.
+    """
+    entities = request.args.get('entities')
+    if entities:
+        entities = {entity.strip() for entity in entities.split(',') if entity.strip()}
+        unknown = entities - set(ENTITIES.values())
+        if unknown:
+            return jsonify({"error": f"Unknown entities: {', '.join(sorted(unknown))}",
+                            "entities": sorted(ENTITIES.values())}), 400
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    if since is not None:
+        since = parse_int(since, -1)
+        if since < 0:
+            return jsonify({"error": "since must be a version (a non-negative integer)"}), 400
+
+    subscription = events_service.subscribe(entities or None)
+    if subscription is None:
+        return jsonify({"error": "Too many event subscribers; retry later"}), 503, {"Retry-After": "5"}
+    stream = events_service.stream(subscription, since)
+
+    def events():
+        try:
+            yield sse.comment("events") + sse.format_event(retry=EVENTS_RETRY_MS)
+            for event in stream:
+                if event is None:
+                    yield sse.comment("keep-alive")
+                else:
+                    yield sse.format_event(event[0], event[1], event_id=event[2])
+        finally:
+            stream.close()
+
+    return Response(events(), mimetype='text/event-stream', headers=sse.STREAM_HEADERS)
+
+
+# ============== SEARCH API ==============
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Full-text search over questions, study material and milestones (BM25 ranked)."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter q is required"}), 400
+    
+    kind = request.args.get('kind')
+    if kind and kind not in KIND_IDS:
+        return jsonify({"error": f"kind must be one of: {', '.join(KIND_IDS)}"}), 400
+    
+    return jsonify(search_service.search(
+        query,
+        role=request.args.get('role'),
+        difficulty=request.args.get('difficulty'),
+        kind=kind,
+        page=parse_int(request.args.get('page'), 1),
+        per_page=parse_int(request.args.get('per_page'), 20),
+    ))
+
+
+@app.route('/api/suggest', methods=['GET'])
+def suggest():
+    """Typeahead over role names, study topic titles and milestone titles."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter q is required"}), 400
+
+    kind = request.args.get('kind')
+    if kind and kind not in KIND_PRIORITY:
+        return jsonify({"error": f"kind must be one of: {', '.join(KIND_PRIORITY)}"}), 400
+
+    limit = min(max(parse_int(request.args.get('limit'), 10), 1), MAX_SUGGESTIONS)
+    return jsonify(suggest_service.suggest(query, limit=limit, kind=kind))
+
+
+# ============== GUIDE API ==============
+
+def guide_arguments():
+    """Parse the q, role and limit arguments of the guide endpoints.
+
+    Returns (ask() keyword arguments, None), or (None, an error response).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return None, (jsonify({"error": "Query parameter q is required"}), 400)
+    
+    role_id = None
+    role = request.args.get('role')
+    if role:
+        found = catalogue_service.get_role_by_name(role) or catalogue_service.get_role_by_name(
+            suggest_service.resolve_role(role) or '')
+        if not found:
+            return None, (jsonify({"error": "Role not found"}), 404)
+        role_id = found['id']
+    
+    limit = min(max(parse_int(request.args.get('limit'), 5), 1), MAX_SOURCES)
+    return {"text": query, "role_id": role_id, "limit": limit}, None
+
+
+@app.route('/api/guide', methods=['GET'])
+def guide():
+    """Answer a career guide question from NAVIQ's questions, milestones and study resources."""
+    arguments, error = guide_arguments()
+    if error:
+        return error
+    return jsonify(guide_service.ask(**arguments))
+
+
+@app.route('/api/guide/stream', methods=['GET'])
+def guide_stream():
+    """Stream a guide answer as Server-Sent Events: retrieval, then answer chunks, then done.
+
+    The body is a plain generator, so it works with sync, threaded and gevent
+    workers alike. The server pulls the next frame only once the previous one
+    has been written (backpressure), and closes the generator when the client
+    goes away, which stops the guide's work at its next stage.
+    """
+    arguments, error = guide_arguments()
+    if error:
+        return error
+    
+    def events():
+        # Sent before any work so the headers go out and a dead client shows up early
+        yield sse.comment("guide")
+        try:
+            for event, data in guide_service.stream(**arguments):
+                yield sse.format_event(event, data)
+        except Exception:
+            app.logger.exception("Guide stream failed")
+            yield sse.format_event("error", {"error": "The guide could not answer this time"})
+    
+    return Response(events(), mimetype='text/event-stream', headers=sse.STREAM_HEADERS)
+
+
+# ============== ADMIN API ==============
+
+@app.route('/api/admin/profiler', methods=['GET'])
+def get_profiler_status():
+    """Get sampling profiler state and per-route sample counts."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify(profiler.status())
+
+
+@app.route('/api/admin/profiler', methods=['POST'])
+def control_profiler():
+    """Start, stop or reset the sampling profiler."""
+    denied = admin_required()
+    if denied:
+        return denied
+
+    data = request.get_json(silent=True) or {}
+    try:
+        interval_ms = float(data['interval_ms']) if 'interval_ms' in data else None
+        duration = float(data['duration']) if data.get('duration') else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "interval_ms and duration must be numbers"}), 400
+
+    if data.get('reset'):
+        profiler.reset()
+    if 'enabled' in data:
+        if data['enabled']:
+            profiler.start(interval=interval_ms / 1000 if interval_ms else None, duration=duration)
+        else:
+            profiler.stop()
+    return jsonify(profiler.status())
+
+
+@app.route('/api/admin/profiler/stacks', methods=['GET'])
+def get_profiler_stacks():
+    """Get collapsed stacks (flamegraph input), optionally for a single route."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return Response(profiler.collapsed(request.args.get('route')), mimetype='text/plain')
+
+
+@app.route('/api/admin/progress', methods=['GET'])
+def get_progress_metrics():
+    """Get this worker's progress ingestion counters (accepted, rejected, dropped, flushed...)."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify(progress_service.metrics())
+
+
+@app.route('/api/admin/cache', methods=['GET'])
+def get_cache_metrics():
+    """Get this worker's roadmap cache counters: hits, misses, builds and misses coalesced into another's build."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify({"roadmap": roadmap_service.metrics()})
+
+
+@app.route('/api/admin/sync', methods=['GET'])
+def get_sync_status():
+    """Get the data version, how far change_log is pruned and the number of tracked sync clients and readers."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify(sync_service.status())
+
+
+@app.route('/api/admin/sync/prune', methods=['POST'])
+def prune_sync_log():
+    """Prune change_log now, up to the oldest version a tracked client holds."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify({"pruned": sync_service.prune(force=True), **sync_service.status()})
+
+
+@app.route('/api/admin/events', methods=['GET'])
+def get_events_status():
+    """Get this worker's change-event subscribers and publish / delivery / eviction counters."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify(events_service.metrics())
+
+
+@app.route('/api/admin/guide', methods=['GET'])
+def get_guide_status():
+    """Get this worker's open guide answer streams and the state of its index."""
+    denied = admin_required()
+    if denied:
+        return denied
+    return jsonify(guide_service.metrics())
+
+
 # ============== LEGACY ENDPOINTS (for backward compatibility) ==============
 
 @app.route('/interview', methods=['GET'])
@@ -353,6 +887,46 @@ def legacy_roadmap():
     return get_roadmap()
 
 
+# ============== PRELOAD ==============
+
+def preload_catalogue():
+    """Build the catalogue and its hot responses, then freeze them for copy-on-write.
+
+    Runs in the gunicorn master before forking. After gc.freeze() the collector
+    never scans (and so never dirties) these objects in the workers.
+    """
+    if catalogue is not None:
+        catalogue.refresh()
+        catalogue.serialized('roles', catalogue_service.get_roles)
+        catalogue.serialized('goals', roadmap_service.list_goals)
+        catalogue.serialized('study', catalogue_service.get_study_topics)
+        for role in catalogue_service.get_roles():
+            name = role['name']
+            catalogue.serialized(('interview', name), lambda: interview_service.find_questions(name))
+    else:
+        # Other backends have no response cache; warm their data instead.
+        # Interview questions are loaded per role on first use
+        catalogue_service.get_roles()
+        roadmap_service.list_goals()
+
+    suggest_service.refresh()
+    guide_service.refresh()
+    duplicate_service.refresh()
+    recommend_service.refresh()
+
+    # Build the URL matcher now rather than lazily in every worker
+    app.url_map.update()
+    # SQLite connections must not cross fork(); workers open their own
+    for repository in (db_repository, practice_repository, progress_repository, sync_repository):
+        repository.close()
+    gc.collect()
+    gc.freeze()
+
+
+if PRELOAD:
+    preload_catalogue()
+
+
 # Run the application
 if __name__ == '__main__':
     # Seed database with initial data if empty
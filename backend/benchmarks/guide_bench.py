@@ -0,0 +1,143 @@
+"""
+Career guide retrieval benchmark for NAVIQ.
+Builds (or reuses) a synthetic database with about a million interview
+questions, builds the guide's TF-IDF index over it, then reports p50/p95/p99
+latency of GuideService.retrieve per query shape, plus the build time, index
+size and the cost of picking up a content write incrementally.
+
+The fixture is the same one search_bench uses, so both can share --fixture.
+Writes made by the incremental step go to a copy of the fixture, never to
+the fixture itself.
+
+Usage:
+    python -m benchmarks.guide_bench                                   # 1M questions
+    python -m benchmarks.guide_bench --fixture /tmp/naviq-1m.db        # build once, reuse
+    python -m benchmarks.guide_bench --roles 10 --questions-per-role 1000 --repeat 50
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Add parent directory to path for imports
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.loadtest import percentile
+from benchmarks.search_bench import build_fixture
+from database.db_setup import init_database
+from repository.db_repo import DatabaseRepository
+from services import guide_index
+from services.guide_service import GuideService
+
+# name -> GuideService.retrieve keyword arguments
+QUERIES: Dict[str, Dict] = {
+    "short": {"text": "latency"},
+    "question": {"text": "how should I prepare for cache latency questions"},
+    "long": {"text": "design review of a streaming pipeline with replica shard backup and monitor alert"},
+    "role_filter": {"text": "latency cache", "role_id": 1},
+    "no_match": {"text": "nonexistentword"},
+}
+
+
+def index_bytes(index) -> int:
+    arrays = (index._rowids, index._role_ids, index._alive, index._indptr,
+              index._post_rows, index._post_weights)
+    return sum(a.nbytes for a in arrays if a is not None)
+
+
+def time_queries(service: GuideService, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for name, kwargs in QUERIES.items():
+        service.retrieve(**kwargs)  # warm the page cache
+        latencies: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            service.retrieve(**kwargs)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+        print(f"  {name:<18} p50={results[name]['p50_ms']:9.2f}ms "
+              f"p95={results[name]['p95_ms']:9.2f}ms p99={results[name]['p99_ms']:9.2f}ms", file=sys.stderr)
+    return results
+
+
+def time_incremental(repo: DatabaseRepository, service: GuideService, writes: int) -> Dict:
+    """Time add_question plus the refresh that indexes it."""
+    latencies = []
+    for i in range(writes):
+        repo.add_question(1, f"Benchmark guide question {i} about zanzibar", answer="Freshly written answer.")
+        start = time.perf_counter()
+        service.refresh()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    found = any(s["title"].endswith("about zanzibar") for s in service.retrieve("zanzibar"))
+    return {
+        "writes": writes,
+        "refresh_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "refresh_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "visible": found,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/guide retrieval latency on a large fixture.")
+    parser.add_argument("--roles", type=int, default=100)
+    parser.add_argument("--questions-per-role", type=int, default=10000)
+    parser.add_argument("--fixture", help="Database to reuse, or to create and keep if missing")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query shape")
+    parser.add_argument("--writes", type=int, default=50, help="Incremental writes to time")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="naviq-guide-") as tmp:
+        path = args.fixture or os.path.join(tmp, "naviq.db")
+        fixture_seconds = None
+        if not os.path.exists(path):
+            fixture_seconds = round(build_fixture(path, args.roles, args.questions_per_role), 2)
+            print(f"  fixture built in {fixture_seconds}s", file=sys.stderr)
+        # Writes go to a copy so a reused fixture stays pristine
+        work = os.path.join(tmp, "work.db")
+        shutil.copyfile(path, work)
+        with contextlib.redirect_stdout(sys.stderr):
+            init_database(work)
+
+        repo = DatabaseRepository(work)
+        service = GuideService(repo)
+        start = time.perf_counter()
+        index = service.refresh()
+        build_seconds = round(time.perf_counter() - start, 2)
+        print(f"  index built in {build_seconds}s ({len(index)} documents)", file=sys.stderr)
+
+        report = {
+            "benchmark": "naviq-guide",
+            "numpy": guide_index.np is not None,
+            "fixture_build_seconds": fixture_seconds,
+            "index": {"documents": len(index), "build_seconds": build_seconds,
+                      "bytes": index_bytes(index)},
+            "repeat": args.repeat,
+            "queries": time_queries(service, args.repeat),
+            "incremental": time_incremental(repo, service, args.writes),
+        }
+        repo.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+HTTP load test for the NAVIQ API.
+Starts a local server on a synthetic dataset (or targets --url), replays a
+scripted traffic mix from a pool of client threads and prints a JSON report
+with throughput, latency percentiles and errors per endpoint.
+
+Usage:
+    python -m benchmarks.loadtest --mix mixed --duration 30 --concurrency 8 --output run.json
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+# Add parent directory to path for imports
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.synthetic_data import generate_dataset
+
+DAY_OPTIONS = [7, 14, 30, 45, 60, 90]
+
+
+# ============== CLIENT ==============
+
+class ApiClient:
+    """Keep-alive HTTP client that records the latency of every call."""
+
+    def __init__(self, base_url: str, recorder: "Recorder"):
+        parts = urlsplit(base_url)
+        self._host = parts.hostname
+        self._port = parts.port or 80
+        self._recorder = recorder
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, label: str, body=None, expect: int = None):
+        """
+        Issue a request; returns the decoded JSON body or None on failure. An
+        error status equal to `expect` is the intended outcome, not a failure.
+        """
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        start = time.perf_counter()
+        try:
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=30)
+            self._conn.request(method, path, body=payload, headers=headers)
+            response = self._conn.getresponse()
+            data = response.read()
+            if response.getheader("Connection", "").lower() == "close" or response.version == 10:
+                self.close()
+        except (OSError, http.client.HTTPException) as exc:
+            self.close()
+            self._recorder.record(label, time.perf_counter() - start, error=type(exc).__name__)
+            return None
+
+        elapsed = time.perf_counter() - start
+        if response.status >= 400 and response.status != expect:
+            self._recorder.record(label, elapsed, error=f"HTTP {response.status}")
+            return None
+        self._recorder.record(label, elapsed)
+        try:
+            return json.loads(data) if data else None
+        except ValueError:
+            return None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Recorder:
+    """Thread-safe latency and error collector keyed by endpoint label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.enabled = True
+
+    def record(self, label: str, seconds: float, error: str = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            if error:
+                bucket = self.errors.setdefault(label, {})
+                bucket[error] = bucket.get(error, 0) + 1
+
+
+# ============== SCENARIOS ==============
+
+def scenario_landing(client: ApiClient, rng: random.Random, catalogue: Dict):
+    """Landing page: health, roles, goals and insights."""
+    client.request("GET", "/health", "GET /health")
+    client.request("GET", "/api/roles", "GET /api/roles")
+    client.request("GET", "/api/roadmap/goals", "GET /api/roadmap/goals")
+    client.request("GET", "/api/insights", "GET /api/insights")
+
+
+def scenario_roadmap(client: ApiClient, rng: random.Random, catalogue: Dict):
+    """Roadmap browsing: list goals, then open a few roadmaps at different durations."""
+    client.request("GET", "/api/roadmap/goals", "GET /api/roadmap/goals")
+    for _ in range(rng.randint(1, 3)):
+        goal = quote(rng.choice(catalogue["role_names"]))
+        client.request("GET", f"/api/roadmap?goal={goal}&days={rng.choice(DAY_OPTIONS)}", "GET /api/roadmap")
+    client.request("GET", "/api/study", "GET /api/study")
+
+
+def scenario_interview(client: ApiClient, rng: random.Random, catalogue: Dict):
+    """Interview drilling: fetch one role's deck by name and by id."""
+    index = rng.randrange(len(catalogue["role_names"]))
+    role = quote(catalogue["role_names"][index])
+    client.request("GET", f"/api/interview?role={role}", "GET /api/interview")
+    client.request("GET", f"/api/interview/role/{catalogue['role_ids'][index]}", "GET /api/interview/role/<id>")
+
+
+def scenario_admin(client: ApiClient, rng: random.Random, catalogue: Dict):
+    """Admin writes: create, edit and delete a question and an insight."""
+    created = client.request("POST", "/api/interview", "POST /api/interview", body={
+        "role_id": rng.choice(catalogue["role_ids"]),
+        "question": f"Load test question {rng.random():.8f}?",
+        "focus": "Load Test",
+        "difficulty": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+        "answer": "Synthetic answer.",
+    })
+    if created and "id" in created:
+        client.request("PUT", f"/api/interview/{created['id']}", "PUT /api/interview/<id>",
+                       body={"answer": "Edited synthetic answer."})
+        client.request("DELETE", f"/api/interview/{created['id']}", "DELETE /api/interview/<id>")
+
+    insight = client.request("POST", "/api/insights", "POST /api/insights", body={
+        "category": rng.choice(["readiness", "velocity", "market"]),
+        "label": "Load test insight",
+        "value": "1",
+    })
+    if insight and "id" in insight:
+        client.request("DELETE", f"/api/insights/{insight['id']}", "DELETE /api/insights/<id>")
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "landing": scenario_landing,
+    "roadmap": scenario_roadmap,
+    "interview": scenario_interview,
+    "admin": scenario_admin,
+}
+
+# Traffic mixes: scenario name -> relative weight
+MIXES: Dict[str, Dict[str, int]] = {
+    "browse": {"landing": 40, "roadmap": 35, "interview": 25},
+    "mixed": {"landing": 35, "roadmap": 30, "interview": 30, "admin": 5},
+    "write-heavy": {"landing": 20, "roadmap": 20, "interview": 20, "admin": 40},
+    "landing": {"landing": 1},
+    "roadmap": {"roadmap": 1},
+    "interview": {"interview": 1},
+    "admin": {"admin": 1},
+}
+
+
+# ============== SERVER ==============
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: str, port: int) -> subprocess.Popen:
+    """Start the Flask app in a child process against `db_path`."""
+    env = dict(os.environ, NAVIQ_DB_PATH=db_path)
+    code = ("import logging, app; logging.getLogger('werkzeug').setLevel(logging.ERROR); "
+            f"app.app.run(host='127.0.0.1', port={port}, threaded=True)")
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_healthy(f"http://127.0.0.1:{port}", process)
+    return process
+
+
+def wait_until_healthy(base_url: str, process: subprocess.Popen = None, timeout: float = 30.0):
+    parts = urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("Server process exited during startup")
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+def load_catalogue(base_url: str) -> Dict:
+    """Fetch role names and ids that the scenarios pick from."""
+    client = ApiClient(base_url, Recorder())
+    roles = client.request("GET", "/api/roles", "catalogue") or []
+    client.close()
+    if not roles:
+        raise RuntimeError("Target server has no roles to drive traffic against")
+    return {"role_names": [r["name"] for r in roles], "role_ids": [r["id"] for r in roles]}
+
+
+# ============== RUNNER ==============
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: Dict[str, int], elapsed: float) -> Dict:
+    values = sorted(latencies)
+    error_count = sum(errors.values())
+    return {
+        "requests": len(values),
+        "errors": error_count,
+        "error_types": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "p50": round(percentile(values, 50) * 1000, 3),
+            "p90": round(percentile(values, 90) * 1000, 3),
+            "p95": round(percentile(values, 95) * 1000, 3),
+            "p99": round(percentile(values, 99) * 1000, 3),
+            "max": round(values[-1] * 1000, 3) if values else 0.0,
+        },
+    }
+
+
+def run_load(base_url: str, mix: Dict[str, int], duration: float, concurrency: int,
+             warmup: float = 0.0, seed: int = 1) -> Dict:
+    """Drive `mix` against `base_url` and return the report dict."""
+    catalogue = load_catalogue(base_url)
+    recorder = Recorder()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    scenario_counts = {name: 0 for name in names}
+    counts_lock = threading.Lock()
+    stop_at = [0.0]
+
+    def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        client = ApiClient(base_url, recorder)
+        while time.time() < stop_at[0]:
+            name = rng.choices(names, weights)[0]
+            SCENARIOS[name](client, rng, catalogue)
+            if recorder.enabled:
+                with counts_lock:
+                    scenario_counts[name] += 1
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    start = time.time()
+    stop_at[0] = start + warmup + duration
+    recorder.enabled = warmup <= 0
+    for thread in threads:
+        thread.start()
+    if warmup > 0:
+        time.sleep(warmup)
+        recorder.enabled = True
+    measure_start = time.time()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - measure_start
+
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    all_errors: Dict[str, int] = {}
+    for bucket in recorder.errors.values():
+        for error, count in bucket.items():
+            all_errors[error] = all_errors.get(error, 0) + count
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "scenarios": scenario_counts,
+        "overall": summarize(all_latencies, all_errors, elapsed),
+        "endpoints": {
+            label: summarize(values, recorder.errors.get(label, {}), elapsed)
+            for label, values in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the NAVIQ API.")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--mix", default="mixed", choices=sorted(MIXES))
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--questions-per-role", type=int, default=50)
+    parser.add_argument("--milestones-per-role", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    server = None
+    tmp_dir = None
+    dataset = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            wait_until_healthy(base_url)
+        else:
+            tmp_dir = tempfile.TemporaryDirectory(prefix="naviq-load-")
+            db_path = os.path.join(tmp_dir.name, "naviq.db")
+            with contextlib.redirect_stdout(sys.stderr):
+                dataset = generate_dataset(db_path, roles=args.roles, questions_per_role=args.questions_per_role,
+                                           milestones_per_role=args.milestones_per_role, seed=args.seed)
+            port = _free_port()
+            server = start_server(db_path, port)
+            base_url = f"http://127.0.0.1:{port}"
+
+        results = run_load(base_url, MIXES[args.mix], args.duration, args.concurrency,
+                           warmup=args.warmup, seed=args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    report = {
+        "benchmark": "naviq-loadtest",
+        "git_revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "config": {
+            "url": args.url,
+            "mix": args.mix,
+            "mix_weights": MIXES[args.mix],
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "concurrency": args.concurrency,
+            "dataset": dataset,
+        },
+        **results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+"""
+Micro-benchmarks for NAVIQ repositories and services.
+Times every DatabaseRepository method, the catalogue reads on every
+repository backend (sqlite, snapshot, file, file-indexed) over equivalent
+data, RoadmapService.generate_roadmap and the milestone day-distribution used
+by /api/roadmap, at several data scales.
+
+Results are compared against the checked-in baselines.json. Each timing is
+the median of several rounds, normalised by a fixed calibration workload
+timed between those rounds, so baselines recorded on one machine stay
+meaningful on another, and a machine that slows down mid-run slows the
+calibration too. A benchmark fails when its normalised time exceeds the
+baseline by more than the tolerance (or by more than its own noise, when that
+is wider) and by more than a floor that scales with the baseline (see
+MIN_DELTA), and still does when measured again.
+
+--update-baseline only adds benchmarks that have no baseline yet. Moving an
+existing one takes --replace, in a commit of its own that says why.
+
+Usage:
+    python -m benchmarks.microbench                       # compare, exit 1 on regression
+    python -m benchmarks.microbench --update-baseline     # record baselines for new benchmarks
+    python -m benchmarks.microbench --filter add_ --update-baseline --replace  # after an intended change
+    python -m benchmarks.microbench --scales small --filter roadmap --tolerance 0.5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+# Add backend and project directories to path for imports
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+# Importing app initialises its database, so point it at a scratch file before
+# anything imports database.db_setup
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="naviq-micro-app-")
+os.environ["NAVIQ_DB_PATH"] = os.path.join(_SCRATCH_DIR, "app.db")
+
+from benchmarks.synthetic_data import export_json, generate_dataset
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_TOLERANCE = 0.50
+
+# name -> generate_dataset() keyword arguments
+SCALES: Dict[str, Dict] = {
+    "small": {"roles": 10, "questions_per_role": 20, "milestones_per_role": 6, "study_topics": 10},
+    "medium": {"roles": 25, "questions_per_role": 200, "milestones_per_role": 10, "study_topics": 50},
+    "large": {"roles": 50, "questions_per_role": 2000, "milestones_per_role": 16, "study_topics": 200},
+}
+
+MIN_ROUND_TIME = 0.05
+ROUNDS = 9
+# A suspected regression is measured again this many times before it counts
+RETRIES = 2
+# A benchmark may always vary by this many times its own round-to-round spread
+NOISE_FACTOR = 3
+# Below this many calibration workloads (about 10us where the calibration
+# takes 5ms) timer and scheduler jitter dominate, so a slowdown must also be
+# at least MIN_DELTA or, for benchmarks faster than that, their own baseline
+# (twice as slow). The floor scales with the baseline, so a 10x slowdown of
+# a 1us read is still reported.
+MIN_DELTA = 0.002
+
+
+# ============== TIMING ==============
+
+def calibrate() -> float:
+    """Time a fixed Python + SQLite workload used to normalise results (best of 3 runs)."""
+    def workload():
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+        conn.executemany("INSERT INTO t (v) VALUES (?)", ((str(i) * 3,) for i in range(2000)))
+        total = 0
+        for (value,) in conn.execute("SELECT v FROM t"):
+            total += len(value)
+        conn.close()
+        data = {str(i): [i, i * 2] for i in range(2000)}
+        json.loads(json.dumps(data))
+        return total
+
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        workload()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def measure(fn: Callable[[int], object],
+            setup: Callable[[int], None] = None) -> Tuple[float, float, float]:
+    """
+    Return (median seconds per call of `fn(i)` over ROUNDS timed rounds,
+    relative spread, calibration seconds).
+
+    The spread is the interquartile range of the rounds over their median, the
+    benchmark's own noise level. The calibration is timed before every round
+    and its median returned, so it sees the same machine as the rounds do.
+    """
+    # Find an iteration count that makes one round last at least MIN_ROUND_TIME
+    iterations = 1
+    while True:
+        if setup:
+            setup(iterations)
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(i)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_TIME or iterations >= 100000:
+            break
+        iterations *= 4 if elapsed < MIN_ROUND_TIME / 10 else 2
+
+    per_call = []
+    calibrations = []
+    for _ in range(ROUNDS):
+        calibrations.append(calibrate())
+        if setup:
+            setup(iterations)
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(i)
+        per_call.append((time.perf_counter() - start) / iterations)
+    q1, median, q3 = statistics.quantiles(per_call, n=4)
+    return median, (q3 - q1) / median, statistics.median(calibrations)
+
+
+# ============== BENCHMARKS ==============
+
+def build_benchmarks(db_path: str, data_dir: str) -> List[Tuple[str, Callable, Callable]]:
+    """Return (name, fn, setup) triples bound to one scale's dataset."""
+    from repository.db_repo import DatabaseRepository
+    from repository.factory import BACKENDS, create_repository
+    from database.db_setup import init_practice_database, init_progress_database, init_sync_database
+    from repository.file_repo import FileRepository
+    from repository.practice_repo import PracticeRepository
+    from repository.progress_repo import ProgressRepository
+    from repository.sync_repo import SyncRepository
+    from services.catalogue_service import CatalogueService
+    from services.duplicate_service import DuplicateService
+    from services.event_hub import EventHub
+    from services.events_service import EventsService
+    from services.practice_service import PracticeService
+    from services.insights_service import InsightsService
+    from services.progress_rollups import ProgressRollups
+    from services.progress_service import ProgressService
+    from services.recommend_service import RecommendService
+    from services.roadmap_service import RoadmapService
+    from services.suggest_service import SuggestService
+    from services.sync_service import SyncService
+    from services.tdigest import TDigest
+
+    repo = DatabaseRepository(db_path)
+    file_repo = FileRepository(data_dir)
+    # Backend reads use a pristine copy, unaffected by the write benchmarks
+    backend_db_path = db_path + ".backends"
+    shutil.copyfile(db_path, backend_db_path)
+    backend_source = DatabaseRepository(backend_db_path)
+    backends = {name: create_repository(name, backend_source, data_dir) for name in BACKENDS}
+    roadmap_service = RoadmapService(file_repo)
+    suggest_service = SuggestService(backends["snapshot"])
+    duplicate_service = DuplicateService(backend_source)
+    recommend_service = RecommendService(backend_source)
+    practice_db_path = db_path + ".practice"
+    init_practice_database(practice_db_path)
+    practice_service = PracticeService(backend_source, PracticeRepository(practice_db_path))
+    sync_db_path = db_path + ".sync"
+    init_sync_database(sync_db_path)
+    sync_service = SyncService(backend_source, SyncRepository(sync_db_path))
+    sync_since = max(backend_source.get_last_change() - 1000, 0)
+    change_entries = backend_source.get_changes(sync_since, 1000)
+    # 1000 connected clients, a quarter of them following only roles
+    hub = EventHub()
+    hub_subscribers = [hub.subscribe(["role"] if n % 4 == 0 else None) for n in range(1000)]
+    hub_events = EventsService.change_events(change_entries[:10])
+
+    def hub_fanout(i):
+        hub.publish(hub_events, lambda event: event[1]["entity"])
+        for subscription in hub_subscribers:
+            subscription.get(0)
+    progress_db_path = db_path + ".progress"
+    init_progress_database(progress_db_path)
+    progress_repo = ProgressRepository(progress_db_path)
+    # drop-oldest keeps recording at full speed when the flusher falls behind
+    progress_service = ProgressService(progress_repo, overflow='drop-oldest')
+    progress_events = [{"type": "question_practised", "ref_id": i, "value": i % 6} for i in range(1000)]
+    progress_rows = [("learner", "study_time", 1, i, 15.0, 0.0, 0.0) for i in range(5000)]
+    rollups = ProgressRollups(backend_source.get_milestone_counts)
+    # A realistic batch: 500 learners across the roles, spread over a week
+    rollup_rows = [(f"learner{i % 500}", "question_practised", 1 + i % 8, i, float(i % 6),
+                    1e9 + (i % 7) * 86400, 1e9) for i in range(5000)]
+    insights_service = InsightsService(progress_repo, CatalogueService(backend_source), backend_source)
+    progress_repo.add_events(rollup_rows, rollups.apply)
+    sketch = TDigest()
+    sketch.update(random.Random(1).uniform(0, 100) for _ in range(100000))
+    sketch_bytes = sketch.to_bytes()
+
+    roles = repo.get_all_roles()
+    role_names = [r["name"] for r in roles]
+    role_ids = [r["id"] for r in roles]
+    roadmap = repo.get_roadmap_for_role(role_names[0])
+    milestones = roadmap["milestones"]
+    questions = repo.get_questions_by_role_id(role_ids[0])
+    question_ids = [q["id"] for q in questions]
+    insight_ids = [row["id"] for row in repo.get_career_insights()]
+    n_roles = len(role_names)
+    batch_pairs = [(role_names[i % n_roles], 14 + i % 180) for i in range(1000)]
+
+    # Writes go to a scratch role so they do not grow the data the reads measure
+    scratch_role_id = repo.add_role("Bench Scratch Role")
+
+    pool: Dict[str, List[int]] = {}
+
+    def fill_pool(kind: str, sql: str, make_row: Callable[[int], tuple]):
+        def setup(count: int):
+            conn = sqlite3.connect(db_path)
+            ids = []
+            for i in range(count):
+                ids.append(conn.execute(sql, make_row(i)).lastrowid)
+            conn.commit()
+            conn.close()
+            pool[kind] = ids
+        return setup
+
+    counter = [0]
+
+    def unique(prefix: str) -> str:
+        counter[0] += 1
+        return f"{prefix} {counter[0]}"
+
+    def fill_roadmaps(count: int):
+        # Each write rewrites its roadmap's document, so milestones go to a
+        # fresh roadmap every 16 instead of growing one without bound
+        pool["roadmap"] = [repo.add_roadmap(repo.add_role(unique("Bench Roadmap Role")), "Bench overview")
+                           for _ in range(count // 16 + 1)]
+
+    benchmarks = [
+        # Roles
+        ("db.get_all_roles", lambda i: repo.get_all_roles(), None),
+        ("db.get_role_by_name", lambda i: repo.get_role_by_name(role_names[i % n_roles]), None),
+        ("db.get_role_by_id", lambda i: repo.get_role_by_id(role_ids[i % n_roles]), None),
+        ("db.add_role", lambda i: repo.add_role(unique("Bench Role")), None),
+        ("db.update_role", lambda i: repo.update_role(role_ids[i % n_roles], description=f"d{i}"), None),
+        ("db.delete_role", lambda i: repo.delete_role(pool["role"][i]),
+         fill_pool("role", "INSERT INTO roles (name) VALUES (?)", lambda i: (unique("Doomed Role"),))),
+        # Interview questions
+        ("db.get_questions_for_role", lambda i: repo.get_questions_for_role(role_names[i % n_roles]), None),
+        ("db.get_questions_by_role_id", lambda i: repo.get_questions_by_role_id(role_ids[i % n_roles]), None),
+        ("db.add_question", lambda i: repo.add_question(scratch_role_id, "Bench question?"), None),
+        ("db.update_question",
+         lambda i: repo.update_question(question_ids[i % len(question_ids)], answer=f"a{i}"), None),
+        ("db.delete_question", lambda i: repo.delete_question(pool["question"][i]),
+         fill_pool("question", "INSERT INTO interview_questions (role_id, question) VALUES (?, ?)",
+                   lambda i: (scratch_role_id, "Doomed question?"))),
+        # Roadmaps
+        ("db.get_roadmap_for_role", lambda i: repo.get_roadmap_for_role(role_names[i % n_roles]), None),
+        ("db.assemble_roadmap", lambda i: repo.assemble_roadmap(role_names[i % n_roles]), None),
+        ("db.add_roadmap", lambda i: repo.add_roadmap(scratch_role_id, "Bench overview"), None),
+        ("db.add_milestone", lambda i: repo.add_milestone(
+            pool["roadmap"][i // 16], "Bench milestone", "details", i % 16, outcomes=["o1", "o2"], resources=["r1"]),
+         fill_roadmaps),
+        # Study topics
+        ("db.get_all_study_topics", lambda i: repo.get_all_study_topics(), None),
+        ("db.add_study_topic", lambda i: repo.add_study_topic(unique("Bench Topic")), None),
+        ("db.add_study_resource", lambda i: repo.add_study_resource(1, "Bench resource"), None),
+        # Career insights
+        ("db.get_career_insights", lambda i: repo.get_career_insights(), None),
+        ("db.get_career_insights[category]", lambda i: repo.get_career_insights("velocity"), None),
+        ("db.add_career_insight", lambda i: repo.add_career_insight("market", "Bench", "1"), None),
+        ("db.update_career_insight",
+         lambda i: repo.update_career_insight(insight_ids[i % len(insight_ids)], meta=f"m{i}"), None),
+        ("db.delete_career_insight", lambda i: repo.delete_career_insight(pool["insight"][i]),
+         fill_pool("insight", "INSERT INTO career_insights (category, label) VALUES (?, ?)",
+                   lambda i: ("market", "Doomed"))),
+        # FileRepository vs DatabaseRepository on equivalent data
+        ("file_vs_db.questions_for_role[file]",
+         lambda i: file_repo.get_interview_questions().get(role_names[i % n_roles]), None),
+        ("file_vs_db.questions_for_role[db]",
+         lambda i: repo.get_questions_for_role(role_names[i % n_roles]), None),
+        ("file_vs_db.roadmap_for_role[file]",
+         lambda i: file_repo.get_roadmap_topics().get(role_names[i % n_roles]), None),
+        ("file_vs_db.roadmap_for_role[db]",
+         lambda i: repo.get_roadmap_for_role(role_names[i % n_roles]), None),
+        # Services and scheduling
+        ("service.generate_roadmap",
+         lambda i: roadmap_service.generate_roadmap(role_names[i % n_roles], 30 + i % 60), None),
+        ("service.distribute_milestone_days",
+         lambda i: RoadmapService.distribute_milestone_days(milestones, 30 + i % 60), None),
+        ("service.plan_batch[1000]",
+         lambda i: sum(1 for _ in roadmap_service.plan_batch(batch_pairs)), None),
+        ("service.suggest[prefix]",
+         lambda i: suggest_service.suggest(role_names[i % n_roles][:3 + i % 5]), None),
+        ("service.suggest[fuzzy]",
+         lambda i: suggest_service.suggest(role_names[i % n_roles][::-1][:8]), None),
+        ("service.resolve_role[typo]",
+         lambda i: suggest_service.resolve_role(role_names[i % n_roles].lower().replace("e", "a", 1)), None),
+        ("service.find_duplicates",
+         lambda i: duplicate_service.find_duplicates(
+             role_ids[0], questions[i % len(questions)]["question"] + " today?"), None),
+        ("service.similar_roles", lambda i: recommend_service.similar_roles(role_ids[i % n_roles]), None),
+        ("service.shared_milestones",
+         lambda i: recommend_service.shared_milestones(role_ids[i % n_roles], role_ids[(i + 1) % n_roles]), None),
+        ("service.practice_next",
+         lambda i: practice_service.next_question(f"learner{i % 100}", role_ids[i % n_roles]), None),
+        ("service.practice_answer",
+         lambda i: practice_service.record_answer(
+             f"learner{i % 100}", question_ids[i % len(question_ids)], i % 6), None),
+        ("service.sync[1000]", lambda i: sync_service.changes(sync_since, limit=1000), None),
+        ("service.change_events[1000]", lambda i: EventsService.change_events(change_entries), None),
+        ("hub.publish[10x1000]", hub_fanout, None),
+        ("service.progress_record[1000]",
+         lambda i: progress_service.record(
+             [ProgressService.parse_event(f"learner{i % 100}", event, 1e9) for event in progress_events]), None),
+        ("db.add_events[5000]", lambda i: progress_repo.add_events(progress_rows), None),
+        ("db.add_events[5000,rollups]", lambda i: progress_repo.add_events(rollup_rows, rollups.apply), None),
+        ("service.learner_insights", lambda i: insights_service.learner_insights(f"learner{i % 500}", now=1e9), None),
+        ("service.cohort_insights", lambda i: insights_service.cohort_insights(now=1e9), None),
+        ("service.insights_rank", lambda i: insights_service.rank(f"learner{i % 500}", 0, "questions"), None),
+        ("tdigest.cdf", lambda i: sketch.cdf(i % 1000 / 10), None),
+        ("tdigest.merge[2]", lambda i: TDigest.from_bytes(sketch_bytes).merge(sketch), None),
+    ]
+
+    # The same catalogue reads through every repository backend
+    for backend, backend_repo in backends.items():
+        benchmarks += [
+            (f"backend.get_all_roles[{backend}]", lambda i, r=backend_repo: r.get_all_roles(), None),
+            (f"backend.get_questions_for_role[{backend}]",
+             lambda i, r=backend_repo: r.get_questions_for_role(role_names[i % n_roles]), None),
+            (f"backend.get_roadmap_for_role[{backend}]",
+             lambda i, r=backend_repo: r.get_roadmap_for_role(role_names[i % n_roles]), None),
+            (f"backend.get_all_study_topics[{backend}]", lambda i, r=backend_repo: r.get_all_study_topics(), None),
+        ]
+    return benchmarks
+
+
+def run_scale(scale: str, name_filter: str = None,
+              regressed: Callable[[str, float, float], bool] = None) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Generate one scale's dataset and time every matching benchmark, as
+    measure() returns them. A benchmark for which regressed(key, normalized,
+    spread) holds is measured again, up to RETRIES times, keeping its best
+    normalised median.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix=f"naviq-micro-{scale}-") as tmp:
+        db_path = os.path.join(tmp, "naviq.db")
+        data_dir = os.path.join(tmp, "data")
+        with contextlib.redirect_stdout(sys.stderr):
+            generate_dataset(db_path, **SCALES[scale])
+        export_json(db_path, data_dir)
+
+        for name, fn, setup in build_benchmarks(db_path, data_dir):
+            if name_filter and name_filter not in name:
+                continue
+            result = measure(fn, setup)
+            for _ in range(RETRIES if regressed else 0):
+                seconds, spread, calibration = result
+                if not regressed(f"{scale}/{name}", seconds / calibration, spread):
+                    break
+                result = min(result, measure(fn, setup), key=lambda r: r[0] / r[2])
+            results[name] = result
+            print(f"  {scale:<7} {name:<42} {result[0] * 1e6:12.1f} us  ±{result[1]:.0%}", file=sys.stderr)
+    return results
+
+
+# ============== BASELINES ==============
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def regression_ratio(entry: Dict, normalized: float, spread: float, tolerance: float) -> Tuple[float, bool]:
+    """
+    Return (ratio to the baseline entry, whether it is a regression): slower
+    than the tolerance allows, or than NOISE_FACTOR times the larger of the
+    two spreads when that is wider, and by more than MIN_DELTA or the
+    baseline itself, whichever is smaller.
+    """
+    base = entry["normalized"]
+    ratio = normalized / base
+    allowed = max(tolerance, NOISE_FACTOR * max(spread, entry.get("spread", 0.0)))
+    return ratio, ratio > 1.0 + allowed and normalized - base > min(MIN_DELTA, base)
+
+
+def compare(results: Dict[str, Dict[str, Tuple[float, float, float]]], baseline: Dict,
+            tolerance: float) -> Tuple[List[Dict], List[str]]:
+    """Return (rows, regressions) comparing normalised results with the baseline."""
+    rows = []
+    regressions = []
+    base_results = baseline.get("results", {})
+
+    for scale, timings in results.items():
+        for name, (seconds, spread, calibration) in timings.items():
+            key = f"{scale}/{name}"
+            row = {"benchmark": key, "seconds": seconds, "normalized": seconds / calibration,
+                   "spread": round(spread, 3)}
+            entry = base_results.get(key)
+            if entry is not None:
+                ratio, regressed = regression_ratio(entry, row["normalized"], spread, tolerance)
+                row["ratio"] = round(ratio, 3)
+                if regressed:
+                    regressions.append(key)
+            rows.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run NAVIQ micro-benchmarks.")
+    parser.add_argument("--scales", default=",".join(SCALES), help="Comma separated scales to run")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--tolerance", type=float, help="Allowed slowdown, e.g. 0.3 for +30%%")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Add baselines for benchmarks that have none (existing ones are kept)")
+    parser.add_argument("--replace", action="store_true",
+                        help="With --update-baseline, also overwrite the existing baselines of the benchmarks run")
+    parser.add_argument("--output", help="Write the JSON report here as well")
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"Unknown scale(s): {', '.join(unknown)}")
+
+    baseline = load_baseline(args.baseline)
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", DEFAULT_TOLERANCE)
+    base_results = baseline.get("results", {})
+
+    def regressed(key, normalized, spread):
+        entry = base_results.get(key)
+        return entry is not None and regression_ratio(entry, normalized, spread, tolerance)[1]
+
+    try:
+        results = {scale: run_scale(scale, args.filter, None if args.update_baseline else regressed)
+                   for scale in scales}
+    finally:
+        shutil.rmtree(_SCRATCH_DIR, ignore_errors=True)
+
+    if args.update_baseline:
+        merged = dict(base_results)
+        kept = 0
+        for scale, timings in results.items():
+            for name, (seconds, spread, calibration) in timings.items():
+                key = f"{scale}/{name}"
+                if key in merged and not args.replace:
+                    kept += 1
+                    continue
+                merged[key] = {"normalized": seconds / calibration, "spread": round(spread, 3)}
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "tolerance": tolerance,
+                "python": sys.version.split()[0],
+                "results": dict(sorted(merged.items())),
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}"
+              + (f" ({kept} existing entries kept; --replace overwrites them)" if kept else ""), file=sys.stderr)
+        return 0
+
+    rows, regressions = compare(results, baseline, tolerance)
+    report = {
+        "benchmark": "naviq-microbench",
+        "calibration_s": statistics.median(c for timings in results.values() for _, _, c in timings.values()),
+        "tolerance": tolerance,
+        "results": rows,
+        "regressions": regressions,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed past +{tolerance:.0%} (or their noise):", file=sys.stderr)
+        for key in regressions:
+            row = next(r for r in rows if r["benchmark"] == key)
+            print(f"  {key}: {row['ratio']:.2f}x baseline", file=sys.stderr)
+        return 1
+    print(f"All {len(rows)} benchmark(s) within +{tolerance:.0%} of baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
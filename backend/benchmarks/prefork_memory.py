@@ -0,0 +1,155 @@
+"""
+Prefork memory report for NAVIQ.
+Starts gunicorn with a growing number of workers on a synthetic catalogue,
+warms every worker with catalogue reads, then reads /proc/<pid>/smaps_rollup
+to report proportional set size (PSS) and private memory per worker, with the
+catalogue built once in the master versus separately in every worker. PSS
+splits shared pages between the processes mapping them, so falling per-worker
+PSS as workers are added means copy-on-write sharing is holding up.
+
+Requires Linux and gunicorn (`pip install gunicorn`).
+
+Usage:
+    python -m benchmarks.prefork_memory --workers 1,2,4,8 --questions-per-role 2000
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from urllib.parse import quote
+
+# Add parent directory to path for imports
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.loadtest import _free_port, wait_until_healthy
+from benchmarks.synthetic_data import generate_dataset
+
+
+def read_smaps_rollup(pid: int) -> Dict[str, int]:
+    """Return Rss/Pss/Shared/Private totals in KiB for one process."""
+    totals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                totals[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_kb": totals.get("Rss", 0),
+        "pss_kb": totals.get("Pss", 0),
+        "shared_kb": totals.get("Shared_Clean", 0) + totals.get("Shared_Dirty", 0),
+        "private_kb": totals.get("Private_Clean", 0) + totals.get("Private_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir):
+        try:
+            with open(os.path.join(task_dir, tid, "children")) as f:
+                children.extend(int(c) for c in f.read().split())
+        except OSError:
+            continue
+    return children
+
+
+def warm(port: int, role_names: List[str], rounds: int):
+    """Hit every catalogue endpoint enough times that each worker serves them."""
+    for _ in range(rounds):
+        for path in ["/api/roles", "/api/roadmap/goals", "/api/study", "/api/insights"]:
+            _get(port, path)
+        for name in role_names:
+            _get(port, f"/api/interview?role={quote(name)}")
+            _get(port, f"/api/roadmap?goal={quote(name)}&days=30")
+
+
+def _get(port: int, path: str):
+    # A fresh connection per request spreads requests across the workers
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    conn.getresponse().read()
+    conn.close()
+
+
+def measure(db_path: str, workers: int, preload: bool, role_names: List[str], rounds: int) -> Dict:
+    port = _free_port()
+    env = dict(os.environ, NAVIQ_DB_PATH=db_path, NAVIQ_PRELOAD="1", NAVIQ_PRELOAD_APP="1" if preload else "0",
+               NAVIQ_WORKERS=str(workers), NAVIQ_BIND=f"127.0.0.1:{port}")
+    master = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                              cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(f"http://127.0.0.1:{port}", master)
+        deadline = time.time() + 30
+        while len(child_pids(master.pid)) < workers and time.time() < deadline:
+            time.sleep(0.1)
+        warm(port, role_names, rounds)
+        time.sleep(0.5)
+
+        master_mem = read_smaps_rollup(master.pid)
+        worker_mem = [read_smaps_rollup(pid) for pid in child_pids(master.pid)]
+    finally:
+        master.terminate()
+        master.wait()
+
+    total_pss = master_mem["pss_kb"] + sum(w["pss_kb"] for w in worker_mem)
+    return {
+        "workers": workers,
+        "preload": preload,
+        "master": master_mem,
+        "worker_pss_kb_avg": round(sum(w["pss_kb"] for w in worker_mem) / len(worker_mem)) if worker_mem else 0,
+        "worker_private_kb_avg": (round(sum(w["private_kb"] for w in worker_mem) / len(worker_mem))
+                                  if worker_mem else 0),
+        "total_pss_kb": total_pss,
+        "per_worker": worker_mem,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-worker PSS under gunicorn preforking.")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts")
+    parser.add_argument("--roles", type=int, default=40)
+    parser.add_argument("--questions-per-role", type=int, default=1000)
+    parser.add_argument("--milestones-per-role", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=3, help="Warm-up passes over the catalogue")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        parser.error("smaps_rollup is not available; this report needs Linux 4.14+")
+
+    counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="naviq-prefork-") as tmp:
+        db_path = os.path.join(tmp, "naviq.db")
+        with contextlib.redirect_stdout(sys.stderr):
+            dataset = generate_dataset(db_path, roles=args.roles, questions_per_role=args.questions_per_role,
+                                       milestones_per_role=args.milestones_per_role)
+        role_names = [f"Synthetic Role {i:04d}" for i in range(args.roles)]
+        for preload in (False, True):
+            for workers in counts:
+                result = measure(db_path, workers, preload, role_names, args.rounds)
+                runs.append(result)
+                print(f"  preload={str(preload):<5} workers={workers:<3} "
+                      f"worker PSS avg={result['worker_pss_kb_avg']}KiB "
+                      f"private avg={result['worker_private_kb_avg']}KiB "
+                      f"total PSS={result['total_pss_kb']}KiB", file=sys.stderr)
+
+    text = json.dumps({"benchmark": "naviq-prefork-memory", "dataset": dataset, "runs": runs}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Search latency benchmark for NAVIQ.
+Builds (or reuses) a synthetic database with about a million interview
+questions, then times SearchService.search for several query shapes and
+reports p50/p95/p99 latency per shape, plus the index build time and size.
+
+The synthetic vocabulary is small, so every word matches a large share of
+the corpus. That makes these numbers a worst case for BM25 ranking, which
+scores every matching row before picking the top page.
+
+Usage:
+    python -m benchmarks.search_bench                                  # 1M questions
+    python -m benchmarks.search_bench --fixture /tmp/naviq-1m.db       # build once, reuse
+    python -m benchmarks.search_bench --roles 10 --questions-per-role 1000 --repeat 50
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Add parent directory to path for imports
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.loadtest import percentile
+from benchmarks.synthetic_data import generate_dataset
+from repository.db_repo import DatabaseRepository
+from services.search_service import SearchService
+
+# name -> SearchService.search keyword arguments
+QUERIES: Dict[str, Dict] = {
+    "one_term": {"text": "latency"},
+    "two_terms": {"text": "latency cache"},
+    "four_terms": {"text": "latency cache tensor gradient"},
+    "role_filter": {"text": "latency cache", "role": "Synthetic Role 0001"},
+    "difficulty_filter": {"text": "latency cache", "difficulty": "Advanced"},
+    "kind_filter": {"text": "latency", "kind": "milestone"},
+    "page_10": {"text": "latency cache", "page": 10},
+    "no_match": {"text": "nonexistentword"},
+}
+
+
+def build_fixture(path: str, roles: int, questions_per_role: int) -> float:
+    """Generate the fixture at `path`; returns the build time in seconds."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        generate_dataset(path, roles=roles, questions_per_role=questions_per_role)
+    return time.perf_counter() - start
+
+
+def index_stats(path: str) -> Dict:
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT count(*) FROM search_index").fetchone()[0]
+        questions = conn.execute("SELECT count(*) FROM interview_questions").fetchone()[0]
+    finally:
+        conn.close()
+    return {"indexed_rows": rows, "questions": questions, "db_bytes": os.path.getsize(path)}
+
+
+def time_queries(service: SearchService, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for name, kwargs in QUERIES.items():
+        service.search(**kwargs)  # warm the page cache
+        latencies: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            service.search(**kwargs)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+        print(f"  {name:<18} p50={results[name]['p50_ms']:9.2f}ms "
+              f"p95={results[name]['p95_ms']:9.2f}ms p99={results[name]['p99_ms']:9.2f}ms", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/search latency on a large fixture.")
+    parser.add_argument("--roles", type=int, default=100)
+    parser.add_argument("--questions-per-role", type=int, default=10000)
+    parser.add_argument("--fixture", help="Database to reuse, or to create and keep if missing")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query shape")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="naviq-search-") as tmp:
+        path = args.fixture or os.path.join(tmp, "naviq.db")
+        build_seconds = None
+        if not os.path.exists(path):
+            build_seconds = round(build_fixture(path, args.roles, args.questions_per_role), 2)
+            print(f"  fixture built in {build_seconds}s", file=sys.stderr)
+
+        service = SearchService(DatabaseRepository(path))
+        report = {
+            "benchmark": "naviq-search",
+            "fixture": index_stats(path),
+            "build_seconds": build_seconds,
+            "repeat": args.repeat,
+            "queries": time_queries(service, args.repeat),
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
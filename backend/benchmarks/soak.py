@@ -0,0 +1,295 @@
+"""
+Soak test for the NAVIQ API.
+Serves the app in-process on a synthetic dataset, drives it with a realistic
+traffic mix for a long period and samples process health over time: RSS,
+tracemalloc top allocators, open file descriptors and live SQLite connections
+(descriptors that point at the database file). Series that keep growing are
+reported, and the exit status is 1 when any of them does.
+
+Usage:
+    python -m benchmarks.soak --profile ci                      # ~1 minute, for CI
+    python -m benchmarks.soak --profile overnight --output soak.json
+    python -m benchmarks.soak --duration 7200 --interval 30 --concurrency 8
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+# Add parent directory to path for imports
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.loadtest import MIXES, SCENARIOS, ApiClient, Recorder, load_catalogue
+from benchmarks.synthetic_data import generate_dataset
+from repository.connection_pool import POOL_SIZE
+
+PROFILES = {
+    "ci": {"duration": 60.0, "interval": 2.0, "warmup": 10.0, "concurrency": 4},
+    "overnight": {"duration": 8 * 3600.0, "interval": 60.0, "warmup": 300.0, "concurrency": 8},
+}
+
+# Relative growth over the run that counts as a leak once the trend is monotonic
+GROWTH_THRESHOLDS = {"rss_kb": 0.10, "traced_kb": 0.10, "open_fds": 0.0, "sqlite_connections": 0.0}
+# Absolute growth that is never a leak: each repository pool may still be
+# filling up to POOL_SIZE connections after the warmup. The catalogue, practice,
+# progress and sync databases are pooled, and a WAL connection holds three
+# descriptors (database, -wal and -shm)
+POOLED_DATABASES = 4
+GROWTH_SLACK = {"open_fds": POOL_SIZE * POOLED_DATABASES * 3, "sqlite_connections": POOL_SIZE}
+MONOTONIC_FRACTION = 0.7
+TOP_ALLOCATORS = 10
+
+
+def scenario_duplicate_role(client: ApiClient, rng: random.Random, catalogue: Dict):
+    """Error path: creating an existing role is rejected with 409."""
+    client.request("POST", "/api/roles", "POST /api/roles (duplicate)",
+                   body={"name": rng.choice(catalogue["role_names"])}, expect=409)
+
+
+class CountingRecorder(Recorder):
+    """Recorder that keeps counts only, so the harness itself does not grow."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def record(self, label: str, seconds: float, error: str = None):
+        with self._lock:
+            self.count += 1
+            if error:
+                bucket = self.errors.setdefault(label, {})
+                bucket[error] = bucket.get(error, 0) + 1
+
+
+SOAK_SCENARIOS = dict(SCENARIOS, duplicate_role=scenario_duplicate_role)
+SOAK_MIX = dict(MIXES["mixed"], duplicate_role=2)
+
+
+# ============== SAMPLING ==============
+
+def read_rss_kb() -> int:
+    """Resident set size of this process in KiB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def open_descriptors(db_path: str) -> Dict[str, int]:
+    """Count open fds and the ones that belong to SQLite connections on `db_path`."""
+    fd_dir = "/proc/self/fd"
+    if not os.path.isdir(fd_dir):
+        return {"open_fds": -1, "sqlite_connections": -1}
+    real_db = os.path.realpath(db_path)
+    total = 0
+    sqlite_fds = 0
+    for name in os.listdir(fd_dir):
+        total += 1
+        try:
+            if os.readlink(os.path.join(fd_dir, name)) == real_db:
+                sqlite_fds += 1
+        except OSError:
+            continue
+    return {"open_fds": total, "sqlite_connections": sqlite_fds}
+
+
+def top_allocators(snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot) -> List[Dict]:
+    """Largest allocation growth by source line since the baseline snapshot."""
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = snapshot.filter_traces(ignored).compare_to(baseline.filter_traces(ignored), "lineno")
+    top = []
+    for stat in stats[:TOP_ALLOCATORS]:
+        frame = stat.traceback[0]
+        top.append({
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+        })
+    return top
+
+
+def analyse_growth(samples: List[Dict], key: str, threshold: float, slack: int = 0) -> Dict:
+    """
+    Fit a slope and check whether `key` grows monotonically over the samples,
+    by more than `threshold` relative to the first sample and `slack` in all.
+    """
+    points = [(s["elapsed_s"], s[key]) for s in samples if s.get(key, -1) >= 0]
+    if len(points) < 3:
+        return {"growing": False, "reason": "not enough samples"}
+
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x if var_x else 0.0
+
+    steps = [b - a for a, b in zip(ys, ys[1:]) if b != a]
+    rising = sum(1 for step in steps if step > 0) / len(steps) if steps else 0.0
+    first, last = ys[0], ys[-1]
+    relative = (last - first) / first if first else float(last > first)
+
+    growing = (slope > 0 and rising >= MONOTONIC_FRACTION and last - first > slack
+               and relative > threshold)
+    return {
+        "growing": growing,
+        "first": first,
+        "last": last,
+        "relative_growth": round(relative, 4),
+        "slope_per_hour": round(slope * 3600, 3),
+        "rising_step_fraction": round(rising, 3),
+    }
+
+
+# ============== RUNNER ==============
+
+def run_soak(db_path: str, duration: float, interval: float, warmup: float,
+             concurrency: int, seed: int = 7) -> Dict:
+    """Serve the app in-process, drive traffic and return the sampled report."""
+    from pathlib import Path
+    from werkzeug.serving import make_server
+    import database.db_setup as db_setup
+
+    # db_setup is already imported, so retarget its path before app initialises it
+    db_setup.DB_PATH = Path(db_path)
+    db_setup.PRACTICE_DB_PATH = Path(f"{db_path}.practice")
+    db_setup.PROGRESS_DB_PATH = Path(f"{db_path}.progress")
+    db_setup.SYNC_DB_PATH = Path(f"{db_path}.sync")
+    with contextlib.redirect_stdout(sys.stderr):
+        import app as naviq_app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, naviq_app.app, threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    catalogue = load_catalogue(base_url)
+    recorder = CountingRecorder()
+    names = list(SOAK_MIX)
+    weights = [SOAK_MIX[name] for name in names]
+    stop = threading.Event()
+
+    def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        client = ApiClient(base_url, recorder)
+        while not stop.is_set():
+            SOAK_SCENARIOS[rng.choices(names, weights)[0]](client, rng, catalogue)
+        client.close()
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in workers:
+        thread.start()
+
+    # Let caches and allocator pools settle before the baseline is taken
+    tracemalloc.start()
+    time.sleep(warmup)
+    baseline_snapshot = tracemalloc.take_snapshot()
+    start = time.time()
+    samples = []
+    requests_seen = 0
+    try:
+        while True:
+            elapsed = time.time() - start
+            current, _peak = tracemalloc.get_traced_memory()
+            total_requests = recorder.count
+            sample = {
+                "elapsed_s": round(elapsed, 1),
+                "rss_kb": read_rss_kb(),
+                "traced_kb": round(current / 1024, 1),
+                "requests": total_requests - requests_seen,
+                **open_descriptors(db_path),
+            }
+            requests_seen = total_requests
+            samples.append(sample)
+            print(f"  t={sample['elapsed_s']:>8}s rss={sample['rss_kb']}KiB traced={sample['traced_kb']}KiB "
+                  f"fds={sample['open_fds']} sqlite={sample['sqlite_connections']} "
+                  f"req={sample['requests']}", file=sys.stderr)
+            if elapsed >= duration:
+                break
+            time.sleep(min(interval, max(0.0, duration - elapsed)))
+        final_snapshot = tracemalloc.take_snapshot()
+    finally:
+        stop.set()
+        for thread in workers:
+            thread.join()
+        server.shutdown()
+        tracemalloc.stop()
+
+    errors: Dict[str, int] = {}
+    for bucket in recorder.errors.values():
+        for error, count in bucket.items():
+            errors[error] = errors.get(error, 0) + count
+
+    growth = {key: analyse_growth(samples, key, threshold, GROWTH_SLACK.get(key, 0))
+              for key, threshold in GROWTH_THRESHOLDS.items()}
+    return {
+        "requests": recorder.count,
+        "errors": errors,
+        "growth": growth,
+        "leaks": sorted(key for key, result in growth.items() if result["growing"]),
+        "top_allocators": top_allocators(final_snapshot, baseline_snapshot),
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the NAVIQ API for memory and connection leaks.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="ci")
+    parser.add_argument("--duration", type=float, help="Measured seconds (overrides the profile)")
+    parser.add_argument("--interval", type=float, help="Seconds between samples")
+    parser.add_argument("--warmup", type=float, help="Seconds of traffic before the baseline sample")
+    parser.add_argument("--concurrency", type=int, help="Client threads")
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--questions-per-role", type=int, default=50)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    settings = dict(PROFILES[args.profile])
+    for key in ("duration", "interval", "warmup", "concurrency"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+
+    with tempfile.TemporaryDirectory(prefix="naviq-soak-") as tmp:
+        db_path = os.path.join(tmp, "naviq.db")
+        with contextlib.redirect_stdout(sys.stderr):
+            dataset = generate_dataset(db_path, roles=args.roles, questions_per_role=args.questions_per_role)
+        results = run_soak(db_path, **settings)
+
+    report = {
+        "benchmark": "naviq-soak",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": dict(settings, profile=args.profile, dataset=dataset),
+        **results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if report["leaks"]:
+        print(f"Growth detected in: {', '.join(report['leaks'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
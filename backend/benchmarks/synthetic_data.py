@@ -0,0 +1,166 @@
+"""
+Synthetic dataset generator for NAVIQ benchmarks.
+Builds a standalone SQLite database with the production schema and
+deterministic, realistically shaped content at a configurable scale.
+
+Usage:
+    python -m benchmarks.synthetic_data --db /tmp/naviq_bench.db --questions-per-role 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import get_connection, init_database
+from database.export_content import export_json
+
+WORDS = (
+    "python api cache latency index query schema deploy container cluster "
+    "network security token model training feature pipeline stream batch "
+    "design review testing coverage profiling memory thread async queue "
+    "service gateway storage replica shard backup monitor alert incident "
+    "roadmap mentor interview system scale product metric experiment user "
+    "accessibility layout render state component hook gradient tensor"
+).split()
+
+FOCUS_AREAS = [
+    "Architecture", "Concurrency", "Data Model", "Debugging", "Performance",
+    "Security", "Testing", "Leadership", "Communication", "Tooling",
+]
+DIFFICULTIES = ["Beginner", "Intermediate", "Advanced"]
+CATEGORIES = ["readiness", "velocity", "market"]
+RESOURCE_TYPES = ["Docs", "Guide", "Video", "Checklist", "Course"]
+
+BATCH_SIZE = 10000
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def generate_dataset(db_path, roles: int = 10, questions_per_role: int = 50,
+                     milestones_per_role: int = 8, study_topics: int = 20,
+                     insights: int = 9, seed: int = 42) -> dict:
+    """Create (or replace) a synthetic database at `db_path` and return its row counts."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    init_database(db_path)
+
+    rng = random.Random(seed)
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+
+    role_rows = [
+        (f"Synthetic Role {i:04d}", _sentence(rng, 4, 8), "code", "#7f9a7d")
+        for i in range(roles)
+    ]
+    cursor.executemany('''
+        INSERT INTO roles (name, description, icon, color)
+        VALUES (?, ?, ?, ?)
+    ''', role_rows)
+    cursor.execute("SELECT id FROM roles ORDER BY id")
+    role_ids = [row["id"] for row in cursor.fetchall()]
+
+    # Interview questions, inserted in batches so large scales stay flat in memory
+    batch = []
+    for role_id in role_ids:
+        for _ in range(questions_per_role):
+            batch.append((
+                role_id,
+                _sentence(rng, 8, 16).rstrip(".") + "?",
+                rng.choice(FOCUS_AREAS),
+                rng.choice(DIFFICULTIES),
+                _sentence(rng, 25, 50),
+                _sentence(rng, 8, 14),
+            ))
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany('''
+                    INSERT INTO interview_questions (role_id, question, focus, difficulty, answer, follow_up)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', batch)
+                batch = []
+    if batch:
+        cursor.executemany('''
+            INSERT INTO interview_questions (role_id, question, focus, difficulty, answer, follow_up)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', batch)
+
+    # Roadmaps with milestones, outcomes and resources
+    for role_id in role_ids:
+        cursor.execute('''
+            INSERT INTO roadmaps (role_id, overview)
+            VALUES (?, ?)
+        ''', (role_id, _sentence(rng, 10, 20)))
+        roadmap_id = cursor.lastrowid
+        for idx in range(milestones_per_role):
+            cursor.execute('''
+                INSERT INTO milestones (roadmap_id, title, details, order_index, duration_days)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (roadmap_id, _sentence(rng, 2, 4).rstrip("."), _sentence(rng, 12, 24),
+                  idx, rng.choice([3, 5, 7, 10, 14])))
+            milestone_id = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO milestone_outcomes (milestone_id, outcome)
+                VALUES (?, ?)
+            ''', [(milestone_id, _sentence(rng, 6, 10)) for _ in range(rng.randint(2, 4))])
+            cursor.executemany('''
+                INSERT INTO milestone_resources (milestone_id, resource)
+                VALUES (?, ?)
+            ''', [(milestone_id, _sentence(rng, 3, 6)) for _ in range(rng.randint(1, 3))])
+
+    # Study topics with resources
+    for i in range(study_topics):
+        cursor.execute('''
+            INSERT INTO study_topics (title, summary, subhead, icon)
+            VALUES (?, ?, ?, ?)
+        ''', (f"Topic {i:04d} " + _sentence(rng, 1, 3).rstrip("."), _sentence(rng, 8, 14),
+              _sentence(rng, 6, 10), "book"))
+        topic_id = cursor.lastrowid
+        cursor.executemany('''
+            INSERT INTO study_resources (topic_id, type, title, detail)
+            VALUES (?, ?, ?, ?)
+        ''', [(topic_id, rng.choice(RESOURCE_TYPES), _sentence(rng, 2, 5).rstrip("."),
+               _sentence(rng, 5, 9)) for _ in range(rng.randint(2, 4))])
+
+    cursor.executemany('''
+        INSERT INTO career_insights (category, label, value, meta)
+        VALUES (?, ?, ?, ?)
+    ''', [(CATEGORIES[i % len(CATEGORIES)], _sentence(rng, 2, 3).rstrip("."),
+           f"{rng.randint(1, 100)}%", _sentence(rng, 3, 6)) for i in range(insights)])
+
+    conn.commit()
+    counts = {}
+    for table in ("roles", "interview_questions", "milestones", "study_topics", "career_insights"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic NAVIQ database.")
+    parser.add_argument("--db", required=True, help="Output database path (replaced if present)")
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--questions-per-role", type=int, default=50)
+    parser.add_argument("--milestones-per-role", type=int, default=8)
+    parser.add_argument("--study-topics", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-dir", help="Also export FileRepository JSON files into this directory")
+    args = parser.parse_args()
+
+    counts = generate_dataset(args.db, roles=args.roles, questions_per_role=args.questions_per_role,
+                              milestones_per_role=args.milestones_per_role,
+                              study_topics=args.study_topics, seed=args.seed)
+    if args.json_dir:
+        export_json(args.db, args.json_dir)
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,2 @@
 """Database module for NAVIQ."""
-from .db_setup import get_connection, init_database, DB_PATH
+from .db_setup import get_connection, get_data_version, init_database, rebuild_search_index, DB_PATH
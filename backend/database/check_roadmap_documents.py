@@ -0,0 +1,58 @@
+"""
+Consistency check for NAVIQ's materialized roadmap documents.
+Rebuilds every role's roadmap from the roadmap tables and diffs it against
+the roadmap_documents row the API serves, reporting documents that are
+missing, stale or left over. Triggers keep the table current, so any
+difference points at a write that bypassed them (a dropped trigger, a
+database edited without them) or at a bug in the document query.
+
+Exits 1 when there are differences; --fix then rewrites the whole table.
+
+Usage:
+    python database/check_roadmap_documents.py
+    python database/check_roadmap_documents.py --db /tmp/naviq-1m.db --fix
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import DB_PATH
+from repository.db_repo import DatabaseRepository
+
+
+def check(db_path=None, fix=False):
+    """Diff the documents against their tables and return the report as a dict."""
+    started = time.perf_counter()
+    repository = DatabaseRepository(db_path)
+    problems = repository.check_roadmap_documents()
+    report = {
+        "database": str(db_path or DB_PATH),
+        "problems": problems,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    if fix and problems:
+        report["rebuilt"] = repository.rebuild_roadmap_documents()
+        report["problems_after_fix"] = repository.check_roadmap_documents()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check roadmap_documents against the roadmap tables.")
+    parser.add_argument("--db", help="Database to check (default: the configured NAVIQ database)")
+    parser.add_argument("--fix", action="store_true", help="Rebuild every document when any differs")
+    args = parser.parse_args()
+
+    report = check(args.db, args.fix)
+    print(json.dumps(report, indent=2))
+    remaining = report.get("problems_after_fix", report["problems"])
+    sys.exit(1 if remaining else 0)
+
+
+if __name__ == "__main__":
+    main()
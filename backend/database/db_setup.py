@@ -7,21 +7,49 @@ import sqlite3
 import os
 from pathlib import Path
 
-# Database file path
+# Database file path (NAVIQ_DB_PATH overrides it, e.g. for benchmark datasets)
 DB_DIR = Path(__file__).parent
-DB_PATH = DB_DIR / "naviq.db"
+DB_PATH = Path(os.environ.get("NAVIQ_DB_PATH", DB_DIR / "naviq.db"))
+# Learner state (practice cards and answers) lives in its own file, so its
+# frequent writes don't invalidate the caches that watch DB_PATH
+PRACTICE_DB_PATH = Path(os.environ.get(
+    "NAVIQ_PRACTICE_DB_PATH", DB_PATH.with_name(f"{DB_PATH.stem}-practice.db")))
+# Progress events arrive in bursts; a file of their own keeps their write
+# lock away from practice answers
+PROGRESS_DB_PATH = Path(os.environ.get(
+    "NAVIQ_PROGRESS_DB_PATH", DB_PATH.with_name(f"{DB_PATH.stem}-progress.db")))
+# Where each sync client has got to in change_log; written on every sync
+# request, so it can't share DB_PATH either
+SYNC_DB_PATH = Path(os.environ.get(
+    "NAVIQ_SYNC_DB_PATH", DB_PATH.with_name(f"{DB_PATH.stem}-sync.db")))
 
 
-def get_connection():
+def get_connection(db_path=None, check_same_thread=True):
     """Get a database connection with row factory for dict-like access."""
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = sqlite3.connect(str(db_path or DB_PATH), check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     return conn
 
 
-def init_database():
+def get_data_version(db_path=None) -> int:
+    """Return SQLite's file change counter for the database.
+
+    SQLite bumps this header field on every committed write, from any process,
+    so caches can detect changes by reading 4 bytes instead of querying.
+    """
+    try:
+        with open(str(db_path or DB_PATH), 'rb') as f:
+            header = f.read(28)
+    except OSError:
+        return 0
+    if len(header) < 28:
+        return 0
+    return int.from_bytes(header[24:28], 'big')
+
+
+def init_database(db_path=None):
     """Initialize the database with all required tables."""
-    conn = get_connection()
+    conn = get_connection(db_path)
     cursor = conn.cursor()
     
     # Create roles table
@@ -50,7 +78,12 @@ def init_database():
             FOREIGN KEY (role_id) REFERENCES roles(id) ON DELETE CASCADE
         )
     ''')
-    
+    # A role's questions in ID order, for practice decks walking them by cursor
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interview_questions_role
+        ON interview_questions (role_id, id)
+    ''')
+
     # Create roadmaps table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS roadmaps (
@@ -134,9 +167,481 @@ def init_database():
         )
     ''')
     
+    # Full-text search index over questions, study material and milestones
+    if create_search_index(cursor):
+        rebuild_search_index(cursor)
+    
+    # Row-level log of content writes, for caches that update incrementally
+    create_change_log(cursor)
+    
+    # Each role's roadmap as one JSON document, kept current by triggers
+    if create_roadmap_documents(cursor):
+        rebuild_roadmap_documents(cursor)
+    
+    conn.commit()
+    conn.close()
+    print(f"Database initialized at: {db_path or DB_PATH}")
+
+
+def init_practice_database(db_path=None):
+    """Initialize the practice database (learners' cards, decks and answers)."""
+    conn = get_connection(db_path or PRACTICE_DB_PATH)
+    cursor = conn.cursor()
+    # WAL lets answers be written while other workers read decks
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # SM-2 state of one question for one learner; the due index is the
+    # persisted form of each deck's due queue
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practice_cards (
+            user_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            repetitions INTEGER NOT NULL DEFAULT 0,
+            interval REAL NOT NULL DEFAULT 0,
+            ease REAL NOT NULL,
+            due REAL NOT NULL,
+            lapses INTEGER NOT NULL DEFAULT 0,
+            last_grade INTEGER,
+            reviewed_at REAL,
+            PRIMARY KEY (user_id, question_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_practice_cards_due
+        ON practice_cards (user_id, role_id, due)
+    ''')
+
+    # A learner's deck for one role: where new questions are drawn from
+    # (a cursor over the role's question IDs) and a version bumped on every
+    # write, so workers know when their cached copy of the deck is stale
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practice_decks (
+            user_id TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            start_id INTEGER,
+            cursor_id INTEGER,
+            last_id INTEGER,
+            wrapped INTEGER NOT NULL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, role_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # The card each deck version changed (NULL for cursor moves), so a worker
+    # can catch its cached deck up by re-reading just those cards; only the
+    # latest versions of each deck are kept
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practice_deck_changes (
+            user_id TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            question_id INTEGER,
+            PRIMARY KEY (user_id, role_id, version)
+        ) WITHOUT ROWID
+    ''')
+
+    # Every recorded answer with its self-grade
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practice_answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            grade INTEGER NOT NULL CHECK(grade BETWEEN 0 AND 5),
+            answer TEXT,
+            answered_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_practice_answers_user
+        ON practice_answers (user_id, question_id)
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def init_progress_database(db_path=None):
+    """Initialize the progress database (learners' progress events and their summaries)."""
+    conn = get_connection(db_path or PROGRESS_DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # Append-only; written in batches by the progress flusher. ref_id is the
+    # milestone, question or study topic the event is about, value its
+    # measure (minutes studied, self-grade)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            type TEXT NOT NULL CHECK(type IN ('milestone_completed', 'question_practised', 'study_time')),
+            role_id INTEGER,
+            ref_id INTEGER,
+            value REAL,
+            occurred_at REAL NOT NULL,
+            received_at REAL NOT NULL
+        )
+    ''')
+
+    # Summaries kept up to date with every flushed batch (see
+    # services/progress_rollups.py). role_id 0 stands for all roles together.
+    # Counters per learner, role and day/week/month bucket
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_rollups (
+            user_id TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            grain TEXT NOT NULL CHECK(grain IN ('day', 'week', 'month')),
+            bucket INTEGER NOT NULL,
+            events INTEGER NOT NULL DEFAULT 0,
+            milestones INTEGER NOT NULL DEFAULT 0,
+            questions INTEGER NOT NULL DEFAULT 0,
+            grade_sum REAL NOT NULL DEFAULT 0,
+            grade_count INTEGER NOT NULL DEFAULT 0,
+            study_minutes REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, role_id, grain, bucket)
+        ) WITHOUT ROWID
+    ''')
+
+    # The same counters per role (cohort), with the number of active learners
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_cohort_rollups (
+            role_id INTEGER NOT NULL,
+            grain TEXT NOT NULL CHECK(grain IN ('day', 'week', 'month')),
+            bucket INTEGER NOT NULL,
+            learners INTEGER NOT NULL DEFAULT 0,
+            events INTEGER NOT NULL DEFAULT 0,
+            milestones INTEGER NOT NULL DEFAULT 0,
+            questions INTEGER NOT NULL DEFAULT 0,
+            grade_sum REAL NOT NULL DEFAULT 0,
+            grade_count INTEGER NOT NULL DEFAULT 0,
+            study_minutes REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (role_id, grain, bucket)
+        ) WITHOUT ROWID
+    ''')
+
+    # All-time totals, streak and readiness score per learner and role
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_learners (
+            user_id TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            milestones INTEGER NOT NULL DEFAULT 0,
+            questions INTEGER NOT NULL DEFAULT 0,
+            grade_sum REAL NOT NULL DEFAULT 0,
+            grade_count INTEGER NOT NULL DEFAULT 0,
+            study_minutes REAL NOT NULL DEFAULT 0,
+            first_day INTEGER,
+            last_day INTEGER,
+            streak INTEGER NOT NULL DEFAULT 0,
+            best_streak INTEGER NOT NULL DEFAULT 0,
+            readiness REAL,
+            PRIMARY KEY (user_id, role_id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_progress_learners_role ON progress_learners(role_id)")
+
+    # Learner count and readiness total per role
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_cohorts (
+            role_id INTEGER PRIMARY KEY,
+            learners INTEGER NOT NULL DEFAULT 0,
+            readiness_sum REAL NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Milestones each learner has completed, so repeats aren't counted twice
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_milestones (
+            user_id TEXT NOT NULL,
+            milestone_id INTEGER NOT NULL,
+            role_id INTEGER,
+            completed_at REAL NOT NULL,
+            PRIMARY KEY (user_id, milestone_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # t-digest of each learner metric per role, for percentile ranks (see
+    # services/tdigest.py); learners counts those with a value
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_sketches (
+            role_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            learners INTEGER NOT NULL,
+            digest BLOB NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (role_id, metric)
+        ) WITHOUT ROWID
+    ''')
+
+    # ID of the last event folded into the summaries
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS progress_rollup_state (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            last_event_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO progress_rollup_state (id, last_event_id) VALUES (1, 0)")
+
     conn.commit()
     conn.close()
-    print(f"Database initialized at: {DB_PATH}")
+
+
+def init_sync_database(db_path=None):
+    """Initialize the sync database (the change_log position of each sync client and in-process reader)."""
+    conn = get_connection(db_path or SYNC_DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # version: the change_log seq the client has applied everything up to
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_clients (
+            client_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            seen_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_clients_seen ON sync_clients (seen_at, version)")
+
+    # In-process change_log readers (one per cache per worker): the seq each
+    # has applied, held until expires_at unless renewed
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log_readers (
+            reader_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+# Search index rows are keyed rowid = source id * 8 + kind, so the triggers
+# can update or delete a row without looking it up
+SEARCH_KINDS = {1: 'question', 2: 'study_topic', 3: 'study_resource', 4: 'milestone'}
+
+# table: (kind, title, body, tags, role_id, difficulty) as SQL over row `src`
+_SEARCH_SOURCES = {
+    'interview_questions': (
+        1, "src.question",
+        "coalesce(src.answer, '') || ' ' || coalesce(src.follow_up, '')",
+        "coalesce(src.focus, '')", "src.role_id", "src.difficulty",
+    ),
+    'study_topics': (
+        2, "src.title",
+        "coalesce(src.summary, '') || ' ' || coalesce(src.subhead, '')",
+        "''", "NULL", "NULL",
+    ),
+    'study_resources': (
+        3, "src.title", "coalesce(src.detail, '')",
+        "coalesce(src.type, '')", "NULL", "NULL",
+    ),
+    'milestones': (
+        4, "src.title", "coalesce(src.details, '')", "''",
+        "(SELECT role_id FROM roadmaps WHERE id = src.roadmap_id)", "NULL",
+    ),
+}
+_SEARCH_COLUMNS = "rowid, title, body, tags, facets, role_id, difficulty"
+
+
+def _search_select(table: str, row: str) -> str:
+    """SELECT list producing one search_index row for `row` of `table`."""
+    kind, title, body, tags, role_id, difficulty = _SEARCH_SOURCES[table]
+    # Filters are matched as tokens (kind1 role12 difficultyadvanced) so a
+    # filtered query only scores rows that pass the filter
+    facets = (f"'kind{kind}' || coalesce(' role' || {role_id}, '')"
+              f" || coalesce(' difficulty' || lower({difficulty}), '')")
+    select = f"src.id * 8 + {kind}, {title}, {body}, {tags}, {facets}, {role_id}, {difficulty}"
+    return select.replace('src.', f'{row}.')
+
+
+def create_search_index(cursor) -> bool:
+    """Create the FTS5 search table and its sync triggers; True if newly created."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    created = cursor.fetchone() is None
+    
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            title, body, tags, facets,
+            role_id UNINDEXED, difficulty UNINDEXED,
+            tokenize = 'porter unicode61'
+        )
+    ''')
+    
+    for table, (kind, *_) in _SEARCH_SOURCES.items():
+        for event in ('insert', 'update', 'delete'):
+            statements = []
+            if event != 'insert':
+                statements.append(f"DELETE FROM search_index WHERE rowid = old.id * 8 + {kind};")
+            if event != 'delete':
+                statements.append(
+                    f"INSERT INTO search_index ({_SEARCH_COLUMNS}) SELECT {_search_select(table, 'new')};"
+                )
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS search_{table}_{event}
+                AFTER {event.upper()} ON {table} BEGIN
+                    {' '.join(statements)}
+                END
+            ''')
+    
+    # Deleting a role does not cascade (foreign keys are off), so drop its rows here
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS search_roles_delete
+        AFTER DELETE ON roles BEGIN
+            DELETE FROM search_index WHERE search_index MATCH 'facets:role' || old.id;
+        END
+    ''')
+    return created
+
+
+def rebuild_search_index(cursor) -> None:
+    """Repopulate the search index from the source tables."""
+    cursor.execute("DELETE FROM search_index")
+    for table in _SEARCH_SOURCES:
+        cursor.execute(
+            f"INSERT INTO search_index ({_SEARCH_COLUMNS}) SELECT {_search_select(table, 'src')} FROM {table} AS src"
+        )
+    cursor.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+# Tables whose writes are recorded in change_log (all the catalogue tables)
+CHANGE_LOG_TABLES = ('roles', 'interview_questions', 'roadmaps', 'milestones', 'milestone_outcomes',
+                     'milestone_resources', 'study_topics', 'study_resources', 'career_insights')
+
+
+def create_change_log(cursor) -> None:
+    """Create the change_log table and the triggers that append to it.
+
+    Each committed insert, update or delete of a CHANGE_LOG_TABLES row adds
+    (table_name, row_id, op). Readers remember the last seq they applied and
+    ask for what came after it, from any process. Entries up to
+    change_log_state.pruned_seq have been deleted; a reader that is further
+    behind must rebuild from the tables.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK(op IN ('insert', 'update', 'delete'))
+        )
+    ''')
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_id, seq)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log_state (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            pruned_seq INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO change_log_state (id, pruned_seq) VALUES (1, 0)")
+
+    for table in CHANGE_LOG_TABLES:
+        for event in ('insert', 'update', 'delete'):
+            row = 'old' if event == 'delete' else 'new'
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS changes_{table}_{event}
+                AFTER {event.upper()} ON {table} BEGIN
+                    INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {row}.id, '{event}');
+                END
+            ''')
+
+
+# A role's roadmap document (the first roadmap of the role, as
+# DatabaseRepository.assemble_roadmap builds it), for the roles
+# matching `where` over roles r
+_ROADMAP_DOCUMENT = '''
+    SELECT r.name, r.id, json_object(
+        'id', rm.id, 'role_id', rm.role_id, 'overview', rm.overview, 'created_at', rm.created_at,
+        'role_name', r.name,
+        'milestones', (SELECT json_group_array(json(milestone)) FROM (
+            SELECT json_object(
+                'id', m.id, 'roadmap_id', m.roadmap_id, 'title', m.title, 'details', m.details,
+                'order_index', m.order_index, 'duration_days', m.duration_days, 'created_at', m.created_at,
+                'outcomes', (SELECT json_group_array(outcome) FROM (
+                    SELECT outcome FROM milestone_outcomes WHERE milestone_id = m.id ORDER BY id)),
+                'resources', (SELECT json_group_array(resource) FROM (
+                    SELECT resource FROM milestone_resources WHERE milestone_id = m.id ORDER BY id))
+            ) AS milestone
+            FROM milestones m WHERE m.roadmap_id = rm.id ORDER BY m.order_index, m.id))
+    )
+    FROM roles r JOIN roadmaps rm ON rm.id = (SELECT min(id) FROM roadmaps WHERE role_id = r.id)
+    WHERE {where}
+'''
+
+# table: SQL giving the role ID whose document a write to `row` affects
+_ROADMAP_SOURCES = {
+    'roadmaps': "{row}.role_id",
+    'milestones': "(SELECT role_id FROM roadmaps WHERE id = {row}.roadmap_id)",
+    'milestone_outcomes': '''(SELECT rm.role_id FROM milestones m JOIN roadmaps rm ON rm.id = m.roadmap_id
+                            WHERE m.id = {row}.milestone_id)''',
+    'milestone_resources': '''(SELECT rm.role_id FROM milestones m JOIN roadmaps rm ON rm.id = m.roadmap_id
+                             WHERE m.id = {row}.milestone_id)''',
+}
+
+
+def _refresh_roadmap_documents(roles: str) -> str:
+    """Statements rewriting the documents of the role IDs in `roles` (an SQL list)."""
+    return (f"DELETE FROM roadmap_documents WHERE role_id IN ({roles}); "
+            f"INSERT INTO roadmap_documents (role_name, role_id, document) "
+            f"{_ROADMAP_DOCUMENT.format(where=f'r.id IN ({roles})')};")
+
+
+def create_roadmap_documents(cursor) -> bool:
+    """Create roadmap_documents and the triggers that keep it current; True if newly created.
+
+    GET /api/roadmap reads a role's whole roadmap (milestones, outcomes and
+    resources) with one primary-key lookup here instead of a query per
+    milestone. Any write to the roadmap tables, or to a role's name, rewrites
+    the affected role's document in the same transaction, so the table is
+    never behind the rows it is built from, whoever writes them.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'roadmap_documents'")
+    created = cursor.fetchone() is None
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS roadmap_documents (
+            role_name TEXT PRIMARY KEY,
+            role_id INTEGER NOT NULL UNIQUE,
+            document TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # Keep each rewrite to index searches however big the catalogue gets
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmaps_role ON roadmaps(role_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_milestones_roadmap ON milestones(roadmap_id, order_index, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_milestone_outcomes_milestone ON milestone_outcomes(milestone_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_milestone_resources_milestone ON milestone_resources(milestone_id, id)")
+
+    for table, role in _ROADMAP_SOURCES.items():
+        for event in ('insert', 'update', 'delete'):
+            rows = {'insert': ('new',), 'update': ('old', 'new'), 'delete': ('old',)}[event]
+            roles = ', '.join(role.format(row=row) for row in rows)
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS roadmap_documents_{table}_{event}
+                AFTER {event.upper()} ON {table} BEGIN
+                    {_refresh_roadmap_documents(roles)}
+                END
+            ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS roadmap_documents_roles_update
+        AFTER UPDATE OF name ON roles BEGIN
+            {_refresh_roadmap_documents('new.id')}
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS roadmap_documents_roles_delete
+        AFTER DELETE ON roles BEGIN
+            DELETE FROM roadmap_documents WHERE role_id = old.id;
+        END
+    ''')
+    return created
+
+
+def rebuild_roadmap_documents(cursor) -> None:
+    """Rewrite every roadmap document from the roadmap tables."""
+    cursor.execute("DELETE FROM roadmap_documents")
+    cursor.execute(
+        f"INSERT INTO roadmap_documents (role_name, role_id, document) {_ROADMAP_DOCUMENT.format(where='1')}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+"""
+Near-duplicate report for NAVIQ interview questions.
+Scans the whole catalogue for questions that read almost alike and writes
+the clusters as JSON, for review before cleaning the data up.
+
+MinHash signatures are computed in a process pool; the LSH index's buckets
+then propose candidate pairs, which are confirmed by exact Jaccard
+similarity and joined into clusters. Pairs are only looked for within a
+role unless --cross-role is given.
+
+Usage:
+    python database/dedupe_report.py
+    python database/dedupe_report.py --db /tmp/naviq-1m.db --workers 8 --output dupes.json
+    python database/dedupe_report.py --threshold 0.6 --cross-role
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import DB_PATH
+from repository.db_repo import DatabaseRepository
+from services.duplicate_service import DUPLICATE_THRESHOLD
+from services.minhash import NUM_PERM, LSHIndex, jaccard, shingles, signatures, similarity
+
+BATCH_SIZE = 5000
+# Buckets bigger than this are compared against their first member only,
+# so a large group of identical questions costs n comparisons rather than n^2
+MAX_BUCKET = 100
+
+
+def signature_batch(texts):
+    """Signatures of `texts`, concatenated (runs in the worker processes)."""
+    sigs = array('I')
+    for sig in signatures(texts):
+        sigs.extend(sig)
+    return sigs.tobytes()
+
+
+def find(parent, item):
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+def build_report(db_path=None, threshold=DUPLICATE_THRESHOLD, workers=None, cross_role=False):
+    """Scan the catalogue and return the report as a dict."""
+    started = time.perf_counter()
+    repository = DatabaseRepository(db_path)
+    ids, roles, texts = array('q'), array('q'), []
+    sigs = array('I')
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for batch in repository.iter_question_texts(BATCH_SIZE):
+            ids.extend(row['id'] for row in batch)
+            roles.extend(row['role_id'] for row in batch)
+            texts.extend(row['question'] for row in batch)
+            pending.append(pool.submit(signature_batch, [row['question'] for row in batch]))
+        for future in pending:
+            sigs.frombytes(future.result())
+    signed = time.perf_counter()
+
+    index = LSHIndex()
+    index.build(ids, array('q', [-1]) * len(ids) if cross_role else roles, sigs)
+    position = {question_id: i for i, question_id in enumerate(ids)}
+
+    def sig(i):
+        return sigs[i * NUM_PERM:(i + 1) * NUM_PERM]
+
+    parent = list(range(len(ids)))
+    pairs = 0
+    for bucket in index.collisions():
+        members = [position[question_id] for question_id in bucket]
+        if len(members) > MAX_BUCKET:
+            candidates = ((members[0], other) for other in members[1:])
+        else:
+            candidates = ((a, b) for n, a in enumerate(members) for b in members[n + 1:])
+        for a, b in candidates:
+            # Pairs met again in another band are already joined, or rejected cheaply
+            if find(parent, a) == find(parent, b) or similarity(sig(a), sig(b)) < threshold:
+                continue
+            if jaccard(shingles(texts[a]), shingles(texts[b])) >= threshold:
+                parent[find(parent, b)] = find(parent, a)
+                pairs += 1
+
+    groups = {}
+    for i in range(len(ids)):
+        groups.setdefault(find(parent, i), []).append(i)
+    role_names = repository.get_role_names(set(roles))
+    clusters = [
+        {
+            "roles": sorted({role_names.get(roles[i], str(roles[i])) for i in members}),
+            "questions": [{"id": ids[i], "role_id": roles[i], "question": texts[i]} for i in members],
+        }
+        for members in groups.values() if len(members) > 1
+    ]
+    clusters.sort(key=lambda cluster: (-len(cluster["questions"]), cluster["questions"][0]["id"]))
+
+    return {
+        "database": str(db_path or DB_PATH),
+        "threshold": threshold,
+        "cross_role": cross_role,
+        "questions": len(ids),
+        "duplicate_pairs": pairs,
+        "duplicate_questions": sum(len(cluster["questions"]) - 1 for cluster in clusters),
+        "clusters": clusters,
+        "seconds": {
+            "signatures": round(signed - started, 2),
+            "total": round(time.perf_counter() - started, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report near-duplicate interview questions.")
+    parser.add_argument("--db", help="Database to scan (default: the configured NAVIQ database)")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help="Minimum Jaccard similarity of character 5-grams")
+    parser.add_argument("--workers", type=int, help="Signature processes (default: CPU count)")
+    parser.add_argument("--cross-role", action="store_true", help="Also pair questions of different roles")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = build_report(args.db, args.threshold, args.workers, args.cross_role)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"{report['duplicate_questions']} near-duplicate questions in {len(report['clusters'])} "
+              f"clusters, report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
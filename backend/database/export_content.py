@@ -0,0 +1,97 @@
+"""
+Content pack export for NAVIQ.
+Writes the database content as the JSON files FileRepository reads (the
+file and file-indexed backends): interview_questions.json,
+roadmap_topics.json, roles.json, study_topics.json and career_insights.json.
+Role, study topic and insight IDs are the database's, so IDs the API hands
+out mean the same thing on every backend. Re-export after editing the
+database.
+
+Usage:
+    python database/export_content.py                         # into backend/data
+    python database/export_content.py --db /tmp/naviq-1m.db --out /tmp/pack
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import get_connection
+from repository.db_repo import DatabaseRepository
+
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def export_json(db_path, data_dir) -> None:
+    """Write the database content as a FileRepository content pack into `data_dir`."""
+    os.makedirs(data_dir, exist_ok=True)
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+
+    questions = {}
+    cursor.execute('''
+        SELECT r.name AS role_name, iq.* FROM interview_questions iq
+        JOIN roles r ON iq.role_id = r.id
+        ORDER BY iq.id
+    ''')
+    for row in cursor.fetchall():
+        questions.setdefault(row["role_name"], []).append({
+            "question": row["question"],
+            "focus": row["focus"],
+            "difficulty": row["difficulty"],
+            "answer": row["answer"],
+            "followUp": row["follow_up"],
+        })
+
+    roadmaps = {}
+    cursor.execute('''
+        SELECT r.name AS role_name, rm.id, rm.overview FROM roadmaps rm
+        JOIN roles r ON rm.role_id = r.id
+    ''')
+    for roadmap in cursor.fetchall():
+        cursor.execute("SELECT * FROM milestones WHERE roadmap_id = ? ORDER BY order_index", (roadmap["id"],))
+        milestones = []
+        for m_row in cursor.fetchall():
+            cursor.execute("SELECT outcome FROM milestone_outcomes WHERE milestone_id = ?", (m_row["id"],))
+            outcomes = [row["outcome"] for row in cursor.fetchall()]
+            cursor.execute("SELECT resource FROM milestone_resources WHERE milestone_id = ?", (m_row["id"],))
+            resources = [row["resource"] for row in cursor.fetchall()]
+            milestones.append({
+                "title": m_row["title"],
+                "details": m_row["details"],
+                "duration_days": m_row["duration_days"],
+                "outcomes": outcomes,
+                "resources": resources,
+            })
+        roadmaps[roadmap["role_name"]] = {"overview": roadmap["overview"], "milestones": milestones}
+    conn.close()
+
+    repo = DatabaseRepository(db_path)
+    with open(os.path.join(data_dir, "interview_questions.json"), "w") as f:
+        json.dump(questions, f, indent=2)
+    with open(os.path.join(data_dir, "roadmap_topics.json"), "w") as f:
+        json.dump(roadmaps, f, indent=4)
+    with open(os.path.join(data_dir, "roles.json"), "w") as f:
+        json.dump(repo.get_all_roles(), f, indent=2)
+    with open(os.path.join(data_dir, "study_topics.json"), "w") as f:
+        json.dump(repo.get_all_study_topics(), f, indent=2)
+    with open(os.path.join(data_dir, "career_insights.json"), "w") as f:
+        json.dump(repo.get_career_insights(), f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the NAVIQ database as a JSON content pack.")
+    parser.add_argument("--db", help="Database to export (default: the configured NAVIQ database)")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Directory to write the pack into")
+    args = parser.parse_args()
+
+    export_json(args.db, args.out)
+    print(f"Content pack written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_setup import get_connection, init_database
+from services.duplicate_service import DUPLICATE_THRESHOLD
+from services.minhash import LSHIndex, signature
 
 # Sample data for roles
 ROLES = [
@@ -364,12 +366,18 @@ def seed_database():
     cursor.execute("SELECT id, name FROM roles")
     role_map = {row["name"]: row["id"] for row in cursor.fetchall()}
     
-    # Insert interview questions
+    # Insert interview questions, skipping near-duplicates within a role
+    seen = LSHIndex()
     for role_name, questions in INTERVIEW_QUESTIONS.items():
         role_id = role_map.get(role_name)
         if not role_id:
             continue
         for q in questions:
+            sig = signature(q["question"])
+            if seen.query(sig, role_id, DUPLICATE_THRESHOLD):
+                print(f"Skipping near-duplicate question for {role_name}: {q['question'][:60]}")
+                continue
+            seen.add(len(seen), sig, role_id)
             cursor.execute('''
                 INSERT INTO interview_questions (role_id, question, focus, difficulty, answer, follow_up)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration for NAVIQ.
+
+The app is imported once in the master with NAVIQ_PRELOAD enabled, so the
+catalogue snapshot and compiled routes are built before forking and shared
+copy-on-write by every worker. Collection is paused in the master and the
+heap is frozen just before each fork, so the cyclic GC in the workers never
+touches (and copies) the shared pages.
+
+Streaming endpoints (/api/guide/stream) hold a worker for as long as the
+client reads. NAVIQ_WORKER_CLASS=gthread (with NAVIQ_THREADS) or gevent
+keeps slow readers from tying up whole processes.
+
+Usage:
+    cd backend
+    gunicorn -c gunicorn.conf.py app:app
+    NAVIQ_WORKER_CLASS=gthread NAVIQ_THREADS=8 gunicorn -c gunicorn.conf.py app:app
+"""
+
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("NAVIQ_PRELOAD", "1")
+
+bind = os.environ.get("NAVIQ_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("NAVIQ_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get("NAVIQ_WORKER_CLASS", "sync")
+threads = int(os.environ.get("NAVIQ_THREADS", 1))
+# NAVIQ_PRELOAD_APP=0 makes each worker import the app (and build its own
+# catalogue) after forking; only useful for comparing memory
+preload_app = os.environ.get("NAVIQ_PRELOAD_APP", "1") != "0"
+
+# Avoid collections in the master while the catalogue is being built
+gc.disable()
+
+
+def pre_fork(server, worker):
+    """Move everything allocated so far into the permanent generation."""
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Workers collect normally; frozen objects are never scanned."""
+    gc.enable()
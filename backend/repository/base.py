@@ -0,0 +1,53 @@
+"""
+Repository interface for NAVIQ
+Every catalogue read the API performs, implemented by the SQLite, snapshot and
+JSON file backends. Services depend on this protocol rather than on a backend,
+so the backend can be chosen per deployment (see repository.factory).
+"""
+
+from typing import Dict, Hashable, List, Optional, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class CatalogueRepository(Protocol):
+    """Read side of the catalogue: roles, questions, roadmaps, study topics and insights."""
+
+    def get_data_version(self) -> Hashable:
+        """Return a value that changes whenever the underlying data changes."""
+        ...
+
+    def get_all_roles(self) -> List[Dict]:
+        """Get all roles, ordered by name."""
+        ...
+
+    def get_role_by_name(self, name: str) -> Optional[Dict]:
+        """Get a role by its name."""
+        ...
+
+    def get_role_by_id(self, role_id: int) -> Optional[Dict]:
+        """Get a role by its ID."""
+        ...
+
+    def get_interview_questions(self) -> Dict[str, List[Dict]]:
+        """Get every interview question, grouped by role name."""
+        ...
+
+    def get_questions_for_role(self, role_name: str) -> List[Dict]:
+        """Get all interview questions for a role (empty if unknown)."""
+        ...
+
+    def get_questions_by_role_id(self, role_id: int) -> List[Dict]:
+        """Get all interview questions for a role by ID (empty if unknown)."""
+        ...
+
+    def get_roadmap_for_role(self, role_name: str) -> Optional[Dict]:
+        """Get the roadmap with its milestones for a role."""
+        ...
+
+    def get_all_study_topics(self) -> List[Dict]:
+        """Get all study topics with their resources."""
+        ...
+
+    def get_career_insights(self, category: str = None) -> List[Dict]:
+        """Get career insights, optionally filtered by category."""
+        ...
@@ -0,0 +1,83 @@
+"""
+Connection Pool for NAVIQ
+Idle SQLite connections to one database file, shared by the repositories.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import get_connection
+
+# Idle connections kept per pool
+POOL_SIZE = 8
+
+
+class ConnectionPool:
+    """Pooled connections to one database; None means the configured DB_PATH.
+
+    Opening a connection parses the whole schema, search triggers included,
+    which costs more than most of our queries, so up to `size` idle
+    connections are kept for reuse by any thread.
+
+    A connection must never be used on both sides of a fork(): SQLite's
+    locks are per process, so a forked copy could write around the parent's
+    locks and corrupt the database. Idle connections are owned by the
+    process that opened them, and a forked child starts with an empty pool.
+    """
+
+    def __init__(self, db_path=None, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self._size = size
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Connections inherited through fork(); kept referenced, never used
+        # or closed, since closing one could checkpoint the parent's WAL
+        self._inherited: List[sqlite3.Connection] = []
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield a pooled connection, rolled back on error and returned after use."""
+        with self._lock:
+            self._check_pid()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = get_connection(self.db_path, check_same_thread=False)
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Never hand out a connection with a transaction left open
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._check_pid()
+                if len(self._idle) < self._size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def _check_pid(self) -> None:
+        """Set aside the idle connections copied from the parent after a fork (lock held)."""
+        if self._pid != os.getpid():
+            self._inherited.extend(self._idle)
+            self._idle = []
+            self._pid = os.getpid()
+
+    def close(self) -> None:
+        """Close every idle connection (those this process opened)."""
+        with self._lock:
+            self._check_pid()
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
@@ -3,401 +3,755 @@ Database Repository for NAVIQ
 Handles all database operations for the application.
 """
 
+import json
 import sqlite3
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterator, Optional, Any
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db_setup import get_connection
+from database.db_setup import CHANGE_LOG_TABLES, get_data_version, rebuild_roadmap_documents
+from repository.connection_pool import POOL_SIZE, ConnectionPool
 
 
 class DatabaseRepository:
     """Repository class for database operations."""
     
+    def __init__(self, db_path=None, pool_size: int = POOL_SIZE):
+        # None means the configured DB_PATH
+        self._pool = ConnectionPool(db_path, pool_size)
+    
+    def _connect(self):
+        """Borrow a pooled connection (a context manager)."""
+        return self._pool.connection()
+    
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        self._pool.close()
+    
+    def get_data_version(self) -> int:
+        """Get a number that changes whenever any write is committed."""
+        return get_data_version(self._pool.db_path)
+    
     # ============== ROLES ==============
     
     def get_all_roles(self) -> List[Dict]:
         """Get all roles from the database."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM roles ORDER BY name")
-        roles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return roles
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM roles ORDER BY name")
+            roles = [dict(row) for row in cursor.fetchall()]
+            return roles
     
     def get_role_by_name(self, name: str) -> Optional[Dict]:
         """Get a role by its name."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM roles WHERE name = ?", (name,))
-        row = cursor.fetchone()
-        conn.close()
-        return dict(row) if row else None
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM roles WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
     
     def get_role_by_id(self, role_id: int) -> Optional[Dict]:
         """Get a role by its ID."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM roles WHERE id = ?", (role_id,))
-        row = cursor.fetchone()
-        conn.close()
-        return dict(row) if row else None
-    
-    def add_role(self, name: str, description: str = "", icon: str = "code", color: str = "#7f9a7d") -> int:
-        """Add a new role."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO roles (name, description, icon, color)
-            VALUES (?, ?, ?, ?)
-        ''', (name, description, icon, color))
-        role_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return role_id
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM roles WHERE id = ?", (role_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def add_role(self, name: str, description: str = "", icon: str = "code",
+                 color: str = "#7f9a7d") -> Optional[int]:
+        """Add a new role. Returns None if a role with that name already exists."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    INSERT INTO roles (name, description, icon, color)
+                    VALUES (?, ?, ?, ?)
+                ''', (name, description, icon, color))
+            except sqlite3.IntegrityError:
+                return None
+            role_id = cursor.lastrowid
+            conn.commit()
+            return role_id
     
     def update_role(self, role_id: int, name: str = None, description: str = None, 
-                    icon: str = None, color: str = None) -> bool:
-        """Update a role."""
-        conn = get_connection()
-        cursor = conn.cursor()
+                    icon: str = None, color: str = None) -> Optional[bool]:
+        """Update a role. Returns None if another role already has the new name."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        updates = []
-        values = []
+            updates = []
+            values = []
         
-        if name is not None:
-            updates.append("name = ?")
-            values.append(name)
-        if description is not None:
-            updates.append("description = ?")
-            values.append(description)
-        if icon is not None:
-            updates.append("icon = ?")
-            values.append(icon)
-        if color is not None:
-            updates.append("color = ?")
-            values.append(color)
+            if name is not None:
+                updates.append("name = ?")
+                values.append(name)
+            if description is not None:
+                updates.append("description = ?")
+                values.append(description)
+            if icon is not None:
+                updates.append("icon = ?")
+                values.append(icon)
+            if color is not None:
+                updates.append("color = ?")
+                values.append(color)
         
-        if not updates:
-            conn.close()
-            return False
+            if not updates:
+                return False
         
-        values.append(role_id)
-        query = f"UPDATE roles SET {', '.join(updates)} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+            values.append(role_id)
+            query = f"UPDATE roles SET {', '.join(updates)} WHERE id = ?"
+            try:
+                cursor.execute(query, values)
+            except sqlite3.IntegrityError:
+                return None
+            conn.commit()
+            success = cursor.rowcount > 0
+            return success
     
     def delete_role(self, role_id: int) -> bool:
         """Delete a role and all related data."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
+            conn.commit()
+            success = cursor.rowcount > 0
+            return success
     
     # ============== INTERVIEW QUESTIONS ==============
     
     def get_questions_for_role(self, role_name: str) -> List[Dict]:
         """Get all interview questions for a specific role."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT iq.* FROM interview_questions iq
-            JOIN roles r ON iq.role_id = r.id
-            WHERE r.name = ?
-            ORDER BY iq.difficulty, iq.focus
-        ''', (role_name,))
-        questions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return questions
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT iq.* FROM interview_questions iq
+                JOIN roles r ON iq.role_id = r.id
+                WHERE r.name = ?
+                ORDER BY iq.difficulty, iq.focus
+            ''', (role_name,))
+            questions = [dict(row) for row in cursor.fetchall()]
+            return questions
+    
+    def get_interview_questions(self) -> Dict[str, List[Dict]]:
+        """Get every interview question, grouped by role name."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT iq.*, r.name as role_name FROM interview_questions iq
+                JOIN roles r ON iq.role_id = r.id
+                ORDER BY iq.id
+            ''')
+            grouped = {}
+            for row in cursor.fetchall():
+                question = dict(row)
+                grouped.setdefault(question.pop('role_name'), []).append(question)
+            return grouped
     
     def get_questions_by_role_id(self, role_id: int) -> List[Dict]:
         """Get all interview questions for a role by ID."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM interview_questions
-            WHERE role_id = ?
-            ORDER BY difficulty, focus
-        ''', (role_id,))
-        questions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return questions
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM interview_questions
+                WHERE role_id = ?
+                ORDER BY difficulty, focus
+            ''', (role_id,))
+            questions = [dict(row) for row in cursor.fetchall()]
+            return questions
+    
+    def iter_question_texts(self, batch_size: int = 10000) -> Iterator[List[Dict]]:
+        """Yield (id, role_id, question) rows for every question in id order, in batches."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, role_id, question FROM interview_questions ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
     
+    def get_question_texts(self, question_ids) -> List[Dict]:
+        """Get (id, role_id, question) rows by ID (missing IDs are left out)."""
+        question_ids = list(question_ids)
+        questions = []
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(question_ids), 500):
+                chunk = question_ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT id, role_id, question FROM interview_questions
+                    WHERE id IN ({', '.join('?' * len(chunk))})
+                ''', chunk)
+                questions.extend(dict(row) for row in cursor.fetchall())
+        return questions
+
+    def get_question_by_id(self, question_id: int) -> Optional[Dict]:
+        """Get an interview question by its ID."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM interview_questions WHERE id = ?", (question_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def get_question_id_range(self, role_id: int) -> Optional[tuple]:
+        """Get the lowest and highest question ID of a role, or None if it has none."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT min(id), max(id) FROM interview_questions WHERE role_id = ?", (role_id,))
+            low, high = cursor.fetchone()
+            return None if low is None else (low, high)
+
+    def next_question_id(self, role_id: int, after_id: int, before_id: int = None) -> Optional[int]:
+        """Get the role's first question ID above `after_id` (and below `before_id`), if any."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id FROM interview_questions
+                WHERE role_id = ? AND id > ? AND id < ?
+                ORDER BY id LIMIT 1
+            ''', (role_id, after_id, (1 << 63) - 1 if before_id is None else before_id))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
     def add_question(self, role_id: int, question: str, focus: str = "", 
                      difficulty: str = "Intermediate", answer: str = "", follow_up: str = "") -> int:
         """Add a new interview question."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO interview_questions (role_id, question, focus, difficulty, answer, follow_up)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (role_id, question, focus, difficulty, answer, follow_up))
-        question_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return question_id
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO interview_questions (role_id, question, focus, difficulty, answer, follow_up)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (role_id, question, focus, difficulty, answer, follow_up))
+            question_id = cursor.lastrowid
+            conn.commit()
+            return question_id
     
     def update_question(self, question_id: int, **kwargs) -> bool:
         """Update an interview question."""
-        conn = get_connection()
-        cursor = conn.cursor()
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        allowed_fields = ['question', 'focus', 'difficulty', 'answer', 'follow_up']
-        updates = []
-        values = []
+            allowed_fields = ['question', 'focus', 'difficulty', 'answer', 'follow_up']
+            updates = []
+            values = []
         
-        for field in allowed_fields:
-            if field in kwargs and kwargs[field] is not None:
-                updates.append(f"{field} = ?")
-                values.append(kwargs[field])
+            for field in allowed_fields:
+                if field in kwargs and kwargs[field] is not None:
+                    updates.append(f"{field} = ?")
+                    values.append(kwargs[field])
         
-        if not updates:
-            conn.close()
-            return False
+            if not updates:
+                return False
         
-        values.append(question_id)
-        query = f"UPDATE interview_questions SET {', '.join(updates)} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+            values.append(question_id)
+            query = f"UPDATE interview_questions SET {', '.join(updates)} WHERE id = ?"
+            cursor.execute(query, values)
+            conn.commit()
+            success = cursor.rowcount > 0
+            return success
     
     def delete_question(self, question_id: int) -> bool:
         """Delete an interview question."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM interview_questions WHERE id = ?", (question_id,))
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM interview_questions WHERE id = ?", (question_id,))
+            conn.commit()
+            success = cursor.rowcount > 0
+            return success
     
     # ============== ROADMAPS ==============
     
     def get_roadmap_for_role(self, role_name: str) -> Optional[Dict]:
-        """Get roadmap with milestones for a role."""
-        conn = get_connection()
-        cursor = conn.cursor()
+        """Get roadmap with milestones for a role (its materialized document)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT document FROM roadmap_documents WHERE role_name = ?", (role_name,))
+            row = cursor.fetchone()
+            return json.loads(row['document']) if row else None
+    
+    def assemble_roadmap(self, role_name: str) -> Optional[Dict]:
+        """Build a role's roadmap from the roadmap tables, as roadmap_documents should hold it."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        # Get roadmap
-        cursor.execute('''
-            SELECT rm.*, r.name as role_name FROM roadmaps rm
-            JOIN roles r ON rm.role_id = r.id
-            WHERE r.name = ?
-        ''', (role_name,))
-        roadmap_row = cursor.fetchone()
+            # Get roadmap (a role's first, if it has several)
+            cursor.execute('''
+                SELECT rm.*, r.name as role_name FROM roadmaps rm
+                JOIN roles r ON rm.role_id = r.id
+                WHERE r.name = ?
+                ORDER BY rm.id LIMIT 1
+            ''', (role_name,))
+            roadmap_row = cursor.fetchone()
         
-        if not roadmap_row:
-            conn.close()
-            return None
+            if not roadmap_row:
+                return None
         
-        roadmap = dict(roadmap_row)
-        roadmap_id = roadmap['id']
+            roadmap = dict(roadmap_row)
+            roadmap_id = roadmap['id']
         
-        # Get milestones
-        cursor.execute('''
-            SELECT * FROM milestones
-            WHERE roadmap_id = ?
-            ORDER BY order_index
-        ''', (roadmap_id,))
-        milestones = []
+            # Get milestones
+            cursor.execute('''
+                SELECT * FROM milestones
+                WHERE roadmap_id = ?
+                ORDER BY order_index, id
+            ''', (roadmap_id,))
+            milestones = []
         
-        for m_row in cursor.fetchall():
-            milestone = dict(m_row)
-            milestone_id = milestone['id']
+            for m_row in cursor.fetchall():
+                milestone = dict(m_row)
+                milestone_id = milestone['id']
             
-            # Get outcomes
-            cursor.execute('''
-                SELECT outcome FROM milestone_outcomes
-                WHERE milestone_id = ?
-            ''', (milestone_id,))
-            milestone['outcomes'] = [row['outcome'] for row in cursor.fetchall()]
+                # Get outcomes
+                cursor.execute('''
+                    SELECT outcome FROM milestone_outcomes
+                    WHERE milestone_id = ? ORDER BY id
+                ''', (milestone_id,))
+                milestone['outcomes'] = [row['outcome'] for row in cursor.fetchall()]
             
-            # Get resources
-            cursor.execute('''
-                SELECT resource, resource_url FROM milestone_resources
-                WHERE milestone_id = ?
-            ''', (milestone_id,))
-            milestone['resources'] = [row['resource'] for row in cursor.fetchall()]
+                # Get resources
+                cursor.execute('''
+                    SELECT resource, resource_url FROM milestone_resources
+                    WHERE milestone_id = ? ORDER BY id
+                ''', (milestone_id,))
+                milestone['resources'] = [row['resource'] for row in cursor.fetchall()]
             
-            milestones.append(milestone)
+                milestones.append(milestone)
         
-        roadmap['milestones'] = milestones
-        conn.close()
-        return roadmap
+            roadmap['milestones'] = milestones
+            return roadmap
+    
+    def check_roadmap_documents(self) -> List[Dict]:
+        """
+        Compare every roadmap document with the roadmap assembled from its
+        tables. Returns the differences, {"role", "problem"} with problem
+        "missing", "stale" or "orphaned" (a document for a role without a
+        roadmap); empty when the table is consistent.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT role_name, document FROM roadmap_documents")
+            documents = {row['role_name']: row['document'] for row in cursor.fetchall()}
+            cursor.execute("SELECT name FROM roles ORDER BY name")
+            role_names = [row['name'] for row in cursor.fetchall()]
+        problems = []
+        for role_name in role_names:
+            expected = self.assemble_roadmap(role_name)
+            document = documents.pop(role_name, None)
+            if expected is None:
+                if document is not None:
+                    problems.append({"role": role_name, "problem": "orphaned"})
+            elif document is None:
+                problems.append({"role": role_name, "problem": "missing"})
+            elif json.loads(document) != expected:
+                problems.append({"role": role_name, "problem": "stale"})
+        problems.extend({"role": role_name, "problem": "orphaned"} for role_name in documents)
+        return problems
+    
+    def rebuild_roadmap_documents(self) -> int:
+        """Rewrite every roadmap document from the roadmap tables; returns how many there are."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            rebuild_roadmap_documents(cursor)
+            conn.commit()
+            cursor.execute("SELECT count(*) FROM roadmap_documents")
+            return cursor.fetchone()[0]
     
     def add_roadmap(self, role_id: int, overview: str = "") -> int:
         """Add a new roadmap."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO roadmaps (role_id, overview)
-            VALUES (?, ?)
-        ''', (role_id, overview))
-        roadmap_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return roadmap_id
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO roadmaps (role_id, overview)
+                VALUES (?, ?)
+            ''', (role_id, overview))
+            roadmap_id = cursor.lastrowid
+            conn.commit()
+            return roadmap_id
     
     def add_milestone(self, roadmap_id: int, title: str, details: str = "", 
                       order_index: int = 0, outcomes: List[str] = None, 
-                      resources: List[str] = None) -> int:
+                      resources: List[str] = None, duration_days: int = 7) -> int:
         """Add a milestone to a roadmap."""
-        conn = get_connection()
-        cursor = conn.cursor()
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO milestones (roadmap_id, title, details, order_index)
-            VALUES (?, ?, ?, ?)
-        ''', (roadmap_id, title, details, order_index))
-        milestone_id = cursor.lastrowid
+            cursor.execute('''
+                INSERT INTO milestones (roadmap_id, title, details, order_index, duration_days)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (roadmap_id, title, details, order_index, duration_days))
+            milestone_id = cursor.lastrowid
         
-        if outcomes:
-            for outcome in outcomes:
-                cursor.execute('''
-                    INSERT INTO milestone_outcomes (milestone_id, outcome)
-                    VALUES (?, ?)
-                ''', (milestone_id, outcome))
+            if outcomes:
+                for outcome in outcomes:
+                    cursor.execute('''
+                        INSERT INTO milestone_outcomes (milestone_id, outcome)
+                        VALUES (?, ?)
+                    ''', (milestone_id, outcome))
         
-        if resources:
-            for resource in resources:
-                cursor.execute('''
-                    INSERT INTO milestone_resources (milestone_id, resource)
-                    VALUES (?, ?)
-                ''', (milestone_id, resource))
+            if resources:
+                for resource in resources:
+                    cursor.execute('''
+                        INSERT INTO milestone_resources (milestone_id, resource)
+                        VALUES (?, ?)
+                    ''', (milestone_id, resource))
         
-        conn.commit()
-        conn.close()
-        return milestone_id
-    
+            conn.commit()
+            return milestone_id
+
+    def get_role_features(self, role_ids=None) -> List[Dict]:
+        """Get roles (all, or by ID) with their milestones' titles, details and outcomes."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            if role_ids is None:
+                cursor.execute("SELECT id, name, description FROM roles ORDER BY id")
+                roles = [dict(row) for row in cursor.fetchall()]
+            else:
+                role_ids = list(role_ids)
+                roles = []
+                for start in range(0, len(role_ids), 500):
+                    chunk = role_ids[start:start + 500]
+                    cursor.execute(f'''
+                        SELECT id, name, description FROM roles
+                        WHERE id IN ({', '.join('?' * len(chunk))}) ORDER BY id
+                    ''', chunk)
+                    roles.extend(dict(row) for row in cursor.fetchall())
+            by_id = {role['id']: dict(role, milestones=[]) for role in roles}
+            if not by_id:
+                return []
+
+            milestones = {}
+            ids = list(by_id)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT m.id, m.title, m.details, rm.role_id FROM milestones m
+                    JOIN roadmaps rm ON m.roadmap_id = rm.id
+                    WHERE rm.role_id IN ({', '.join('?' * len(chunk))})
+                    ORDER BY rm.role_id, m.order_index, m.id
+                ''', chunk)
+                for row in cursor.fetchall():
+                    milestone = {"id": row['id'], "title": row['title'], "details": row['details'], "outcomes": []}
+                    milestones[row['id']] = milestone
+                    by_id[row['role_id']]['milestones'].append(milestone)
+
+            ids = list(milestones)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT milestone_id, outcome FROM milestone_outcomes
+                    WHERE milestone_id IN ({', '.join('?' * len(chunk))}) ORDER BY id
+                ''', chunk)
+                for row in cursor.fetchall():
+                    milestones[row['milestone_id']]['outcomes'].append(row['outcome'])
+            return list(by_id.values())
+
+    def get_milestone_role_ids(self, milestone_ids) -> Dict[int, int]:
+        """Map milestone IDs to the ID of the role whose roadmap holds them."""
+        milestone_ids = list(milestone_ids)
+        role_ids = {}
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(milestone_ids), 500):
+                chunk = milestone_ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT m.id, rm.role_id FROM milestones m
+                    JOIN roadmaps rm ON m.roadmap_id = rm.id
+                    WHERE m.id IN ({', '.join('?' * len(chunk))})
+                ''', chunk)
+                role_ids.update((row['id'], row['role_id']) for row in cursor.fetchall())
+        return role_ids
+
+    def get_milestone_counts(self, role_ids) -> Dict[int, int]:
+        """Map role IDs to the number of milestones on their roadmaps (roles without any are left out)."""
+        role_ids = list(role_ids)
+        counts = {}
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(role_ids), 500):
+                chunk = role_ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT rm.role_id, count(*) FROM milestones m
+                    JOIN roadmaps rm ON m.roadmap_id = rm.id
+                    WHERE rm.role_id IN ({', '.join('?' * len(chunk))})
+                    GROUP BY rm.role_id
+                ''', chunk)
+                counts.update((row[0], row[1]) for row in cursor.fetchall())
+        return counts
+
     # ============== STUDY TOPICS ==============
     
     def get_all_study_topics(self) -> List[Dict]:
         """Get all study topics with their resources."""
-        conn = get_connection()
-        cursor = conn.cursor()
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM study_topics ORDER BY title")
-        topics = []
+            cursor.execute("SELECT * FROM study_topics ORDER BY title")
+            topics = []
         
-        for t_row in cursor.fetchall():
-            topic = dict(t_row)
-            topic_id = topic['id']
+            for t_row in cursor.fetchall():
+                topic = dict(t_row)
+                topic_id = topic['id']
             
-            cursor.execute('''
-                SELECT type, title, detail, url FROM study_resources
-                WHERE topic_id = ?
-            ''', (topic_id,))
-            topic['resources'] = [dict(row) for row in cursor.fetchall()]
-            topics.append(topic)
+                cursor.execute('''
+                    SELECT type, title, detail, url FROM study_resources
+                    WHERE topic_id = ?
+                ''', (topic_id,))
+                topic['resources'] = [dict(row) for row in cursor.fetchall()]
+                topics.append(topic)
         
-        conn.close()
-        return topics
+            return topics
     
     def add_study_topic(self, title: str, summary: str = "", subhead: str = "", 
                         icon: str = "book") -> int:
         """Add a new study topic."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO study_topics (title, summary, subhead, icon)
-            VALUES (?, ?, ?, ?)
-        ''', (title, summary, subhead, icon))
-        topic_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return topic_id
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO study_topics (title, summary, subhead, icon)
+                VALUES (?, ?, ?, ?)
+            ''', (title, summary, subhead, icon))
+            topic_id = cursor.lastrowid
+            conn.commit()
+            return topic_id
     
     def add_study_resource(self, topic_id: int, title: str, type_: str = "Docs", 
                            detail: str = "", url: str = "") -> int:
         """Add a resource to a study topic."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO study_resources (topic_id, type, title, detail, url)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (topic_id, type_, title, detail, url))
-        resource_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return resource_id
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO study_resources (topic_id, type, title, detail, url)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (topic_id, type_, title, detail, url))
+            resource_id = cursor.lastrowid
+            conn.commit()
+            return resource_id
     
     # ============== CAREER INSIGHTS ==============
     
     def get_career_insights(self, category: str = None) -> List[Dict]:
         """Get career insights, optionally filtered by category."""
-        conn = get_connection()
-        cursor = conn.cursor()
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        if category:
-            cursor.execute('''
-                SELECT * FROM career_insights WHERE category = ?
-            ''', (category,))
-        else:
-            cursor.execute("SELECT * FROM career_insights")
+            if category:
+                cursor.execute('''
+                    SELECT * FROM career_insights WHERE category = ?
+                ''', (category,))
+            else:
+                cursor.execute("SELECT * FROM career_insights")
         
-        insights = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return insights
+            insights = [dict(row) for row in cursor.fetchall()]
+            return insights
     
     def add_career_insight(self, category: str, label: str, value: str, meta: str = "") -> int:
         """Add a career insight."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO career_insights (category, label, value, meta)
-            VALUES (?, ?, ?, ?)
-        ''', (category, label, value, meta))
-        insight_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return insight_id
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO career_insights (category, label, value, meta)
+                VALUES (?, ?, ?, ?)
+            ''', (category, label, value, meta))
+            insight_id = cursor.lastrowid
+            conn.commit()
+            return insight_id
     
     def update_career_insight(self, insight_id: int, **kwargs) -> bool:
         """Update a career insight."""
-        conn = get_connection()
-        cursor = conn.cursor()
+        with self._connect() as conn:
+            cursor = conn.cursor()
         
-        allowed_fields = ['category', 'label', 'value', 'meta']
-        updates = []
-        values = []
+            allowed_fields = ['category', 'label', 'value', 'meta']
+            updates = []
+            values = []
         
-        for field in allowed_fields:
-            if field in kwargs and kwargs[field] is not None:
-                updates.append(f"{field} = ?")
-                values.append(kwargs[field])
+            for field in allowed_fields:
+                if field in kwargs and kwargs[field] is not None:
+                    updates.append(f"{field} = ?")
+                    values.append(kwargs[field])
         
-        if not updates:
-            conn.close()
-            return False
+            if not updates:
+                return False
         
-        values.append(insight_id)
-        query = f"UPDATE career_insights SET {', '.join(updates)} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+            values.append(insight_id)
+            query = f"UPDATE career_insights SET {', '.join(updates)} WHERE id = ?"
+            cursor.execute(query, values)
+            conn.commit()
+            success = cursor.rowcount > 0
+            return success
     
     def delete_career_insight(self, insight_id: int) -> bool:
         """Delete a career insight."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM career_insights WHERE id = ?", (insight_id,))
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM career_insights WHERE id = ?", (insight_id,))
+            conn.commit()
+            success = cursor.rowcount > 0
+            return success
+
+    
+    # ============== SEARCH ==============
+    
+    def search(self, match: str, role_id: int = None, difficulty: str = None,
+               kind: int = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Run an FTS5 query against the search index, best BM25 score first.
+
+        `match` is searched in the title, body and tags columns; the filters
+        are matched against the facets column in the same query.
+        """
+        facets = []
+        if role_id is not None:
+            facets.append(f'"role{int(role_id)}"')
+        if difficulty:
+            facets.append('"difficulty' + difficulty.lower().replace('"', '') + '"')
+        if kind is not None:
+            facets.append(f'"kind{int(kind)}"')
+        query = f"{{title body tags}} : ({match})"
+        if facets:
+            query += f" AND facets : ({' '.join(facets)})"
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            # Rank first and fetch snippets only for the page: snippet() in the
+            # ranking query would run for every matching row
+            # Title matches weigh the most, then tags (focus/type), then body text
+            cursor.execute('''
+                SELECT rowid, bm25(search_index, 5.0, 1.0, 2.0, 0.0) AS score
+                FROM search_index
+                WHERE search_index MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            ''', (query, limit, offset))
+            scores = {row['rowid']: row['score'] for row in cursor.fetchall()}
+            if not scores:
+                return []
+            
+            placeholders = ', '.join('?' * len(scores))
+            cursor.execute(f'''
+                SELECT rowid, title, role_id, difficulty,
+                       snippet(search_index, 0, '<mark>', '</mark>', '…', 16) AS title_snippet,
+                       snippet(search_index, 1, '<mark>', '</mark>', '…', 16) AS body_snippet
+                FROM search_index
+                WHERE search_index MATCH ? AND rowid IN ({placeholders})
+            ''', (query, *scores))
+            rows = {row['rowid']: dict(row, score=scores[row['rowid']]) for row in cursor.fetchall()}
+            return [rows[rowid] for rowid in scores if rowid in rows]
+    
+    def get_role_names(self, role_ids) -> Dict[int, str]:
+        """Map role IDs to names."""
+        role_ids = list(role_ids)
+        if not role_ids:
+            return {}
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            placeholders = ', '.join('?' * len(role_ids))
+            cursor.execute(f"SELECT id, name FROM roles WHERE id IN ({placeholders})", role_ids)
+            return {row['id']: row['name'] for row in cursor.fetchall()}
+    
+    def iter_search_documents(self, kinds, batch_size: int = 10000) -> Iterator[List[Dict]]:
+        """Yield the search index rows of the given kinds in rowid order, in batches."""
+        kinds = [int(kind) for kind in kinds]
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT rowid, title, body, tags, role_id
+                FROM search_index
+                WHERE rowid % 8 IN ({', '.join('?' * len(kinds))})
+                ORDER BY rowid
+            ''', kinds)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+    
+    def get_search_documents(self, rowids) -> List[Dict]:
+        """Get search index rows by rowid (missing rows are left out)."""
+        rowids = list(rowids)
+        documents = []
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(rowids), 500):
+                chunk = rowids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT rowid, title, body, tags, role_id
+                    FROM search_index
+                    WHERE rowid IN ({', '.join('?' * len(chunk))})
+                ''', chunk)
+                documents.extend(dict(row) for row in cursor.fetchall())
+        return documents
+    
+    # ============== CHANGE LOG ==============
+    
+    def get_last_change(self) -> int:
+        """Get the seq of the newest change_log entry (0 when there never was one)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            # Pruning may have emptied the log
+            cursor.execute('''
+                SELECT max(coalesce((SELECT max(seq) FROM change_log), 0), pruned_seq)
+                FROM change_log_state WHERE id = 1
+            ''')
+            return cursor.fetchone()[0]
+    
+    def get_changes(self, since: int, limit: int = 10000) -> Optional[List[Dict]]:
+        """Get change_log entries after `since`, oldest first, or None if some were pruned (rebuild instead)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pruned_seq FROM change_log_state WHERE id = 1")
+            if since < cursor.fetchone()[0]:
+                return None
+            cursor.execute('''
+                SELECT seq, table_name, row_id, op FROM change_log
+                WHERE seq > ? ORDER BY seq LIMIT ?
+            ''', (since, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_pruned_change(self) -> int:
+        """Get the seq change_log has been pruned up to (0 when never pruned)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pruned_seq FROM change_log_state WHERE id = 1")
+            return cursor.fetchone()[0]
+    
+    def get_rows(self, table: str, row_ids) -> List[Dict]:
+        """Get the current rows of a CHANGE_LOG_TABLES table by ID (deleted ones are left out)."""
+        if table not in CHANGE_LOG_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        row_ids = list(row_ids)
+        rows = []
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(row_ids), 500):
+                chunk = row_ids[start:start + 500]
+                cursor.execute(f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                rows.extend(dict(row) for row in cursor.fetchall())
+        return rows
+    
+    def prune_changes(self, through: int, min_entries: int = 1) -> int:
+        """
+        Delete change_log entries up to seq `through`, if at least
+        `min_entries` would go. Returns the number deleted.
+
+        Entries after `through` stay even when a later write to the same row
+        supersedes them: a client between the two must still see the row's
+        insert, not an update for a row it never had.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT count(*) FROM change_log WHERE seq <= ?", (through,))
+            count = cursor.fetchone()[0]
+            if count < min_entries:
+                return 0
+            cursor.execute("DELETE FROM change_log WHERE seq <= ?", (through,))
+            cursor.execute("UPDATE change_log_state SET pruned_seq = max(pruned_seq, ?) WHERE id = 1", (through,))
+            conn.commit()
+            return count
 
 
 # Create a singleton instance
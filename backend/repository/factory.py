@@ -0,0 +1,46 @@
+"""
+Repository factory for NAVIQ
+Builds the read repository named by configuration.
+
+Backends:
+    sqlite         DatabaseRepository, one query per read
+    snapshot       SnapshotRepository, in-memory copy of the database
+    file           FileRepository over the JSON content pack, parsed and cached
+    file-indexed   FileRepository over the JSON content pack, mmap + index
+
+Writes always go to the database. With a file backend they do not show up
+in reads until the content pack is re-exported.
+"""
+
+import os
+
+from repository.base import CatalogueRepository
+from repository.db_repo import DatabaseRepository, db_repository
+from repository.file_repo import FileRepository
+from repository.snapshot_repo import SnapshotRepository
+
+BACKENDS = ('sqlite', 'snapshot', 'file', 'file-indexed')
+
+
+def create_repository(backend: str, source: DatabaseRepository = None,
+                      data_dir: str = None) -> CatalogueRepository:
+    """Create the read repository for `backend` (one of BACKENDS)."""
+    source = source or db_repository
+    if backend == 'sqlite':
+        return source
+    if backend == 'snapshot':
+        return SnapshotRepository(source)
+    if backend in ('file', 'file-indexed'):
+        store = 'indexed' if backend == 'file-indexed' else 'cached'
+        return FileRepository(data_dir, store=store)
+    raise ValueError(f"Unknown repository backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+
+def backend_from_env(default: str = 'sqlite') -> str:
+    """Read the backend name from NAVIQ_BACKEND."""
+    return os.environ.get('NAVIQ_BACKEND', default).strip().lower()
+
+
+def data_dir_from_env() -> str:
+    """Read the JSON content pack directory from NAVIQ_DATA_DIR (None = bundled data)."""
+    return os.environ.get('NAVIQ_DATA_DIR') or None
@@ -1,28 +1,201 @@
 import json
 import os
+import threading
+
+from .indexed_store import IndexedJSONStore
+
+
+class _JSONFileCache:
+    """
+    Keeps the parsed contents of one JSON file in memory.
+    Every read does a cheap os.stat(); the file is only re-parsed when its
+    mtime, size or inode changed. The parsed object is swapped in as a whole,
+    so concurrent readers always see either the old or the new data, never a
+    mix. Callers must treat the returned object as read-only.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entry = None  # (stamp, data)
+
+    def _stamp(self):
+        st = os.stat(self._path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def version(self):
+        return self._stamp()
+
+    def load(self):
+        entry = self._entry
+        stamp = self._stamp()
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            entry = self._entry
+            stamp = self._stamp()
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+            try:
+                with open(self._path, 'r') as f:
+                    data = json.load(f)
+            except ValueError:
+                # A writer is midway through replacing the file; keep serving
+                # the previous version and retry on the next call
+                if entry is None:
+                    raise
+                return entry[1]
+            # Only cache what we read if the file did not change underneath us
+            if self._stamp() == stamp:
+                self._entry = (stamp, data)
+            return data
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def keys(self):
+        return list(self.load())
+
 
 class FileRepository:
     """
     A repository class to handle data access from JSON files.
     This abstracts the data source from the business logic.
+
+    store="cached" keeps each parsed file in memory and reloads it when it
+    changes on disk. store="indexed" is meant for very large content packs: it
+    reads only the requested role's slice through mmap (see indexed_store).
+
+    interview_questions.json, roadmap_topics.json and roles.json are required;
+    study_topics.json and career_insights.json are optional lists. roles.json
+    carries the database's role IDs, which the rest of the API (similar roles,
+    practice, insights) uses, so the pack must come from
+    database/export_content.py rather than have IDs made up here.
     """
-    def __init__(self):
+    def __init__(self, data_dir=None, store="cached", cache_size=32):
         # Correctly determine the base directory relative to the current file's location
         # This makes the path resolution independent of where the script is run from
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self._questions_file = os.path.join(base_dir, 'data', 'interview_questions.json')
-        self._roadmaps_file = os.path.join(base_dir, 'data', 'roadmap_topics.json')
+        if data_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            data_dir = os.path.join(base_dir, 'data')
+        self._questions_file = os.path.join(data_dir, 'interview_questions.json')
+        self._roadmaps_file = os.path.join(data_dir, 'roadmap_topics.json')
+        if store == "indexed":
+            self._questions = IndexedJSONStore(self._questions_file, cache_size)
+            self._roadmaps = IndexedJSONStore(self._roadmaps_file, cache_size)
+        elif store == "cached":
+            self._questions = _JSONFileCache(self._questions_file)
+            self._roadmaps = _JSONFileCache(self._roadmaps_file)
+        else:
+            raise ValueError(f"Unknown file store: {store}")
+        roles_file = os.path.join(data_dir, 'roles.json')
+        if not os.path.exists(roles_file):
+            raise FileNotFoundError(
+                f"{roles_file} is missing; export the content pack with database/export_content.py "
+                "so role IDs match the database")
+        self._roles = _JSONFileCache(roles_file)
+        self._study_topics = self._optional(data_dir, 'study_topics.json')
+        self._career_insights = self._optional(data_dir, 'career_insights.json')
+        self._derived_lock = threading.Lock()
+        self._derived = None  # (version, roles tuple, roles_by_name, roles_by_id)
+
+    @staticmethod
+    def _optional(data_dir, name):
+        path = os.path.join(data_dir, name)
+        return _JSONFileCache(path) if os.path.exists(path) else None
+
+    def get_data_version(self):
+        """
+        Returns a value that changes whenever any data file changes.
+        """
+        return tuple(
+            source.version() if source is not None else None
+            for source in (self._questions, self._roadmaps, self._roles,
+                           self._study_topics, self._career_insights)
+        )
+
+    def _role_index(self):
+        version = self.get_data_version()
+        derived = self._derived
+        if derived is not None and derived[0] == version:
+            return derived
+        with self._derived_lock:
+            derived = self._derived
+            if derived is None or derived[0] != version:
+                roles = [dict(role) for role in self._roles.load()]
+                roles.sort(key=lambda role: role['name'])
+                derived = (
+                    version,
+                    tuple(roles),
+                    {role['name']: role for role in roles},
+                    {role['id']: role for role in roles},
+                )
+                self._derived = derived
+        return derived
+
+    def get_all_roles(self):
+        """
+        Returns all roles, ordered by name.
+        """
+        return list(self._role_index()[1])
+
+    def get_role_by_name(self, name):
+        """
+        Returns a role by its name, or None if it is unknown.
+        """
+        return self._role_index()[2].get(name)
+
+    def get_role_by_id(self, role_id):
+        """
+        Returns a role by its ID, or None if it is unknown.
+        """
+        return self._role_index()[3].get(role_id)
 
     def get_interview_questions(self):
         """
-        Reads and returns all interview questions from the JSON file.
+        Returns all interview questions from the JSON file (read-only).
         """
-        with open(self._questions_file, 'r') as f:
-            return json.load(f)
+        return self._questions.load()
+
+    def get_questions_for_role(self, role):
+        """
+        Returns the interview questions for one role (empty if it is unknown).
+        """
+        return self._questions.get(role) or []
+
+    def get_questions_by_role_id(self, role_id):
+        """
+        Returns the interview questions for a role by ID (empty if it is unknown).
+        """
+        role = self.get_role_by_id(role_id)
+        return self.get_questions_for_role(role['name']) if role else []
 
     def get_roadmap_topics(self):
         """
-        Reads and returns all roadmap topics from the JSON file.
+        Returns all roadmap topics from the JSON file (read-only).
+        """
+        return self._roadmaps.load()
+
+    def get_roadmap_for_role(self, goal):
+        """
+        Returns the roadmap topic for one goal, or None if it is unknown.
+        """
+        return self._roadmaps.get(goal)
+
+    def get_all_study_topics(self):
+        """
+        Returns all study topics, or an empty list without study_topics.json.
+        """
+        return list(self._study_topics.load()) if self._study_topics is not None else []
+
+    def get_career_insights(self, category=None):
+        """
+        Returns career insights, optionally filtered by category.
         """
-        with open(self._roadmaps_file, 'r') as f:
-            return json.load(f)
+        if self._career_insights is None:
+            return []
+        insights = self._career_insights.load()
+        if category:
+            return [insight for insight in insights if insight.get('category') == category]
+        return list(insights)
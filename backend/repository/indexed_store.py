@@ -0,0 +1,165 @@
+"""
+Indexed JSON Store for NAVIQ
+Serves one top-level key of a large JSON object file without parsing the rest.
+
+On first use the file is scanned once to build a sidecar index
+(`<file>.idx`) mapping every top-level key to the byte offset and length of
+its value. Reads then slice that range out of an mmap of the file and decode
+only it, keeping the most recently used values in a small LRU. Resident memory
+therefore depends on the LRU size, not on the file size.
+
+The index records the source file's mtime and size and is rebuilt when they
+change. Replace content files atomically (write a temp file, then rename):
+an mmap of a file that is truncated in place can fault.
+"""
+
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# A JSON string (with escapes) or a bracket; everything else is skipped
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_WHITESPACE = re.compile(rb'\s*')
+_SCALAR = re.compile(rb'[^,}\]\s]+')
+
+INDEX_SUFFIX = '.idx'
+INDEX_FORMAT = 1
+
+
+def build_index(buf) -> Dict[str, Tuple[int, int]]:
+    """Return {key: (offset, length)} for the values of a top-level JSON object."""
+    index = {}
+    depth = 0
+    pending = None  # (key, offset) of a container value being skipped
+
+    for match in _TOKEN.finditer(buf):
+        start = match.start()
+        char = buf[start:start + 1]
+        if char == b'"':
+            if depth != 1 or pending is not None:
+                continue
+            colon = _WHITESPACE.match(buf, match.end()).end()
+            if buf[colon:colon + 1] != b':':
+                continue  # a string value, not a key
+            key = json.loads(match.group())
+            value_start = _WHITESPACE.match(buf, colon + 1).end()
+            first = buf[value_start:value_start + 1]
+            if first in (b'{', b'['):
+                pending = (key, value_start)
+            else:
+                scalar = (_TOKEN if first == b'"' else _SCALAR).match(buf, value_start)
+                index[key] = (value_start, scalar.end() - value_start)
+        elif char in (b'{', b'['):
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1 and pending is not None:
+                key, value_start = pending
+                index[key] = (value_start, match.end() - value_start)
+                pending = None
+    return index
+
+
+class _MappedFile:
+    """An mmap of the source file plus its index, valid for one file version."""
+
+    def __init__(self, path: str, stamp: Tuple[int, int, int]):
+        self.stamp = stamp
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stamp[1] else b''
+        self.index = self._load_index(path)
+
+    def _load_index(self, path: str) -> Dict[str, Tuple[int, int]]:
+        index_path = path + INDEX_SUFFIX
+        try:
+            with open(index_path, 'r') as f:
+                stored = json.load(f)
+            if (stored.get('format') == INDEX_FORMAT
+                    and stored.get('mtime_ns') == self.stamp[0]
+                    and stored.get('size') == self.stamp[1]):
+                return {key: tuple(span) for key, span in stored['entries'].items()}
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = build_index(self.buf)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'format': INDEX_FORMAT,
+                    'mtime_ns': self.stamp[0],
+                    'size': self.stamp[1],
+                    'entries': index,
+                }, f)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            # Read-only data directory: keep the index in memory only
+            pass
+        return index
+
+
+class IndexedJSONStore:
+    """Lazily decoded, mmap-backed view of a top-level JSON object file."""
+
+    def __init__(self, path: str, cache_size: int = 32):
+        self._path = path
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._mapped: Optional[_MappedFile] = None
+        self._cache: 'OrderedDict[str, Any]' = OrderedDict()
+
+    def _stamp(self) -> Tuple[int, int, int]:
+        st = os.stat(self._path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _current(self) -> _MappedFile:
+        mapped = self._mapped
+        stamp = self._stamp()
+        if mapped is not None and mapped.stamp == stamp:
+            return mapped
+        with self._lock:
+            mapped = self._mapped
+            stamp = self._stamp()
+            if mapped is None or mapped.stamp != stamp:
+                # The old mmap is closed once the last reader drops it
+                mapped = _MappedFile(self._path, stamp)
+                self._mapped = mapped
+                self._cache.clear()
+        return mapped
+
+    def version(self) -> Tuple[int, int, int]:
+        """Return the (mtime_ns, size, inode) stamp of the source file."""
+        return self._stamp()
+
+    def keys(self) -> List[str]:
+        """Return the top-level keys in file order."""
+        return list(self._current().index)
+
+    def get(self, key: str, default=None):
+        """Decode and return the value stored under `key` (read-only)."""
+        mapped = self._current()
+        cache_key = (mapped.stamp, key)
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+
+        span = mapped.index.get(key)
+        if span is None:
+            return default
+        offset, length = span
+        value = json.loads(mapped.buf[offset:offset + length])
+
+        with self._lock:
+            self._cache[cache_key] = value
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def load(self) -> Dict[str, Any]:
+        """Decode the whole file into a dict (defeats the point for large files)."""
+        return {key: self.get(key) for key in self.keys()}
@@ -0,0 +1,171 @@
+"""
+Practice Repository for NAVIQ
+Learners' spaced-repetition state, kept in the practice database.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import PRACTICE_DB_PATH
+from repository.connection_pool import POOL_SIZE, ConnectionPool
+from services.spaced_repetition import Card
+
+_CARD_COLUMNS = "repetitions, interval, ease, due, lapses"
+# Versions per deck whose changed card is remembered; a cached deck further
+# behind than this is reloaded whole
+DECK_CHANGES_KEPT = 256
+
+
+class PracticeRepository:
+    """Repository for practice cards, decks and answers, in the practice database."""
+
+    def __init__(self, db_path=None, pool_size: int = POOL_SIZE):
+        self._pool = ConnectionPool(db_path or PRACTICE_DB_PATH, pool_size)
+
+    def _connect(self):
+        """Borrow a pooled connection (a context manager)."""
+        return self._pool.connection()
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        self._pool.close()
+
+    @staticmethod
+    def _bump(cursor, user_id: str, role_id: int, question_id: Optional[int] = None) -> Tuple[int, int]:
+        """Bump a deck's version (creating the deck), noting the card it changed; returns (old, new) version."""
+        cursor.execute(
+            "SELECT version FROM practice_decks WHERE user_id = ? AND role_id = ?", (user_id, role_id))
+        row = cursor.fetchone()
+        old = row[0] if row else 0
+        cursor.execute('''
+            INSERT INTO practice_decks (user_id, role_id, version) VALUES (?, ?, 1)
+            ON CONFLICT (user_id, role_id) DO UPDATE SET version = version + 1
+        ''', (user_id, role_id))
+        cursor.execute('''
+            INSERT OR REPLACE INTO practice_deck_changes (user_id, role_id, version, question_id)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, role_id, old + 1, question_id))
+        cursor.execute(
+            "DELETE FROM practice_deck_changes WHERE user_id = ? AND role_id = ? AND version <= ?",
+            (user_id, role_id, old + 1 - DECK_CHANGES_KEPT))
+        return old, old + 1
+
+    # ============== DECKS ==============
+
+    def get_deck(self, user_id: str, role_id: int) -> Optional[Dict]:
+        """Get a deck's cursor and version."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT start_id, cursor_id, last_id, wrapped, version FROM practice_decks
+                WHERE user_id = ? AND role_id = ?
+            ''', (user_id, role_id))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def get_deck_cards(self, user_id: str, role_id: int) -> List[Tuple[int, float]]:
+        """Get (question_id, due) of every card in a deck."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT question_id, due FROM practice_cards WHERE user_id = ? AND role_id = ?",
+                (user_id, role_id))
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def get_deck_changes(self, user_id: str, role_id: int, since: int,
+                         version: int) -> Optional[List[Tuple[int, Optional[float]]]]:
+        """Get (question_id, due) of the cards changed after deck version `since` up to
+        `version`, due None for cards no longer in the deck; None if some of those
+        versions are no longer recorded (reload the deck instead)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT question_id FROM practice_deck_changes
+                WHERE user_id = ? AND role_id = ? AND version > ? AND version <= ?
+            ''', (user_id, role_id, since, version))
+            rows = cursor.fetchall()
+            if len(rows) != version - since:
+                return None
+            question_ids = list({row[0] for row in rows if row[0] is not None})
+            if not question_ids:
+                return []
+            cursor.execute(f'''
+                SELECT question_id, due FROM practice_cards
+                WHERE user_id = ? AND role_id = ? AND question_id IN ({', '.join('?' * len(question_ids))})
+            ''', (user_id, role_id, *question_ids))
+            due = dict(tuple(row) for row in cursor.fetchall())
+            return [(question_id, due.get(question_id)) for question_id in question_ids]
+
+    def set_deck_cursor(self, user_id: str, role_id: int, start_id: int, cursor_id: int,
+                        last_id: int, wrapped: bool) -> Tuple[int, int]:
+        """Move a deck's new-question cursor; returns the (old, new) deck version."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            versions = self._bump(cursor, user_id, role_id)
+            cursor.execute('''
+                UPDATE practice_decks SET start_id = ?, cursor_id = ?, last_id = ?, wrapped = ?
+                WHERE user_id = ? AND role_id = ?
+            ''', (start_id, cursor_id, last_id, int(wrapped), user_id, role_id))
+            conn.commit()
+            return versions
+
+    # ============== CARDS ==============
+
+    def get_card(self, user_id: str, question_id: int) -> Optional[Dict]:
+        """Get a learner's card for a question."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM practice_cards WHERE user_id = ? AND question_id = ?
+            ''', (user_id, question_id))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def review_card(self, user_id: str, question_id: int, role_id: int, grade: int,
+                    answer: Optional[str], now: float,
+                    schedule: Callable[[Card], Card]) -> Tuple[Card, Tuple[int, int]]:
+        """Record an answer and reschedule its card in one transaction.
+
+        `schedule` maps the card's current state (a fresh Card for a first
+        answer) to the new one. Returns the new card and the (old, new)
+        version of its deck.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f'''
+                SELECT {_CARD_COLUMNS}, role_id FROM practice_cards WHERE user_id = ? AND question_id = ?
+            ''', (user_id, question_id))
+            row = cursor.fetchone()
+            card = schedule(Card(*row[:5]) if row else Card())
+            if row and row['role_id'] != role_id:
+                # The question moved to another role: take it out of the old deck
+                self._bump(cursor, user_id, row['role_id'], question_id)
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO practice_cards
+                    (user_id, question_id, role_id, {_CARD_COLUMNS}, last_grade, reviewed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, question_id, role_id, *card, grade, now))
+            cursor.execute('''
+                INSERT INTO practice_answers (user_id, question_id, grade, answer, answered_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, question_id, grade, answer, now))
+            versions = self._bump(cursor, user_id, role_id, question_id)
+            conn.commit()
+            return card, versions
+
+    def delete_card(self, user_id: str, question_id: int, role_id: int) -> Tuple[int, int]:
+        """Delete a card (its question is gone); returns the (old, new) deck version."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "DELETE FROM practice_cards WHERE user_id = ? AND question_id = ?", (user_id, question_id))
+            versions = self._bump(cursor, user_id, role_id, question_id)
+            conn.commit()
+            return versions
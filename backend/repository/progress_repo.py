@@ -0,0 +1,106 @@
+"""
+Progress Repository for NAVIQ
+Learners' progress events and their insight summaries, kept in the
+progress database.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import PROGRESS_DB_PATH
+from repository.connection_pool import POOL_SIZE, ConnectionPool
+
+# PRAGMA synchronous levels: OFF leaves syncing to the OS (a power cut can
+# lose recent batches), NORMAL syncs at WAL checkpoints (a power cut can
+# lose the last batches, a crash of the process none), FULL syncs every batch
+SYNC_MODES = ('OFF', 'NORMAL', 'FULL')
+
+
+class ProgressRepository:
+    """Repository for progress events and their summaries, in the progress database."""
+
+    def __init__(self, db_path=None, synchronous: str = 'NORMAL', pool_size: int = POOL_SIZE):
+        self._pool = ConnectionPool(db_path or PROGRESS_DB_PATH, pool_size)
+        synchronous = synchronous.upper()
+        if synchronous not in SYNC_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNC_MODES)}")
+        self.synchronous = synchronous
+
+    def _connect(self):
+        """Borrow a pooled connection (a context manager)."""
+        return self._pool.connection()
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        self._pool.close()
+
+    def add_events(self, events: Sequence[Tuple], on_insert: Callable = None) -> None:
+        """
+        Insert (user_id, type, role_id, ref_id, value, occurred_at, received_at)
+        rows in one transaction. on_insert(cursor, events, last_id) runs inside
+        it, so summaries derived from the events commit (or fail) with them.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"PRAGMA synchronous={self.synchronous}")
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany('''
+                INSERT INTO progress_events (user_id, type, role_id, ref_id, value, occurred_at, received_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', events)
+            if on_insert is not None:
+                cursor.execute("SELECT last_insert_rowid()")
+                on_insert(cursor, events, cursor.fetchone()[0])
+            conn.commit()
+
+    # ============== SUMMARIES ==============
+
+    def get_learner(self, user_id: str) -> List[Dict]:
+        """Get a learner's summary rows, one per role they have progress in (role 0: all roles)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM progress_learners WHERE user_id = ? ORDER BY role_id", (user_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_rollups(self, user_id: str, role_id: int, grain: str, since: int, until: int) -> List[Dict]:
+        """Get a learner's buckets of one grain from `since` to `until` (inclusive), oldest first."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM progress_rollups
+                WHERE user_id = ? AND role_id = ? AND grain = ? AND bucket BETWEEN ? AND ?
+                ORDER BY bucket
+            ''', (user_id, role_id, grain, since, until))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_cohorts(self) -> List[Dict]:
+        """Get the learner count and readiness total of every role (role 0: all roles)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM progress_cohorts ORDER BY role_id")
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_cohort_rollups(self, role_id: int, grain: str, since: int, until: int) -> List[Dict]:
+        """Get a role's buckets of one grain from `since` to `until` (inclusive), oldest first."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM progress_cohort_rollups
+                WHERE role_id = ? AND grain = ? AND bucket BETWEEN ? AND ?
+                ORDER BY bucket
+            ''', (role_id, grain, since, until))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_sketch(self, role_id: int, metric: str) -> Optional[Dict]:
+        """Get a role's percentile sketch of one learner metric: learners, digest and version."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT learners, digest, version FROM progress_sketches WHERE role_id = ? AND metric = ?
+            ''', (role_id, metric))
+            row = cursor.fetchone()
+            return dict(row) if row else None
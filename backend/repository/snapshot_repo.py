@@ -0,0 +1,163 @@
+"""
+Snapshot Repository for NAVIQ
+Read-only, in-memory copy of the catalogue built from the database in one go.
+
+In preload mode the snapshot is built in the gunicorn master before forking so
+every worker shares its pages copy-on-write. Serialised response bodies are
+cached alongside the data, so serving a hot endpoint touches a single bytes
+object instead of walking (and writing refcounts into) thousands of shared
+dicts.
+
+The snapshot is versioned by the newest change_log seq, which only catalogue
+writes move. A write to any other table in the file (practice, insights,
+change_log pruning) is noticed by the cheap file-header check, answered by
+one seq query and costs no rebuild, so the pages shared from the master stay
+shared. A catalogue write is rebuilt on a background thread while the old
+snapshot keeps serving.
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from repository.db_repo import DatabaseRepository
+
+
+class CatalogueSnapshot:
+    """Immutable view of every catalogue read, taken at one data version."""
+
+    def __init__(self, source: DatabaseRepository):
+        # Read the version first: a write that lands mid-build makes the
+        # snapshot look stale on the next check instead of silently current.
+        self.version = source.get_last_change()
+
+        self.roles = tuple(source.get_all_roles())
+        self.roles_by_id = {role['id']: role for role in self.roles}
+        self.roles_by_name = {role['name']: role for role in self.roles}
+
+        self.questions_by_role_id = {
+            role['id']: tuple(source.get_questions_by_role_id(role['id']))
+            for role in self.roles
+        }
+        self.roadmaps_by_role = {}
+        for role in self.roles:
+            roadmap = source.get_roadmap_for_role(role['name'])
+            if roadmap:
+                self.roadmaps_by_role[role['name']] = roadmap
+
+        self.study_topics = tuple(source.get_all_study_topics())
+        self.career_insights = tuple(source.get_career_insights())
+        self.serialized: Dict[Hashable, bytes] = {}
+
+
+class SnapshotRepository:
+    """Repository that answers reads from a CatalogueSnapshot of the database."""
+
+    def __init__(self, source: DatabaseRepository = None):
+        self._source = source or DatabaseRepository()
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        # Database file version last compared with the snapshot's seq
+        self._checked = None
+        self._rebuilding = False
+
+    def _current(self) -> CatalogueSnapshot:
+        """Return the snapshot; the first one is built inline, later ones in the background."""
+        snapshot = self._snapshot
+        data_version = self._source.get_data_version()
+        if snapshot is not None and data_version == self._checked:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._checked = data_version
+                self._snapshot = CatalogueSnapshot(self._source)
+            elif data_version != self._checked:
+                self._checked = data_version
+                if not self._rebuilding and self._source.get_last_change() != self._snapshot.version:
+                    self._rebuilding = True
+                    threading.Thread(target=self._rebuild, name="snapshot-rebuild", daemon=True).start()
+            return self._snapshot
+
+    def _rebuild(self) -> None:
+        """Build snapshots until one is current; writes that land meanwhile are picked up."""
+        try:
+            while True:
+                snapshot = CatalogueSnapshot(self._source)
+                with self._lock:
+                    self._snapshot = snapshot
+                    if self._source.get_last_change() == snapshot.version:
+                        self._rebuilding = False
+                        return
+        except Exception:
+            with self._lock:
+                # Retry on the next write rather than never again
+                self._rebuilding = False
+                self._checked = None
+            raise
+
+    def refresh(self) -> None:
+        """Build the snapshot now if there is none (used to preload before forking)."""
+        self._current()
+
+    def get_data_version(self) -> int:
+        """Get the change_log seq the snapshot was built from."""
+        return self._current().version
+
+    def serialized(self, key: Hashable, build: Callable[[], Any]) -> bytes:
+        """Return JSON bytes for `key`, calling build() once per snapshot version."""
+        snapshot = self._current()
+        body = snapshot.serialized.get(key)
+        if body is None:
+            body = json.dumps(build(), sort_keys=True, separators=(',', ':')).encode('utf-8')
+            snapshot.serialized[key] = body
+        return body
+
+    # ============== READS ==============
+
+    def get_all_roles(self) -> List[Dict]:
+        """Get all roles, ordered by name."""
+        return list(self._current().roles)
+
+    def get_role_by_name(self, name: str) -> Optional[Dict]:
+        """Get a role by its name."""
+        return self._current().roles_by_name.get(name)
+
+    def get_role_by_id(self, role_id: int) -> Optional[Dict]:
+        """Get a role by its ID."""
+        return self._current().roles_by_id.get(role_id)
+
+    def get_questions_for_role(self, role_name: str) -> List[Dict]:
+        """Get all interview questions for a specific role."""
+        snapshot = self._current()
+        role = snapshot.roles_by_name.get(role_name)
+        if not role:
+            return []
+        return list(snapshot.questions_by_role_id.get(role['id'], ()))
+
+    def get_interview_questions(self) -> Dict[str, List[Dict]]:
+        """Get every interview question, grouped by role name."""
+        snapshot = self._current()
+        return {
+            role['name']: list(snapshot.questions_by_role_id[role['id']])
+            for role in snapshot.roles
+            if snapshot.questions_by_role_id.get(role['id'])
+        }
+
+    def get_questions_by_role_id(self, role_id: int) -> List[Dict]:
+        """Get all interview questions for a role by ID."""
+        return list(self._current().questions_by_role_id.get(role_id, ()))
+
+    def get_roadmap_for_role(self, role_name: str) -> Optional[Dict]:
+        """Get roadmap with milestones for a role."""
+        return self._current().roadmaps_by_role.get(role_name)
+
+    def get_all_study_topics(self) -> List[Dict]:
+        """Get all study topics with their resources."""
+        return list(self._current().study_topics)
+
+    def get_career_insights(self, category: str = None) -> List[Dict]:
+        """Get career insights, optionally filtered by category."""
+        insights = self._current().career_insights
+        if category:
+            return [insight for insight in insights if insight['category'] == category]
+        return list(insights)
@@ -0,0 +1,96 @@
+"""
+Sync Repository for NAVIQ
+How far each sync client and in-process reader has got in change_log, kept
+in the sync database.
+"""
+
+from typing import Optional
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import SYNC_DB_PATH
+from repository.connection_pool import POOL_SIZE, ConnectionPool
+
+
+class SyncRepository:
+    """Repository for sync clients and change_log readers, in the sync database."""
+
+    def __init__(self, db_path=None, pool_size: int = POOL_SIZE):
+        self._pool = ConnectionPool(db_path or SYNC_DB_PATH, pool_size)
+
+    def _connect(self):
+        """Borrow a pooled connection (a context manager)."""
+        return self._pool.connection()
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        self._pool.close()
+
+    def record_client(self, client_id: str, version: int, now: float) -> None:
+        """Record that a client has applied every change up to `version`."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO sync_clients (client_id, version, seen_at) VALUES (?, ?, ?)
+                ON CONFLICT (client_id) DO UPDATE SET
+                    version = max(version, excluded.version), seen_at = excluded.seen_at
+            ''', (client_id, version, now))
+            conn.commit()
+
+    def get_min_client_version(self, seen_since: float) -> Optional[int]:
+        """Get the lowest version of the clients seen since `seen_since` (None when there are none)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT min(version) FROM sync_clients WHERE seen_at >= ?", (seen_since,))
+            return cursor.fetchone()[0]
+
+    def count_clients(self, seen_since: float) -> int:
+        """Count the clients seen since `seen_since`."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT count(*) FROM sync_clients WHERE seen_at >= ?", (seen_since,))
+            return cursor.fetchone()[0]
+
+    def expire_clients(self, seen_before: float) -> int:
+        """Forget the clients not seen since `seen_before`; returns how many."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM sync_clients WHERE seen_at < ?", (seen_before,))
+            conn.commit()
+            return cursor.rowcount
+
+    # ============== READERS ==============
+
+    def record_reader(self, reader_id: str, version: int, expires_at: float) -> None:
+        """Record that an in-process reader has applied every change up to `version`."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO change_log_readers (reader_id, version, expires_at) VALUES (?, ?, ?)
+            ''', (reader_id, version, expires_at))
+            conn.commit()
+
+    def get_min_reader_version(self, now: float) -> Optional[int]:
+        """Get the lowest version of the readers not expired at `now` (None when there are none)."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT min(version) FROM change_log_readers WHERE expires_at >= ?", (now,))
+            return cursor.fetchone()[0]
+
+    def count_readers(self, now: float) -> int:
+        """Count the readers not expired at `now`."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT count(*) FROM change_log_readers WHERE expires_at >= ?", (now,))
+            return cursor.fetchone()[0]
+
+    def expire_readers(self, now: float) -> int:
+        """Forget the readers expired at `now`; returns how many."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM change_log_readers WHERE expires_at < ?", (now,))
+            conn.commit()
+            return cursor.rowcount
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.base import CatalogueRepository
+
+INSIGHT_CATEGORIES = ("readiness", "velocity", "market")
+
+
+class CatalogueService:
+    """
+    Service layer for roles, study topics and career insights.
+    It uses a repository to fetch data, keeping the service
+    independent of the data storage implementation.
+    """
+    def __init__(self, repository: CatalogueRepository):
+        self._repository = repository
+
+    def get_roles(self):
+        """Returns all roles, ordered by name."""
+        return self._repository.get_all_roles()
+
+    def get_role(self, role_id):
+        """Returns a role by ID, or None if it is unknown."""
+        return self._repository.get_role_by_id(role_id)
+
+    def get_role_by_name(self, name):
+        """Returns a role by name, or None if it is unknown."""
+        return self._repository.get_role_by_name(name)
+
+    def get_study_topics(self):
+        """Returns all study topics with their resources."""
+        return self._repository.get_all_study_topics()
+
+    def get_career_insights(self, category=None):
+        """Returns career insights, optionally filtered by category."""
+        return self._repository.get_career_insights(category)
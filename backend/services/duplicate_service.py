@@ -0,0 +1,202 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+from array import array
+
+from repository.db_repo import DatabaseRepository
+from services.sync_service import ReaderLease
+from services import minhash
+from services.minhash import LSHIndex, signature, signatures
+
+# Estimated Jaccard similarity at which a question counts as a near-duplicate
+DUPLICATE_THRESHOLD = 0.7
+# Persist the index after this many applied changes
+SAVE_EVERY = 50
+# Repack the index once its delta segment holds this share of the questions
+COMPACT_FRACTION = 0.05
+COMPACT_MIN_DELTA = 1000
+FILE_FORMAT = 1
+
+
+class DuplicateService:
+    """
+    Service layer for spotting near-duplicate interview questions per role.
+    Every question's MinHash signature sits in an LSH index scoped by role, so
+    a new question is checked against its role with a handful of bucket
+    lookups instead of a scan.
+
+    Questions written after the build go to the index's small delta segment,
+    which is packed into the main one once it passes COMPACT_FRACTION.
+    The index is saved to `path` together with the change_log seq it reflects.
+    On start it is loaded from there and caught up from change_log, so only a
+    missing or unusable file, or one older than the pruned part of the log,
+    costs a full pass over the questions. While running, the `lease` keeps
+    the log from being pruned past the index.
+    """
+    def __init__(self, repository: DatabaseRepository, path=None, threshold=DUPLICATE_THRESHOLD,
+                 lease: ReaderLease = None):
+        self._repository = repository
+        self._lease = lease
+        self._path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._index = None
+        self._seq = 0
+        self._version = None
+        self._unsaved = 0
+
+    # ============== INDEX ==============
+
+    def _build(self):
+        seq = self._repository.get_last_change()
+        ids, roles, sigs = array('q'), array('q'), array('I')
+        for batch in self._repository.iter_question_texts():
+            ids.extend(row['id'] for row in batch)
+            roles.extend(row['role_id'] for row in batch)
+            for sig in signatures([row['question'] for row in batch]):
+                sigs.extend(sig)
+        index = LSHIndex()
+        index.build(ids, roles, sigs)
+        return index, seq
+
+    def _header(self, seq, count):
+        return {"format": FILE_FORMAT, "num_perm": minhash.NUM_PERM, "bands": minhash.BANDS,
+                "shingle": minhash.SHINGLE_SIZE, "seed": minhash.SEED, "seq": seq, "count": count}
+
+    def _load(self):
+        """Read the saved index; None when missing, stale or built with other parameters."""
+        if not self._path or not os.path.exists(self._path):
+            return None
+        try:
+            with open(self._path, 'rb') as f:
+                header = json.loads(f.readline())
+                count = header.get("count", 0)
+                if header != self._header(header.get("seq"), count):
+                    return None
+                if header["seq"] > self._repository.get_last_change():
+                    # Saved from a newer or a different database
+                    return None
+                ids, roles, sigs = array('q'), array('q'), array('I')
+                ids.fromfile(f, count)
+                roles.fromfile(f, count)
+                sigs.fromfile(f, count * minhash.NUM_PERM)
+        except (OSError, ValueError, EOFError):
+            return None
+
+        index = LSHIndex()
+        index.build(ids, roles, sigs)
+        return index, header["seq"]
+
+    def save(self):
+        """Write the index to `path` (atomically); no-op before the first build."""
+        with self._lock:
+            if self._index is None or not self._path:
+                return
+            seq = self._seq
+            ids, roles, sigs = self._index.export()
+            self._unsaved = 0
+
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(self._header(seq, len(ids))).encode() + b"\n")
+                ids.tofile(f)
+                roles.tofile(f)
+                sigs.tofile(f)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            # Only a cache: the next start rebuilds from the database instead
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def refresh(self):
+        """Load or build the index on first use, then apply logged question writes."""
+        version = self._repository.get_data_version()
+        if self._index is not None and version == self._version:
+            return self._index
+        save = False
+        with self._lock:
+            version = self._repository.get_data_version()
+            if self._index is None:
+                loaded = self._load()
+                self._index, self._seq = loaded or self._build()
+                save = loaded is None
+            if version != self._version:
+                self._apply_changes()
+                self._version = version
+            if self._lease is not None:
+                self._lease.hold(self._seq)
+            index = self._index
+            if (index.delta_size >= COMPACT_MIN_DELTA
+                    and index.delta_size >= COMPACT_FRACTION * index.main_size):
+                index.compact()
+            save = save or self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+        return index
+
+    def _apply_changes(self):
+        while True:
+            changes = self._repository.get_changes(self._seq)
+            if changes is None:
+                # The log was pruned past our seq (or the saved index's)
+                self._index, self._seq = self._build()
+                self._unsaved = SAVE_EVERY
+                return
+            if not changes:
+                return
+            question_ids = set()
+            for change in changes:
+                if change['table_name'] == 'interview_questions':
+                    question_ids.add(change['row_id'])
+                elif change['table_name'] == 'roles' and change['op'] == 'delete':
+                    for question_id in self._index.keys_in_scope(change['row_id']):
+                        self._index.remove(question_id)
+            found = {row['id']: row for row in self._repository.get_question_texts(question_ids)}
+            for question_id in question_ids:
+                row = found.get(question_id)
+                if row is None:
+                    self._index.remove(question_id)
+                else:
+                    self._index.add(question_id, signature(row['question']), row['role_id'])
+            self._unsaved += len(question_ids)
+            self._seq = changes[-1]['seq']
+
+    # ============== CHECKS ==============
+
+    def find_duplicates(self, role_id, text, threshold=None, limit=5, exclude_id=None):
+        """
+        Finds questions of the same role that read almost like `text`.
+
+        Args:
+            role_id (int): The role the question belongs to.
+            text (str): The question text.
+            threshold (float, optional): Minimum estimated Jaccard similarity
+                of the questions' character 5-grams (default: self.threshold).
+            limit (int): Maximum number of matches.
+            exclude_id (int, optional): A question ID to ignore (the question itself).
+
+        Returns:
+            list: Matches as {"id", "question", "similarity"}, most similar first.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        sig = signature(text)
+        self.refresh()
+        # Writes are applied to the index in place, so queries share its lock
+        with self._lock:
+            matches = self._index.query(
+                sig, role_id, threshold, exclude=() if exclude_id is None else (exclude_id,),
+            )[:limit]
+        if not matches:
+            return []
+        texts = {row['id']: row['question'] for row in self._repository.get_question_texts(
+            question_id for question_id, _ in matches)}
+        return [
+            {"id": question_id, "question": texts[question_id], "similarity": round(score, 3)}
+            for question_id, score in matches if question_id in texts
+        ]
@@ -0,0 +1,120 @@
+"""
+In-process event fan-out for NAVIQ
+One EventHub per process hands every published event to each subscriber's
+own bounded queue. Publishing never blocks on a subscriber: one whose queue
+is full is evicted (closed and emptied), so a slow or stalled client costs
+at most QUEUE_SIZE events of memory and can't hold back the others.
+Subscribers wait on their own threading.Event, which works the same under
+threaded and gevent workers.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Iterable, List, Optional
+
+QUEUE_SIZE = 256
+MAX_SUBSCRIBERS = 10000
+
+
+class Subscription:
+    """A subscriber's queue; `topics` None means every topic."""
+
+    def __init__(self, topics: Optional[Iterable[str]], capacity: int):
+        self.topics = frozenset(topics) if topics else None
+        self.capacity = capacity
+        self.closed = False
+        self.reason = None
+        self._queue = deque()
+        self._ready = threading.Event()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def get(self, timeout: float) -> Optional[List[Any]]:
+        """
+        Wait up to `timeout` seconds and take everything queued: a list of
+        events, empty on timeout, or None once the subscription is closed.
+        """
+        if not self._queue and not self.closed:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        if self.closed:
+            return None
+        items = []
+        while self._queue:
+            items.append(self._queue.popleft())
+        return items
+
+
+class EventHub:
+    """Thread-safe publish/subscribe with bounded per-subscriber queues."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE, max_subscribers: int = MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.stats = {"published": 0, "delivered": 0, "evicted": 0}
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None) -> Optional[Subscription]:
+        """Add a subscriber, or return None when MAX_SUBSCRIBERS are connected."""
+        subscription = Subscription(topics, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, reason: str = None) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+        self._close(subscription, reason)
+
+    @staticmethod
+    def _close(subscription: Subscription, reason: str = None) -> None:
+        if not subscription.closed:
+            subscription.reason = reason
+            subscription.closed = True
+        subscription._queue.clear()
+        subscription._ready.set()
+
+    def publish(self, events: List[Any], topic_of=None) -> None:
+        """
+        Queue `events` for every subscriber, in order. `topic_of(event)` gives
+        an event's topic for subscribers that chose topics.
+        """
+        if not events:
+            return
+        evicted = []
+        delivered = 0
+        with self._lock:
+            self.stats["published"] += len(events)
+            for subscription in self._subscribers:
+                if subscription.topics is None or topic_of is None:
+                    mine = events
+                else:
+                    mine = [event for event in events if topic_of(event) in subscription.topics]
+                    if not mine:
+                        continue
+                if len(subscription._queue) + len(mine) > subscription.capacity:
+                    evicted.append(subscription)
+                    continue
+                subscription._queue.extend(mine)
+                subscription._ready.set()
+                delivered += len(mine)
+            for subscription in evicted:
+                self._subscribers.discard(subscription)
+            self.stats["delivered"] += delivered
+            self.stats["evicted"] += len(evicted)
+        for subscription in evicted:
+            self._close(subscription, "slow consumer")
+
+    def close_all(self, reason: str = None) -> None:
+        """Close every subscription (e.g. on shutdown)."""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+        for subscription in subscribers:
+            self._close(subscription, reason)
@@ -0,0 +1,189 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+from repository.db_repo import DatabaseRepository
+from services.event_hub import EventHub, Subscription
+from services.sync_service import ReaderLease
+
+# change_log table -> entity name in the events
+ENTITIES = {
+    'roles': 'role',
+    'interview_questions': 'question',
+    'roadmaps': 'roadmap',
+    'milestones': 'milestone',
+    'milestone_outcomes': 'milestone_outcome',
+    'milestone_resources': 'milestone_resource',
+    'study_topics': 'study_topic',
+    'study_resources': 'study_resource',
+    'career_insights': 'insight',
+}
+# Seconds between data version checks (other workers' writes arrive within this)
+POLL_INTERVAL = 0.5
+# Seconds of silence before a keep-alive comment
+KEEPALIVE = 15
+# More changed rows than this in one poll (a bulk import) become one "reset"
+MAX_EVENTS_PER_POLL = 200
+# Most missed changes replayed to a reconnecting client before it is told to reset
+MAX_REPLAY = 1000
+
+
+def _topic(event):
+    return event[1].get('entity')
+
+
+class EventsService:
+    """
+    Service layer for content-change notifications. Every worker runs one
+    poller thread (started by its first subscriber) that watches the
+    catalogue's data version and, when it moves, reads change_log and
+    publishes one "change" event per written row, {"entity", "id", "op",
+    "version"}, to the process's EventHub. change_log is shared by all
+    workers, so it doubles as the cross-worker channel: a write in any
+    worker reaches every subscriber within POLL_INTERVAL, and at once in
+    the worker that made it (notify() wakes the poller).
+
+    Event IDs are change_log seqs, so a client that reconnects with
+    Last-Event-ID gets the changes it missed replayed; when too many were
+    missed, or they were pruned, it gets a "reset" event and refetches. The
+    `lease` keeps change_log from being pruned past the poller.
+    """
+    def __init__(self, repository: DatabaseRepository, hub: EventHub = None, lease: ReaderLease = None):
+        self._repository = repository
+        self._lease = lease
+        self.hub = hub or EventHub()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._seq = 0
+        self._version = None
+
+    # ============== POLLING ==============
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._seq = self._repository.get_last_change()
+            self._version = self._repository.get_data_version()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="naviq-change-events", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception:
+                # The next round retries from the same seq
+                pass
+
+    def notify(self):
+        """Check for changes now (called after a write in this worker)."""
+        if self._thread is not None:
+            self._wake.set()
+
+    def poll(self):
+        """Publish the changes logged since the last poll."""
+        version = self._repository.get_data_version()
+        if version == self._version:
+            return
+        self._version = version
+        changes = self._repository.get_changes(self._seq, MAX_EVENTS_PER_POLL * 5)
+        if changes is None:
+            # The log was pruned past us
+            self._seq = self._repository.get_last_change()
+            if self._lease is not None:
+                self._lease.hold(self._seq)
+            self.hub.publish([("reset", {"version": self._seq}, self._seq)])
+            return
+        if not changes:
+            return
+        events = self.change_events(changes)
+        self._seq = changes[-1]['seq']
+        if self._lease is not None:
+            self._lease.hold(self._seq)
+        if len(events) > MAX_EVENTS_PER_POLL or len(changes) == MAX_EVENTS_PER_POLL * 5:
+            self._version = None    # look again next round for the rest
+            self.hub.publish([("reset", {"version": self._seq}, self._seq)])
+        else:
+            self.hub.publish(events, _topic)
+
+    @staticmethod
+    def change_events(changes):
+        """One ("change", {"entity", "id", "op", "version"}, seq) per row, at its last change."""
+        latest = {}
+        for change in changes:
+            entity = ENTITIES.get(change['table_name'])
+            if entity is not None:
+                latest.pop((entity, change['row_id']), None)
+                latest[(entity, change['row_id'])] = change
+        return [
+            ("change", {"entity": entity, "id": row_id, "op": change['op'], "version": change['seq']}, change['seq'])
+            for (entity, row_id), change in latest.items()
+        ]
+
+    # ============== SUBSCRIBERS ==============
+
+    def subscribe(self, entities=None):
+        """Subscribe to changes of some entities (all by default); None when the hub is full."""
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            self._start()
+        return self.hub.subscribe(entities)
+
+    def stream(self, subscription: Subscription, since=None):
+        """
+        Yields (event, data, id) for a subscriber, or None when it is time for
+        a keep-alive; first the changes after `since` (a Last-Event-ID), then
+        live ones. Ends with an "evicted" event if the subscriber fell too
+        far behind. Closing the generator unsubscribes.
+        """
+        try:
+            sent = -1
+            if since is not None:
+                changes = self._repository.get_changes(since, MAX_REPLAY + 1)
+                if changes is None or len(changes) > MAX_REPLAY:
+                    sent = self._repository.get_last_change()
+                    yield "reset", {"version": sent}, sent
+                else:
+                    sent = since
+                    for event in self.change_events(changes):
+                        if subscription.topics is None or _topic(event) in subscription.topics:
+                            yield event
+                    sent = changes[-1]['seq'] if changes else since
+            while True:
+                events = subscription.get(KEEPALIVE)
+                if events is None:
+                    if subscription.reason:
+                        yield "evicted", {"reason": subscription.reason, "version": sent}, None
+                    return
+                if not events:
+                    yield None
+                for event in events:
+                    # Already replayed
+                    if event[2] <= sent and event[0] == "change":
+                        continue
+                    sent = max(sent, event[2])
+                    yield event
+        finally:
+            self.hub.unsubscribe(subscription)
+
+    def close(self):
+        """Stop the poller and end every stream."""
+        self._stop.set()
+        self._wake.set()
+        self.hub.close_all()
+
+    def metrics(self):
+        """Subscriber and delivery counters of this process."""
+        return {**self.hub.stats, "subscribers": len(self.hub), "seq": self._seq,
+                "poller_running": self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()}
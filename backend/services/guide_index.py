@@ -0,0 +1,266 @@
+"""
+Vector index for the NAVIQ career guide
+TF-IDF document vectors (sublinear tf, smoothed idf, unit length) stored term
+by term like a CSC sparse matrix: for every term, the rows of the documents
+containing it and the term's weight in each. A query is scored against the
+whole corpus with one vectorised gather-and-add per query term; since both
+sides have unit length, the sums are cosine similarities.
+
+Documents written after the build go to a small delta segment (plain dicts)
+and hide their old row behind a tombstone, so content writes never touch the
+big arrays. Delta documents reuse the build's idf, so the owner should
+rebuild once the delta grows large. Without NumPy every document lives in
+the delta segment, which is correct but only practical for small corpora.
+"""
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; everything is kept in the dict segment instead
+    np = None
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or "
+    "should the this to what when where which who why with you your".split()
+)
+# Title words count this many times towards a document's term frequency
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords and single characters."""
+    return [t for t in _TOKEN.findall((text or '').lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _term_counts(title: str, body: str, tags: str = '') -> Counter:
+    counts = Counter(tokenize(body))
+    counts.update(tokenize(tags))
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+class VectorIndex:
+    """TF-IDF cosine index over documents keyed by an integer rowid."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vocab: Dict[str, int] = {}
+        self._idf: List[float] = []
+        self._size = 0
+        # Main segment (NumPy arrays, rows sorted by rowid)
+        self._rowids = self._role_ids = self._alive = None
+        self._indptr = self._post_rows = self._post_weights = None
+        self._main_terms = 0
+        # Delta segment: rowid -> (role_id, {term: weight}) and term -> {rowid: weight}
+        self._delta: Dict[int, Tuple[Optional[int], Dict[int, float]]] = {}
+        self._delta_postings: Dict[int, Dict[int, float]] = {}
+
+    def __len__(self):
+        alive = int(self._alive.sum()) if self._alive is not None else 0
+        return alive + len(self._delta)
+
+    @property
+    def delta_size(self) -> int:
+        """Documents held in the delta segment."""
+        return len(self._delta)
+
+    @property
+    def main_size(self) -> int:
+        """Rows in the main segment, tombstones included."""
+        return len(self._rowids) if self._rowids is not None else 0
+
+    # ============== BUILD ==============
+
+    def build(self, batches: Iterable[List[Dict]]) -> None:
+        """Index documents ({rowid, title, body, tags, role_id}), given in rowid order."""
+        if np is None:
+            documents = [doc for batch in batches for doc in batch]
+            self._size = len(documents)
+            df = Counter()
+            counted = []
+            for doc in documents:
+                counts = _term_counts(doc['title'], doc['body'], doc.get('tags'))
+                df.update(counts.keys())
+                counted.append((doc, counts))
+            for term, count in df.items():
+                self._add_term(term, count)
+            for doc, counts in counted:
+                self._add_delta(doc['rowid'], doc.get('role_id'), counts)
+            return
+
+        terms, rows, freqs = array('i'), array('i'), array('f')
+        rowids, role_ids = array('q'), array('i')
+        vocab = self._vocab
+        for batch in batches:
+            for doc in batch:
+                row = len(rowids)
+                rowids.append(doc['rowid'])
+                role_ids.append(doc.get('role_id') or 0)
+                for term, count in _term_counts(doc['title'], doc['body'], doc.get('tags')).items():
+                    term_id = vocab.get(term)
+                    if term_id is None:
+                        term_id = vocab[term] = len(vocab)
+                    terms.append(term_id)
+                    rows.append(row)
+                    freqs.append(count)
+
+        size = len(rowids)
+        vocab_size = len(vocab)
+        terms = np.frombuffer(terms, dtype=np.int32)
+        rows = np.frombuffer(rows, dtype=np.int32)
+        freqs = np.frombuffer(freqs, dtype=np.float32)
+
+        df = np.bincount(terms, minlength=vocab_size)
+        idf = (np.log((1.0 + size) / (1.0 + df)) + 1.0).astype(np.float32)
+        weights = (1.0 + np.log(freqs)) * idf[terms]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=size)).astype(np.float32)
+        weights /= norms[rows]
+
+        order = np.argsort(terms, kind='stable')
+        self._indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        self._post_rows = rows[order]
+        self._post_weights = weights[order].astype(np.float32)
+        self._rowids = np.frombuffer(rowids, dtype=np.int64).copy()
+        self._role_ids = np.frombuffer(role_ids, dtype=np.int32).copy()
+        self._alive = np.ones(size, dtype=bool)
+        self._idf = idf.tolist()
+        self._main_terms = vocab_size
+        self._size = size
+
+    def _add_term(self, term: str, df: int = 1) -> int:
+        self._vocab[term] = len(self._idf)
+        self._idf.append(math.log((1.0 + self._size) / (1.0 + df)) + 1.0)
+        return self._vocab[term]
+
+    def _vector(self, counts: Counter, grow: bool) -> Dict[int, float]:
+        vector = {}
+        for term, count in counts.items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                if not grow:
+                    continue
+                term_id = self._add_term(term)
+            vector[term_id] = (1.0 + math.log(count)) * self._idf[term_id]
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {term_id: w / norm for term_id, w in vector.items()} if norm else {}
+
+    def _add_delta(self, rowid: int, role_id: Optional[int], counts: Counter) -> None:
+        vector = self._vector(counts, grow=True)
+        self._delta[rowid] = (role_id, vector)
+        for term_id, weight in vector.items():
+            self._delta_postings.setdefault(term_id, {})[rowid] = weight
+
+    # ============== UPDATES ==============
+
+    def upsert(self, doc: Dict) -> None:
+        """Add or replace one document."""
+        counts = _term_counts(doc['title'], doc['body'], doc.get('tags'))
+        with self._lock:
+            self._remove(doc['rowid'])
+            self._add_delta(doc['rowid'], doc.get('role_id'), counts)
+
+    def remove(self, rowid: int) -> None:
+        """Remove one document; unknown rowids are ignored."""
+        with self._lock:
+            self._remove(rowid)
+
+    def remove_role(self, role_id: int) -> None:
+        """Remove every document of a role."""
+        with self._lock:
+            if self._alive is not None:
+                self._alive &= self._role_ids != role_id
+            for rowid in [rowid for rowid, (doc_role, _) in self._delta.items() if doc_role == role_id]:
+                self._remove(rowid)
+
+    def _remove(self, rowid: int) -> None:
+        entry = self._delta.pop(rowid, None)
+        if entry is not None:
+            for term_id in entry[1]:
+                postings = self._delta_postings[term_id]
+                del postings[rowid]
+                if not postings:
+                    del self._delta_postings[term_id]
+        if self._rowids is not None and len(self._rowids):
+            row = int(np.searchsorted(self._rowids, rowid))
+            if row < len(self._rowids) and self._rowids[row] == rowid:
+                self._alive[row] = False
+
+    # ============== QUERY ==============
+
+    def query(self, text: str, k: int = 5, role_id: int = None,
+              kinds: Iterable[int] = None) -> List[Tuple[int, float]]:
+        """Return up to k (rowid, cosine similarity) pairs, best first.
+
+        Rowids are search index rowids, so rowid % 8 is the document kind.
+        """
+        vector = self._vector(Counter(tokenize(text)), grow=False)
+        if not vector or k <= 0:
+            return []
+        kinds = set(kinds) if kinds else None
+
+        def accept(rowid, doc_role):
+            return (role_id is None or doc_role == role_id) and (kinds is None or rowid % 8 in kinds)
+
+        with self._lock:
+            main = (self._rowids, self._role_ids, self._alive,
+                    self._indptr, self._post_rows, self._post_weights, self._main_terms)
+            scores: Dict[int, float] = {}
+            for term_id, query_weight in vector.items():
+                for rowid, weight in self._delta_postings.get(term_id, {}).items():
+                    scores[rowid] = scores.get(rowid, 0.0) + weight * query_weight
+            results = [(rowid, score) for rowid, score in scores.items()
+                       if accept(rowid, self._delta[rowid][0])]
+
+        if main[0] is not None:
+            results.extend(self._query_main(vector, k, role_id, kinds, *main))
+        return heapq.nlargest(k, results, key=lambda item: (item[1], -item[0]))
+
+    @staticmethod
+    def _query_main(vector, k, role_id, kinds, rowids, role_ids, alive,
+                    indptr, post_rows, post_weights, main_terms) -> List[Tuple[int, float]]:
+        terms = [(term_id, weight) for term_id, weight in vector.items() if term_id < main_terms]
+        if not terms:
+            return []
+        size = len(rowids)
+        scores = np.zeros(size, dtype=np.float32)
+        slices = []
+        for term_id, query_weight in terms:
+            start, end = indptr[term_id], indptr[term_id + 1]
+            # Rows are unique within a term, so a fancy-indexed add is safe
+            scores[post_rows[start:end]] += post_weights[start:end] * np.float32(query_weight)
+            slices.append(post_rows[start:end])
+
+        # argpartition over an array that is mostly zeros is very slow (the ties
+        # defeat introselect), so the top k is picked among the scored rows
+        # unless they make up a good share of the corpus
+        if sum(len(rows) for rows in slices) * 4 < size:
+            candidates = np.unique(np.concatenate(slices))
+            keep = alive[candidates]
+            if role_id is not None:
+                keep &= role_ids[candidates] == role_id
+            if kinds is not None:
+                keep &= np.isin(rowids[candidates] % 8, list(kinds))
+            candidates = candidates[keep]
+        else:
+            np.multiply(scores, alive, out=scores)
+            if role_id is not None:
+                np.multiply(scores, role_ids == role_id, out=scores)
+            if kinds is not None:
+                np.multiply(scores, np.isin(rowids % 8, list(kinds)), out=scores)
+            if np.count_nonzero(scores) * 4 >= size:
+                top = np.argpartition(scores, size - k)[-k:] if size > k else np.arange(size)
+                return [(int(rowids[row]), float(scores[row])) for row in top if scores[row] > 0]
+            candidates = np.flatnonzero(scores)
+
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return [(int(rowids[row]), float(scores[row])) for row in candidates]
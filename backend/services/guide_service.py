@@ -0,0 +1,222 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import threading
+
+from database.db_setup import SEARCH_KINDS
+from repository.db_repo import DatabaseRepository
+from services.sync_service import ReaderLease
+from services.guide_index import VectorIndex
+
+# The guide answers from questions, study resources and roadmap milestones
+GUIDE_KINDS = {1: "question", 3: "study_resource", 4: "milestone"}
+KIND_LABELS = {"question": "Interview question", "study_resource": "Study resource",
+               "milestone": "Roadmap milestone"}
+_KIND_TABLES = {"interview_questions": 1, "study_resources": 3, "milestones": 4}
+MAX_SOURCES = 10
+# Characters of document text quoted per source
+EXCERPT_LENGTH = 240
+# Rebuild once the delta segment holds this share of the documents
+REBUILD_FRACTION = 0.05
+REBUILD_MIN_DELTA = 1000
+
+NO_MATCH_ANSWER = (
+    "I couldn't find anything in NAVIQ's questions, roadmaps or study material for that yet. "
+    "Try naming a role, a skill or a topic, for example \"python testing\" or \"system design interview\"."
+)
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """Cut text at a word boundary near `length` characters."""
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0].rstrip('.,;:') + '…'
+
+
+class GuideService:
+    """
+    Service layer for the career guide: retrieval over NAVIQ's own content.
+    Documents are read from the FTS5 search index, which triggers keep in step
+    with the source tables, and embedded in a TF-IDF VectorIndex.
+
+    Writes are picked up from change_log: when the data version changes, only
+    the rows logged since the last applied seq are re-read. Once the delta
+    segment grows past REBUILD_FRACTION a fresh index is built in the
+    background, caught up from change_log and swapped in. The `lease` keeps
+    the log from being pruned past the index; an index the pruned log no
+    longer reaches back to is rebuilt on the spot.
+    """
+    def __init__(self, repository: DatabaseRepository, lease: ReaderLease = None):
+        self._repository = repository
+        self._lease = lease
+        self._lock = threading.Lock()
+        self._index = None
+        self._seq = 0
+        self._version = None
+        self._rebuilding = False
+        self._streams = 0
+        self._streams_lock = threading.Lock()
+
+    @property
+    def active_streams(self):
+        """Number of stream() generators currently open."""
+        return self._streams
+
+    def metrics(self):
+        """Open answer streams, and the change_log seq the index is current to (None before first use)."""
+        return {"active_streams": self._streams, "indexed_seq": self._seq if self._index is not None else None,
+                "rebuilding": self._rebuilding}
+
+    def _build(self):
+        seq = self._repository.get_last_change()
+        index = VectorIndex()
+        index.build(self._repository.iter_search_documents(GUIDE_KINDS))
+        return index, seq
+
+    def refresh(self):
+        """Build the index on first use, then apply logged writes since the last refresh."""
+        version = self._repository.get_data_version()
+        if self._index is not None and version == self._version:
+            return self._index
+        with self._lock:
+            version = self._repository.get_data_version()
+            if self._index is None:
+                self._index, self._seq = self._build()
+            elif version != self._version:
+                seq = self._apply_changes(self._index, self._seq)
+                # None: the log was pruned past this index
+                self._index, self._seq = (self._index, seq) if seq is not None else self._build()
+            self._version = version
+            if self._lease is not None:
+                self._lease.hold(self._seq)
+            index = self._index
+            if (not self._rebuilding and index.delta_size >= REBUILD_MIN_DELTA
+                    and index.delta_size >= REBUILD_FRACTION * index.main_size):
+                self._rebuilding = True
+                threading.Thread(target=self._rebuild, name="guide-rebuild", daemon=True).start()
+        return index
+
+    def _apply_changes(self, index, seq):
+        """Apply change_log entries after `seq` to `index`; returns the last applied seq, or None if they were pruned."""
+        while True:
+            changes = self._repository.get_changes(seq)
+            if not changes:
+                return None if changes is None else seq
+            rowids = set()
+            for change in changes:
+                kind = _KIND_TABLES.get(change['table_name'])
+                if kind is not None:
+                    rowids.add(change['row_id'] * 8 + kind)
+                elif change['table_name'] == 'roles' and change['op'] == 'delete':
+                    index.remove_role(change['row_id'])
+            found = {doc['rowid']: doc for doc in self._repository.get_search_documents(rowids)}
+            for rowid in rowids:
+                if rowid in found:
+                    index.upsert(found[rowid])
+                else:
+                    index.remove(rowid)
+            seq = changes[-1]['seq']
+
+    def _rebuild(self):
+        try:
+            index, seq = self._build()
+            with self._lock:
+                seq = self._apply_changes(index, seq)
+                self._index, self._seq = (index, seq) if seq is not None else self._build()
+                if self._lease is not None:
+                    self._lease.hold(self._seq)
+        finally:
+            self._rebuilding = False
+
+    def retrieve(self, text, role_id=None, limit=5):
+        """
+        Finds the documents most similar to `text` (TF-IDF cosine).
+
+        Returns:
+            list: Sources as {"kind", "id", "title", "text", "role", "score"}, best first.
+        """
+        limit = min(max(limit, 1), MAX_SOURCES)
+        hits = self.refresh().query(text, k=limit, role_id=role_id)
+        if not hits:
+            return []
+
+        docs = {doc['rowid']: doc for doc in self._repository.get_search_documents(rowid for rowid, _ in hits)}
+        role_names = self._repository.get_role_names({doc['role_id'] for doc in docs.values() if doc['role_id']})
+        sources = []
+        for rowid, score in hits:
+            doc = docs.get(rowid)
+            if doc is None:
+                continue
+            sources.append({
+                "kind": SEARCH_KINDS[rowid % 8],
+                "id": rowid // 8,
+                "title": doc['title'],
+                "text": excerpt(doc['body']),
+                "role": role_names.get(doc['role_id']),
+                "score": round(score, 4),
+            })
+        return sources
+
+    @staticmethod
+    def answer_chunks(text, sources):
+        """
+        Composes the answer from the retrieved sources, one chunk per paragraph.
+        """
+        if not sources:
+            yield NO_MATCH_ANSWER
+            return
+        yield f"Here is what NAVIQ has on \"{text.strip()}\":\n\n"
+        for number, source in enumerate(sources, 1):
+            context = KIND_LABELS.get(source["kind"], source["kind"])
+            if source["role"]:
+                context += f", {source['role']}"
+            chunk = f"{number}. **{source['title']}** ({context})\n"
+            if source["text"]:
+                chunk += f"   {source['text']}\n"
+            yield chunk + "\n"
+        yield "Ask about any of these to dig deeper, or open the roadmap and interview pages for the full material."
+
+    def ask(self, text, role_id=None, limit=5):
+        """
+        Answers a guide question from NAVIQ's content.
+
+        Args:
+            text (str): The user's message.
+            role_id (int, optional): Only use content for this role.
+            limit (int): Number of sources to retrieve (at most MAX_SOURCES).
+
+        Returns:
+            dict: {"query", "answer", "sources"}.
+        """
+        sources = self.retrieve(text, role_id=role_id, limit=limit)
+        return {
+            "query": text,
+            "answer": ''.join(self.answer_chunks(text, sources)).rstrip(),
+            "sources": sources,
+        }
+
+    def stream(self, text, role_id=None, limit=5):
+        """
+        Answers like ask(), one stage at a time, for a streaming response.
+
+        Yields ("retrieval", {"query", "sources"}) as soon as retrieval is done,
+        then ("chunk", {"text"}) per answer paragraph, then ("done", {}).
+        Nothing is computed ahead of what the consumer has pulled, so closing
+        the generator (client gone) stops the work at once.
+        """
+        with self._streams_lock:
+            self._streams += 1
+        try:
+            sources = self.retrieve(text, role_id=role_id, limit=limit)
+            yield "retrieval", {"query": text, "sources": sources}
+            for chunk in self.answer_chunks(text, sources):
+                yield "chunk", {"text": chunk}
+            yield "done", {}
+        finally:
+            with self._streams_lock:
+                self._streams -= 1
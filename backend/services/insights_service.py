@@ -0,0 +1,276 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import time
+
+from repository.db_repo import DatabaseRepository
+from repository.progress_repo import ProgressRepository
+from services.catalogue_service import INSIGHT_CATEGORIES, CatalogueService
+from services.progress_rollups import (COUNTERS, DAY_RETENTION, GRAINS, SKETCH_METRICS, WEEK_RETENTION,
+                                       bucket_of, bucket_start, day_number)
+from services.tdigest import TDigest
+
+# Most buckets one timeline request returns, per grain
+MAX_BUCKETS = {'day': DAY_RETENTION, 'week': WEEK_RETENTION // 7, 'month': 120}
+# Insights say "top X%" only in cohorts of at least this many learners, and
+# only for learners in the top half
+MIN_RANKED_LEARNERS = 10
+MAX_TOP_PERCENT = 50
+
+
+def _plural(count, word):
+    return f"{count:g} {word}{'' if count == 1 else 's'}"
+
+
+def _insight(key, label, value, meta):
+    return {"id": key, "label": label, "value": value, "meta": meta}
+
+
+def _average_grade(row):
+    return row['grade_sum'] / row['grade_count'] if row and row['grade_count'] else None
+
+
+def _activity(row):
+    return (row['milestones'] + row['questions']) if row else 0
+
+
+class InsightsService:
+    """
+    Service layer for career insights. Readiness and velocity come from the
+    progress summary tables that ProgressRollups maintains, for one learner
+    or for a role's cohort, so a page view costs a handful of primary-key
+    lookups however much progress has been recorded. Market insights are
+    the curated career_insights rows, as are all three groups until the
+    learner (or cohort) has any progress.
+
+    Percentile ranks come from the per-role t-digests in progress_sketches;
+    each worker keeps the decoded sketches and reloads one only when its
+    version changes.
+    """
+    def __init__(self, progress: ProgressRepository, catalogue: CatalogueService,
+                 repository: DatabaseRepository):
+        self._progress = progress
+        self._catalogue = catalogue
+        self._repository = repository
+        self._sketches = {}     # (role_id, metric) -> (version, learners, TDigest)
+
+    def _curated(self, category):
+        return [
+            _insight(row['id'], row['label'], row['value'], row['meta'])
+            for row in self._catalogue.get_career_insights(category)
+        ]
+
+    def _without_progress(self):
+        """The curated insights, shown until any progress has been recorded."""
+        return {category: self._curated(category) for category in INSIGHT_CATEGORIES}
+
+    def _role_name(self, role_id):
+        role = self._catalogue.get_role(role_id) if role_id else None
+        return role['name'] if role else "All roles"
+
+    def _weeks(self, rows_for, today):
+        """(this week's, last week's) bucket row, or None for an empty week."""
+        week = bucket_of('week', today)
+        rows = {row['bucket']: row for row in rows_for('week', week - 7, week)}
+        return rows.get(week), rows.get(week - 7)
+
+    def _sketch(self, role_id, metric):
+        row = self._progress.get_sketch(role_id, metric)
+        if row is None:
+            return None
+        cached = self._sketches.get((role_id, metric))
+        if cached is None or cached[0] != row['version']:
+            cached = (row['version'], row['learners'], TDigest.from_bytes(row['digest']))
+            self._sketches[(role_id, metric)] = cached
+        return cached
+
+    def _top_percent(self, role_id, metric, value):
+        """Share of the role's learners ahead of `value` as a whole percent (at least 1), and the learner count."""
+        sketch = self._sketch(role_id, metric)
+        if sketch is None or value is None:
+            return None, 0
+        _, learners, digest = sketch
+        return max(1, math.ceil(100 * (1 - digest.cdf(value)))), learners
+
+    # ============== INSIGHTS ==============
+
+    def rank(self, user_id, role_id=0, metric='readiness'):
+        """
+        Ranks a learner among a role's learners (role 0: all learners).
+
+        Args:
+            user_id (str): The learner.
+            role_id (int): The role.
+            metric (str): One of SKETCH_METRICS.
+
+        Returns:
+            dict: {"metric", "role_id", "value", "percentile", "top_percent",
+                "learners"}, or None if the learner has no value for it.
+                percentile is the share of learners below them (ties count
+                half), estimated from the role's sketch.
+        """
+        if metric not in SKETCH_METRICS:
+            raise ValueError(f"metric must be one of {', '.join(SKETCH_METRICS)}")
+        row = next((row for row in self._progress.get_learner(user_id) if row['role_id'] == role_id), None)
+        sketch = self._sketch(role_id, metric) if row is not None and row[metric] is not None else None
+        if sketch is None:
+            return None
+        _, learners, digest = sketch
+        below = digest.cdf(row[metric])
+        return {
+            "metric": metric, "role_id": role_id, "value": row[metric], "learners": learners,
+            "percentile": round(100 * below, 1), "top_percent": max(1, math.ceil(100 * (1 - below))),
+        }
+
+    def learner_insights(self, user_id, role_id=None, now=None):
+        """
+        Builds a learner's insights from their summaries.
+
+        Args:
+            user_id (str): The learner.
+            role_id (int, optional): Role for the readiness insights (default:
+                the role they were most recently active in).
+            now (float, optional): Unix time (default: the current time).
+
+        Returns:
+            dict: Insights grouped as {"readiness", "velocity", "market"},
+                each a list of {"id", "label", "value", "meta"}.
+        """
+        today = day_number(time.time() if now is None else now)
+        learner = {row['role_id']: row for row in self._progress.get_learner(user_id)}
+        overall = learner.get(0)
+        if overall is None:
+            return self._without_progress()
+        if role_id not in learner or not role_id:
+            roles = [row for role, row in learner.items() if role]
+            role_id = max(roles, key=lambda row: (row['last_day'], row['role_id']))['role_id'] if roles else None
+
+        readiness = []
+        if role_id:
+            row = learner[role_id]
+            name = self._role_name(role_id)
+            total = self._repository.get_milestone_counts([role_id]).get(role_id, 0)
+            cohort = {c['role_id']: c for c in self._progress.get_cohorts()}.get(role_id)
+            if row['readiness'] is not None:
+                top, ranked = self._top_percent(role_id, 'readiness', row['readiness'])
+                if ranked >= MIN_RANKED_LEARNERS and top <= MAX_TOP_PERCENT:
+                    meta = f"Top {top}% of {name} learners"
+                else:
+                    meta = name
+                    if cohort and cohort['learners']:
+                        meta += f" · cohort average {cohort['readiness_sum'] / cohort['learners']:.0f}%"
+                readiness.append(_insight("readiness", "Readiness score", f"{row['readiness']:.0f}%", meta))
+            readiness.append(_insight("milestones", "Milestones completed",
+                                      f"{row['milestones']} / {total}", f"{name} roadmap"))
+        average = _average_grade(overall)
+        meta = f"Average grade {average:.1f} / 5" if average is not None else "No graded answers yet"
+        top, ranked = self._top_percent(0, 'questions', overall['questions'])
+        if overall['questions'] and ranked >= MIN_RANKED_LEARNERS and top <= MAX_TOP_PERCENT:
+            meta += f" · top {top}% by answers"
+        readiness.append(_insight("practice", "Interview practice", _plural(overall['questions'], "answer"), meta))
+
+        streak = overall['streak'] if overall['last_day'] >= today - 1 else 0
+        this_week, last_week = self._weeks(
+            lambda grain, since, until: self._progress.get_rollups(user_id, 0, grain, since, until), today)
+        month = bucket_of('month', today)
+        this_month = self._progress.get_rollups(user_id, 0, 'month', month, month)
+        velocity = [
+            _insight("streak", "Learning streak", _plural(streak, "day"),
+                     f"Best {_plural(overall['best_streak'], 'day')}"),
+            _insight("weekly", "Weekly velocity", f"{_activity(this_week)} this week",
+                     f"{_activity(this_week) - _activity(last_week):+d} vs last week "
+                     f"(milestones and answers)"),
+            _insight("study", "Study time",
+                     f"{(this_week['study_minutes'] if this_week else 0):.0f} min this week",
+                     f"{(this_month[0]['study_minutes'] if this_month else 0) / 60:.1f} h this month"),
+        ]
+        return {"readiness": readiness, "velocity": velocity, "market": self._curated('market')}
+
+    def cohort_insights(self, role_id=None, now=None):
+        """
+        Builds the insights of a role's learners (all learners by default).
+
+        Args:
+            role_id (int, optional): The role.
+            now (float, optional): Unix time (default: the current time).
+
+        Returns:
+            dict: Insights grouped as {"readiness", "velocity", "market"}.
+        """
+        today = day_number(time.time() if now is None else now)
+        role_id = role_id or 0
+        cohorts = {row['role_id']: row for row in self._progress.get_cohorts()}
+        if role_id not in cohorts:
+            return self._without_progress()
+        # Readiness is per role; across all roles it is the mean over every learner and role
+        scored = [cohorts[role_id]] if role_id else [row for role, row in cohorts.items() if role]
+        learners = sum(row['learners'] for row in scored)
+        this_week, last_week = self._weeks(
+            lambda grain, since, until: self._progress.get_cohort_rollups(role_id, grain, since, until), today)
+        active = this_week['learners'] if this_week else 0
+        average = _average_grade(this_week)
+
+        readiness = [
+            _insight("milestones", "Milestones completed", f"{this_week['milestones'] if this_week else 0} this week",
+                     f"{self._role_name(role_id)}, {_plural(cohorts[role_id]['learners'], 'learner')}"),
+        ]
+        if learners:
+            readiness.insert(0, _insight("readiness", "Average readiness",
+                                         f"{sum(row['readiness_sum'] for row in scored) / learners:.0f}%",
+                                         f"Across {_plural(learners, 'learner')}"))
+        velocity = [
+            _insight("active", "Active learners", f"{active} this week",
+                     f"{active - (last_week['learners'] if last_week else 0):+d} vs last week"),
+            _insight("practice", "Practice volume",
+                     f"{_plural(this_week['questions'] if this_week else 0, 'answer')} this week",
+                     f"Average grade {average:.1f} / 5" if average is not None else "No graded answers yet"),
+            _insight("study", "Study time",
+                     f"{(this_week['study_minutes'] if this_week else 0) / 60:.1f} h this week",
+                     f"{(this_week['study_minutes'] / active) if active else 0:.0f} min per active learner"),
+        ]
+        return {"readiness": readiness, "velocity": velocity, "market": self._curated('market')}
+
+    def timeline(self, grain='week', user_id=None, role_id=None, limit=12, now=None):
+        """
+        Progress counters over the last `limit` day, week or month buckets.
+
+        Args:
+            grain (str): 'day', 'week' or 'month'.
+            user_id (str, optional): A learner; the role's cohort when omitted.
+            role_id (int, optional): Only progress in this role (default: all roles).
+            limit (int): Number of buckets, up to the grain's retention.
+            now (float, optional): Unix time (default: the current time).
+
+        Returns:
+            dict: {"grain", "buckets"}, buckets oldest first as {"start", the
+                counters, "average_grade"} (plus "learners" for a cohort),
+                with empty buckets included.
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"grain must be one of {', '.join(GRAINS)}")
+        limit = min(max(limit, 1), MAX_BUCKETS[grain])
+        today = day_number(time.time() if now is None else now)
+        step = 7 if grain == 'week' else 1
+        last = bucket_of(grain, today)
+        buckets = [last - step * i for i in range(limit - 1, -1, -1)]
+        if user_id is None:
+            rows = self._progress.get_cohort_rollups(role_id or 0, grain, buckets[0], last)
+        else:
+            rows = self._progress.get_rollups(user_id, role_id or 0, grain, buckets[0], last)
+        found = {row['bucket']: row for row in rows}
+
+        series = []
+        for bucket in buckets:
+            row = found.get(bucket)
+            entry = {"start": bucket_start(grain, bucket).isoformat()}
+            if user_id is None:
+                entry["learners"] = row['learners'] if row else 0
+            entry.update((counter, row[counter] if row else 0) for counter in COUNTERS)
+            average = _average_grade(row)
+            entry["average_grade"] = round(average, 2) if average is not None else None
+            series.append(entry)
+        return {"grain": grain, "buckets": series}
@@ -1,23 +1,142 @@
-from backend.repository.file_repo import FileRepository
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.base import CatalogueRepository
+
+
+def _fold(value):
+    return value.casefold() if isinstance(value, str) else value
+
+
+class _RoleIndex:
+    """
+    Secondary indexes over one role's interview questions. Each index maps a
+    key to a prebuilt tuple of formatted questions, so any difficulty/focus
+    combination is answered with one dict lookup and a copy of exactly the
+    matching questions.
+    """
+    def __init__(self, questions):
+        self.questions = tuple(sorted(
+            (self._format(q) for q in questions or ()),
+            key=lambda q: (q['difficulty'] or '', q['focus'] or ''),
+        ))
+        self.by_difficulty = {}
+        self.by_focus = {}
+        self.by_difficulty_focus = {}
+
+        buckets = ({}, {}, {})
+        for question in self.questions:
+            difficulty = _fold(question['difficulty'])
+            focus = _fold(question['focus'])
+            buckets[0].setdefault(difficulty, []).append(question)
+            buckets[1].setdefault(focus, []).append(question)
+            buckets[2].setdefault((difficulty, focus), []).append(question)
+        for target, bucket in zip((self.by_difficulty, self.by_focus, self.by_difficulty_focus), buckets):
+            target.update((key, tuple(items)) for key, items in bucket.items())
+
+    @staticmethod
+    def _format(question):
+        """Format a question row (database or JSON file) to match frontend expectations."""
+        formatted = {
+            "question": question.get('question'),
+            "focus": question.get('focus'),
+            "difficulty": question.get('difficulty'),
+            "answer": question.get('answer'),
+            "followUp": question.get('follow_up', question.get('followUp')),
+        }
+        if 'id' in question:
+            formatted["id"] = question['id']
+        return formatted
+
+    def lookup(self, difficulty=None, focus=None):
+        if difficulty and focus:
+            return self.by_difficulty_focus.get((_fold(difficulty), _fold(focus)), ())
+        if difficulty:
+            return self.by_difficulty.get(_fold(difficulty), ())
+        if focus:
+            return self.by_focus.get(_fold(focus), ())
+        return self.questions
+
 
 class InterviewService:
     """
     Service layer for handling interview-related business logic.
     It uses a repository to fetch data, keeping the service
     independent of the data storage implementation.
+
+    Each role's questions are indexed by difficulty, focus and both, built on
+    first use from get_questions_for_role so that only the roles being asked
+    for are loaded (a file-indexed store never decodes the whole file). Up to
+    cache_size role indexes are kept, and all of them are dropped when the
+    repository's data version changes.
     """
-    def __init__(self, repository: FileRepository):
+    def __init__(self, repository: CatalogueRepository, cache_size=64):
         self._repository = repository
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._roles = OrderedDict()
+        self._version = None
+
+    def _role_index(self, role):
+        version = self._repository.get_data_version()
+        with self._lock:
+            if version != self._version:
+                self._roles.clear()
+                self._version = version
+            index = self._roles.get(role)
+            if index is not None:
+                self._roles.move_to_end(role)
+                return index
+
+        index = _RoleIndex(self._repository.get_questions_for_role(role) if role else ())
+        with self._lock:
+            if version == self._version:
+                self._roles[role] = index
+                while len(self._roles) > self._cache_size:
+                    self._roles.popitem(last=False)
+        return index
+
+    def has_role(self, role):
+        """
+        Returns True if the role has any interview questions.
+        """
+        return bool(self._role_index(role).questions)
+
+    def find_questions(self, role, difficulty=None, focus=None):
+        """
+        Fetches the questions for a role, optionally filtered by difficulty and focus.
+        Filters are matched case-insensitively.
+
+        Args:
+            role (str): The role to get questions for.
+            difficulty (str, optional): Only return questions of this difficulty.
+            focus (str, optional): Only return questions with this focus area.
+
+        Returns:
+            list: The matching questions, ordered by difficulty then focus.
+        """
+        return list(self._role_index(role).lookup(difficulty, focus))
 
     def get_questions_for_role(self, role):
         """
-        Fetches all questions and filters them by the specified role.
-        
+        Fetches the questions for the specified role.
+
         Args:
             role (str): The role to get questions for.
 
         Returns:
             list: A list of questions for the given role, or None if the role is not found.
         """
-        all_questions = self._repository.get_interview_questions()
-        return all_questions.get(role)
+        questions = self._role_index(role).questions
+        return list(questions) if questions else None
+
+    def get_questions_by_role_id(self, role_id):
+        """
+        Fetches the unformatted question rows for a role by ID (empty if unknown).
+        """
+        return self._repository.get_questions_by_role_id(role_id)
@@ -0,0 +1,370 @@
+"""
+MinHash signatures and LSH banding for NAVIQ
+Near-duplicate detection for short texts such as interview questions.
+
+A text becomes a set of character 5-grams over its normalised words; a
+MinHash signature of NUM_PERM values estimates the Jaccard similarity of two
+such sets as the share of positions where their signatures agree. LSH splits
+a signature into BANDS bands of ROWS values: texts that agree on any whole
+band become candidates, which with 16 x 4 catches pairs above ~0.75 Jaccard
+almost always while rarely proposing pairs below ~0.3.
+
+Signatures and bucket keys are computed with NumPy when it is installed, in
+pure Python otherwise; both give identical values.
+"""
+
+import random
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; signatures fall back to a Python loop
+    np = None
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SEED = 1
+_WORD = re.compile(r'[a-z0-9]+')
+# Multiplier (2^64 / golden ratio) for mixing a band's values into a bucket key
+_MIX = 0x9E3779B97F4A7C15
+_MASK = (1 << 64) - 1
+# Signature value of a text without any 5-gram
+_EMPTY = (1 << 32) - 1
+
+# Multiply-shift hashes: h(x) = ((a * x + b) mod 2^64) >> 32 with odd a
+_rng = random.Random(SEED)
+_A = [_rng.getrandbits(64) | 1 for _ in range(NUM_PERM)]
+_B = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+if np is not None:
+    _A_NP = np.array(_A, dtype=np.uint64)
+    _B_NP = np.array(_B, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Lowercased alphanumeric words of `text`, joined by single spaces (always ASCII)."""
+    return ' '.join(_WORD.findall((text or '').lower()))
+
+
+def shingles(text: str) -> Set[str]:
+    """Character 5-grams of the normalised text."""
+    normalized = normalize(text)
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: Set, b: Set) -> float:
+    """Exact Jaccard similarity of two sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _shingle_values(text: str) -> List[int]:
+    # A 5-gram's ASCII bytes read as one 40-bit integer
+    return [int.from_bytes(s.encode('ascii'), 'big') for s in shingles(text)]
+
+
+def _min_hashes(values):
+    """(NUM_PERM, n) uint32 hashes of a uint64 value array (wrapping arithmetic)."""
+    return ((values[None, :] * _A_NP[:, None] + _B_NP[:, None]) >> np.uint64(32)).astype(np.uint32)
+
+
+def _segment_minimums(values, starts):
+    """
+    (len(starts), NUM_PERM) signatures of consecutive value segments. One hash
+    function at a time, in place, keeps the working set in cache: several
+    times faster than _min_hashes() over a large batch.
+    """
+    minimums = np.empty((NUM_PERM, len(starts)), dtype=np.uint64)
+    hashed = np.empty_like(values)
+    shift = np.uint64(32)
+    for i in range(NUM_PERM):
+        np.multiply(values, _A_NP[i], out=hashed)
+        np.add(hashed, _B_NP[i], out=hashed)
+        np.right_shift(hashed, shift, out=hashed)
+        minimums[i] = np.minimum.reduceat(hashed, starts)
+    return minimums.T.astype(np.uint32)
+
+
+def signature(text: str) -> array:
+    """MinHash signature of `text` as NUM_PERM unsigned 32-bit values."""
+    values = _shingle_values(text)
+    if not values:
+        return array('I', [_EMPTY] * NUM_PERM)
+    if np is not None:
+        return array('I', _min_hashes(np.array(values, dtype=np.uint64)).min(axis=1).tobytes())
+    return array('I', [min(((a * x + b) & _MASK) >> 32 for x in values) for a, b in zip(_A, _B)])
+
+
+def signatures(texts: Sequence[str], chunk_size: int = 1000) -> List[array]:
+    """
+    signature() of each text. With NumPy the 5-grams of a whole chunk are read
+    straight off the concatenated normalised texts, with no per-shingle Python.
+    """
+    if np is None:
+        return [signature(text) for text in texts]
+    result = []
+    for offset in range(0, len(texts), chunk_size):
+        normalized = [normalize(text) for text in texts[offset:offset + chunk_size]]
+        lengths = np.array([len(text) for text in normalized], dtype=np.int64)
+        long_texts = np.flatnonzero(lengths >= SHINGLE_SIZE)
+        sigs = [None] * len(normalized)
+        for i in np.flatnonzero(lengths < SHINGLE_SIZE):
+            sigs[i] = signature(normalized[i])
+
+        if len(long_texts):
+            data = np.frombuffer(''.join(normalized).encode('ascii'), dtype=np.uint8).astype(np.uint64)
+            packed = np.zeros(len(data) - SHINGLE_SIZE + 1, dtype=np.uint64)
+            for shift in range(SHINGLE_SIZE):
+                packed = (packed << np.uint64(8)) | data[shift:len(data) - SHINGLE_SIZE + 1 + shift]
+            # Windows that start and end inside one text, grouped per text
+            counts = lengths[long_texts] - SHINGLE_SIZE + 1
+            text_starts = (np.cumsum(lengths) - lengths)[long_texts]
+            segment_starts = np.cumsum(counts) - counts
+            windows = np.repeat(text_starts - segment_starts, counts) + np.arange(counts.sum())
+            minimums = _segment_minimums(packed[windows], segment_starts)
+            for i, row in zip(long_texts, minimums):
+                sigs[i] = array('I', row.tobytes())
+        result.extend(sigs)
+    return result
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity: the share of positions where two signatures agree."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _scope_id(scope: Optional[int]) -> int:
+    return -1 if scope is None else int(scope)
+
+
+def band_keys(sig: Sequence[int], scope: Optional[int] = None) -> List[int]:
+    """One 64-bit bucket key per band; signatures only collide within the same scope."""
+    base = (_scope_id(scope) & _MASK) * _MIX
+    keys = []
+    for band in range(BANDS):
+        h = (base + band + 1) & _MASK
+        for value in sig[band * ROWS:(band + 1) * ROWS]:
+            h = ((h ^ value) * _MIX) & _MASK
+        keys.append(h ^ (h >> 29))
+    return keys
+
+
+def _band_key_columns(sigs, scopes):
+    """band_keys() for a (n, NUM_PERM) signature matrix at once, as a (BANDS, n) array."""
+    base = scopes.astype(np.int64).view(np.uint64) * np.uint64(_MIX)
+    columns = np.empty((BANDS, len(scopes)), dtype=np.uint64)
+    for band in range(BANDS):
+        h = base + np.uint64(band + 1)
+        for column in range(band * ROWS, (band + 1) * ROWS):
+            h = (h ^ sigs[:, column].astype(np.uint64)) * np.uint64(_MIX)
+        columns[band] = h ^ (h >> np.uint64(29))
+    return columns
+
+
+def _packed(typecode, values):
+    """Copy a NumPy array into an array.array without a bytes intermediate."""
+    packed = array(typecode)
+    packed.frombytes(np.ascontiguousarray(values).reshape(-1).view(np.uint8).data)
+    return packed
+
+
+class LSHIndex:
+    """
+    Banded LSH buckets over MinHash signatures, grouped by scope (e.g. role).
+    Keys are ints; scopes are ints or None.
+
+    Like the guide's VectorIndex it has two segments. build() packs entries
+    into flat arrays with one sorted bucket-key array per band, probed by
+    binary search, so a million entries take a few hundred bytes each rather
+    than a set per bucket. add() after that goes to a small dict segment, and
+    remove() of a packed entry only marks it dead, until the next build.
+    """
+
+    def __init__(self):
+        # Main segment, rows in key order; scope -1 stands for None
+        self._keys = array('q')
+        self._scopes = array('q')
+        self._sigs = array('I')
+        self._alive = bytearray()
+        self._removed = 0
+        self._band_keys = [array('Q') for _ in range(BANDS)]
+        self._band_rows = [array('i') for _ in range(BANDS)]
+        # Delta segment
+        self._delta: Dict[int, Tuple[Optional[int], array]] = {}
+        self._delta_buckets: Dict[int, Set[int]] = {}
+
+    def __len__(self):
+        return len(self._keys) - self._removed + len(self._delta)
+
+    def __contains__(self, key):
+        return key in self._delta or self._row(key) is not None
+
+    @property
+    def delta_size(self):
+        return len(self._delta)
+
+    @property
+    def main_size(self):
+        return len(self._keys) - self._removed
+
+    def build(self, keys: Sequence[int], scopes: Sequence[int], sigs: Sequence[int]) -> None:
+        """
+        Replace the index with the given entries, packed into the main segment.
+
+        Args:
+            keys: Unique entry keys.
+            scopes: Scope per entry, -1 for None.
+            sigs: The entries' signatures concatenated, NUM_PERM values each.
+        """
+        count = len(keys)
+        if np is not None:
+            key_array = np.asarray(keys, dtype=np.int64)
+            scope_array = np.asarray(scopes, dtype=np.int64)
+            sig_matrix = np.asarray(sigs, dtype=np.uint32).reshape(count, NUM_PERM)
+            if count and not np.all(key_array[1:] > key_array[:-1]):
+                order = np.argsort(key_array, kind='stable')
+                key_array, scope_array, sig_matrix = key_array[order], scope_array[order], sig_matrix[order]
+            self._keys = _packed('q', key_array)
+            self._scopes = _packed('q', scope_array)
+            self._sigs = _packed('I', sig_matrix)
+            columns = _band_key_columns(sig_matrix, scope_array)
+            for band in range(BANDS):
+                band_order = np.argsort(columns[band], kind='stable')
+                self._band_keys[band] = _packed('Q', columns[band][band_order])
+                self._band_rows[band] = _packed('i', band_order.astype(np.int32))
+        else:
+            order = sorted(range(count), key=keys.__getitem__)
+            self._keys = array('q', (keys[i] for i in order))
+            self._scopes = array('q', (scopes[i] for i in order))
+            self._sigs = array('I')
+            for i in order:
+                self._sigs.extend(sigs[i * NUM_PERM:(i + 1) * NUM_PERM])
+            columns = [[] for _ in range(BANDS)]
+            for row in range(count):
+                scope = self._scopes[row]
+                row_keys = band_keys(self._sig(row), None if scope == -1 else scope)
+                for band, key in enumerate(row_keys):
+                    columns[band].append((key, row))
+            for band in range(BANDS):
+                columns[band].sort()
+                self._band_keys[band] = array('Q', (key for key, _ in columns[band]))
+                self._band_rows[band] = array('i', (row for _, row in columns[band]))
+        self._alive = bytearray(b'\x01') * count
+        self._removed = 0
+        self._delta = {}
+        self._delta_buckets = {}
+
+    def export(self) -> Tuple[array, array, array]:
+        """Every live entry as build() arguments: (keys, scopes, sigs)."""
+        if not self._delta and not self._removed:
+            return array('q', self._keys), array('q', self._scopes), array('I', self._sigs)
+        keys, scopes, sigs = array('q'), array('q'), array('I')
+        for key, scope, sig in self.items():
+            keys.append(key)
+            scopes.append(_scope_id(scope))
+            sigs.extend(sig)
+        return keys, scopes, sigs
+
+    def compact(self) -> None:
+        """Rebuild the main segment from every live entry, emptying the delta segment."""
+        self.build(*self.export())
+
+    def _sig(self, row):
+        return self._sigs[row * NUM_PERM:(row + 1) * NUM_PERM]
+
+    def _row(self, key):
+        row = bisect_left(self._keys, key)
+        if row < len(self._keys) and self._keys[row] == key and self._alive[row]:
+            return row
+        return None
+
+    def items(self) -> Iterator[Tuple[int, Optional[int], array]]:
+        """(key, scope, signature) for every entry."""
+        for row, (key, scope, alive) in enumerate(zip(self._keys, self._scopes, self._alive)):
+            if alive:
+                yield key, None if scope == -1 else scope, self._sig(row)
+        for key, (scope, sig) in self._delta.items():
+            yield key, scope, sig
+
+    def add(self, key: int, sig: array, scope: Optional[int] = None) -> None:
+        self.remove(key)
+        self._delta[key] = (scope, sig)
+        for bucket in band_keys(sig, scope):
+            self._delta_buckets.setdefault(bucket, set()).add(key)
+
+    def remove(self, key: int) -> None:
+        entry = self._delta.pop(key, None)
+        if entry is not None:
+            for bucket in band_keys(entry[1], entry[0]):
+                keys = self._delta_buckets.get(bucket)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._delta_buckets[bucket]
+            return
+        row = self._row(key)
+        if row is not None:
+            self._alive[row] = 0
+            self._removed += 1
+
+    def keys_in_scope(self, scope: Optional[int]) -> List[int]:
+        scope_id = _scope_id(scope)
+        found = [key for key, key_scope, alive in zip(self._keys, self._scopes, self._alive)
+                 if alive and key_scope == scope_id]
+        found.extend(key for key, (key_scope, _) in self._delta.items() if key_scope == scope)
+        return found
+
+    def _candidates(self, sig, scope):
+        """{key: signature} of entries sharing at least one band with `sig` in `scope`."""
+        scope_id = _scope_id(scope)
+        found = {}
+        for band, bucket in enumerate(band_keys(sig, scope)):
+            bucket_keys, rows = self._band_keys[band], self._band_rows[band]
+            position = bisect_left(bucket_keys, bucket)
+            while position < len(bucket_keys) and bucket_keys[position] == bucket:
+                row = rows[position]
+                if self._alive[row] and self._scopes[row] == scope_id:
+                    found[self._keys[row]] = self._sig(row)
+                position += 1
+            for key in self._delta_buckets.get(bucket, ()):
+                found[key] = self._delta[key][1]
+        return found
+
+    def collisions(self) -> Iterator[List[int]]:
+        """Keys of every main-segment bucket holding two or more live entries (per band)."""
+        for band in range(BANDS):
+            run_key, run = None, []
+            for bucket, row in zip(self._band_keys[band], self._band_rows[band]):
+                if bucket != run_key:
+                    if len(run) > 1:
+                        yield run
+                    run_key, run = bucket, []
+                if self._alive[row]:
+                    run.append(self._keys[row])
+            if len(run) > 1:
+                yield run
+
+    def candidates(self, sig: Sequence[int], scope: Optional[int] = None) -> Set[int]:
+        """Keys sharing at least one band with `sig` in `scope`."""
+        return set(self._candidates(sig, scope))
+
+    def query(self, sig: Sequence[int], scope: Optional[int] = None, threshold: float = 0.0,
+              exclude: Iterable[int] = ()) -> List[tuple]:
+        """(key, estimated similarity) of candidates at or above `threshold`, most similar first."""
+        exclude = set(exclude)
+        matches = []
+        for key, key_sig in self._candidates(sig, scope).items():
+            if key in exclude:
+                continue
+            score = similarity(sig, key_sig)
+            if score >= threshold:
+                matches.append((key, score))
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches
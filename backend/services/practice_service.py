@@ -0,0 +1,269 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from repository.db_repo import DatabaseRepository
+from repository.practice_repo import PracticeRepository
+from services.spaced_repetition import DueQueue, review
+
+# Decks kept in memory per worker (least recently used go first)
+MAX_DECKS = 10000
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec='seconds')
+
+
+class _Deck:
+    """Cached copy of one learner's deck for one role."""
+
+    def __init__(self, row, cards):
+        row = row or {}
+        self.start_id = row.get('start_id')
+        self.cursor_id = row.get('cursor_id')
+        self.last_id = row.get('last_id')
+        self.wrapped = bool(row.get('wrapped'))
+        self.version = row.get('version', 0)
+        self.queue = DueQueue(cards)
+
+    def catch_up(self, row, changes):
+        """Apply another worker's writes: the deck row and (question_id, due) of changed cards."""
+        self.start_id = row['start_id']
+        self.cursor_id = row['cursor_id']
+        self.last_id = row['last_id']
+        self.wrapped = bool(row['wrapped'])
+        self.version = row['version']
+        for question_id, due in changes:
+            if due is None:
+                self.queue.remove(question_id)
+            else:
+                self.queue.push(question_id, due)
+
+
+class PracticeService:
+    """
+    Service layer for spaced-repetition interview practice. Each learner has
+    a deck per role: the questions they have answered, scheduled with SM-2,
+    plus a cursor over the role's question IDs that introduces new ones.
+
+    The next question is the deck's earliest due card, else the first
+    unanswered question after the cursor, so it costs a heap peek and a
+    couple of indexed lookups, never a scan or ORDER BY RANDOM(). Each deck
+    starts its cursor at a random ID of the role and wraps around, so
+    learners don't all begin with the same questions.
+
+    Decks are persisted in the practice database and cached here; a version
+    row per deck, bumped by every write, tells a worker when another one has
+    changed its cached copy, and the deck's change log names the cards to
+    re-read. Requests for one deck are serialized by that deck's lock;
+    different decks never wait on each other's database round trips.
+    """
+    def __init__(self, repository: DatabaseRepository, practice: PracticeRepository):
+        self._repository = repository
+        self._practice = practice
+        # Guards the deck cache and the per-deck locks only
+        self._lock = threading.Lock()
+        self._decks = OrderedDict()
+        # deck key -> [lock, holders and waiters]
+        self._deck_locks = {}
+
+    # ============== DECKS ==============
+
+    @contextmanager
+    def _locked(self, user_id, role_id):
+        """Hold one deck's lock; the lock is dropped once nobody holds or waits for it."""
+        key = (user_id, role_id)
+        with self._lock:
+            entry = self._deck_locks.get(key)
+            if entry is None:
+                entry = self._deck_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._deck_locks[key]
+
+    def _deck(self, user_id, role_id):
+        """
+        The cached deck (deck lock held), caught up with the cards other
+        workers changed when its persisted version moved on, or reloaded when
+        it is further behind than the change log goes.
+        """
+        key = (user_id, role_id)
+        row = self._practice.get_deck(user_id, role_id)
+        version = row['version'] if row else 0
+        with self._lock:
+            deck = self._decks.get(key)
+        if deck is not None and deck.version != version:
+            changes = None
+            if deck.version < version:
+                changes = self._practice.get_deck_changes(user_id, role_id, deck.version, version)
+            if changes is None:
+                deck = None
+            else:
+                deck.catch_up(row, changes)
+        if deck is None:
+            deck = _Deck(row, self._practice.get_deck_cards(user_id, role_id))
+        with self._lock:
+            self._decks[key] = deck
+            self._decks.move_to_end(key)
+            if len(self._decks) > MAX_DECKS:
+                self._decks.popitem(last=False)
+        return deck
+
+    def _written(self, user_id, role_id, versions):
+        """Keep a cached deck current after our own write, or drop it if it was stale."""
+        old, new = versions
+        with self._lock:
+            deck = self._decks.get((user_id, role_id))
+            if deck is None:
+                return
+            if deck.version == old:
+                deck.version = new
+            else:
+                del self._decks[(user_id, role_id)]
+
+    def _new_question(self, user_id, role_id, deck):
+        """
+        ID of the deck's next unanswered question, or None once every question
+        of the role has a card. Walks from start_id to the end, wraps around to
+        start_id, then takes questions added above last_id since.
+        """
+        moved = False
+        if deck.start_id is None:
+            bounds = self._repository.get_question_id_range(role_id)
+            if bounds is None:
+                return None
+            deck.start_id = random.randint(*bounds)
+            deck.cursor_id = deck.last_id = deck.start_id - 1
+            moved = True
+        question_id = None
+        while True:
+            if not deck.wrapped:
+                question_id = self._repository.next_question_id(role_id, deck.cursor_id)
+                if question_id is None:
+                    deck.wrapped, deck.cursor_id = True, 0
+                    moved = True
+                    continue
+            else:
+                question_id = self._repository.next_question_id(role_id, deck.cursor_id, deck.start_id)
+                tail = question_id is None
+                if tail:
+                    question_id = self._repository.next_question_id(role_id, deck.last_id)
+                    if question_id is None:
+                        break
+            if question_id not in deck.queue:
+                break
+            # Answered outside the deck's order already: step past it
+            if deck.wrapped and tail:
+                deck.last_id = question_id
+            else:
+                deck.cursor_id = question_id
+                if not deck.wrapped:
+                    deck.last_id = question_id
+            moved = True
+            question_id = None
+        if moved:
+            self._written(user_id, role_id, self._practice.set_deck_cursor(
+                user_id, role_id, deck.start_id, deck.cursor_id, deck.last_id, deck.wrapped))
+        return question_id
+
+    # ============== PRACTICE ==============
+
+    def next_question(self, user_id, role_id, now=None):
+        """
+        Picks the question a learner should practise next for a role.
+
+        Args:
+            user_id (str): The learner.
+            role_id (int): The role they practise for.
+            now (float, optional): Unix time (default: the current time).
+
+        Returns:
+            dict: {"question", "card"}: the question and its card, whose
+                "state" is "new", or "review"/"relearning" for a due card
+                (with its SM-2 state). When nothing is due and every question
+                has been seen, question is None and "next_due" says when the
+                next card falls due.
+        """
+        now = time.time() if now is None else now
+        with self._locked(user_id, role_id):
+            while True:
+                deck = self._deck(user_id, role_id)
+                top = deck.queue.peek()
+                if top is not None and top[0] <= now:
+                    question = self._repository.get_question_by_id(top[1])
+                    if question is None or question['role_id'] != role_id:
+                        # Deleted or moved to another role since it was answered
+                        self._written(user_id, role_id, self._practice.delete_card(user_id, top[1], role_id))
+                        deck.queue.remove(top[1])
+                        continue
+                    card = self._practice.get_card(user_id, top[1])
+                    return {"question": question, "card": self._card(card)}
+                question_id = self._new_question(user_id, role_id, deck)
+                if question_id is None:
+                    return {"question": None, "next_due": _timestamp(top[0]) if top else None}
+                question = self._repository.get_question_by_id(question_id)
+                if question is not None:
+                    return {"question": question, "card": {"state": "new"}}
+
+    def record_answer(self, user_id, question_id, grade, answer=None, now=None):
+        """
+        Records a learner's answer and self-grade, and reschedules the question.
+
+        Args:
+            user_id (str): The learner.
+            question_id (int): The question answered.
+            grade (int): Self-grade from 0 (no recall) to 5 (perfect); 3 and
+                up count as recalled.
+            answer (str, optional): The learner's answer, kept for review.
+            now (float, optional): Unix time (default: the current time).
+
+        Returns:
+            dict: {"question_id", "role_id", "grade", "card"}, or None if the
+                question doesn't exist.
+        """
+        now = time.time() if now is None else now
+        found = self._repository.get_question_texts([question_id])
+        if not found:
+            return None
+        role_id = found[0]['role_id']
+        with self._locked(user_id, role_id):
+            card, versions = self._practice.review_card(
+                user_id, question_id, role_id, grade, answer, now, lambda card: review(card, grade, now))
+            with self._lock:
+                deck = self._decks.get((user_id, role_id))
+            self._written(user_id, role_id, versions)
+            if deck is not None and deck.version == versions[1]:
+                deck.queue.push(question_id, card.due)
+        return {
+            "question_id": question_id,
+            "role_id": role_id,
+            "grade": grade,
+            "card": self._card(card._asdict()),
+        }
+
+    @staticmethod
+    def _card(card):
+        return {
+            # Failed cards restart their repetitions and come back within the session
+            "state": "review" if card['repetitions'] else "relearning",
+            "repetitions": card['repetitions'],
+            "interval_days": card['interval'],
+            "ease": round(card['ease'], 2),
+            "lapses": card['lapses'],
+            "due": _timestamp(card['due']),
+        }
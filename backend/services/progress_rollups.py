@@ -0,0 +1,303 @@
+"""
+Progress rollups for NAVIQ insights
+Folds each flushed batch of progress events into summary tables, inside the
+transaction that stores the events, so insights never group raw events:
+
+    progress_rollups         counters per learner, role and day/week/month
+    progress_cohort_rollups  the same per role, plus active learners
+    progress_learners        all-time totals, streak and readiness per learner and role
+    progress_cohorts         learner count and readiness total per role
+    progress_sketches        t-digest per role of each SKETCH_METRICS column
+
+Every event counts towards its role and towards role 0 (all roles). A batch
+is first reduced to one delta per summary row, so the writes are a few
+executemany upserts however many events it holds. Day buckets are kept for
+DAY_RETENTION days and week buckets for WEEK_RETENTION days; month buckets
+are kept forever.
+
+A t-digest can't forget a value, so when a learner's metric changes the new
+value is added and the old one lingers. Once a sketch holds more than
+REBUILD_RATIO values per learner it is rebuilt from progress_learners; that costs one pass over the role's learners after at
+least a quarter as many changes, so it stays constant per change.
+
+Streaks count consecutive UTC days with any activity. Events are applied in
+the order they happened within a batch, but an event dated before the
+learner's last active day doesn't mend an earlier gap.
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.tdigest import TDigest
+
+DAY = 86400
+GRAINS = ('day', 'week', 'month')
+DAY_RETENTION = 120
+WEEK_RETENTION = 2 * 365
+# Readiness: share of the role's milestones completed, and the average
+# self-grade scaled by how much of PRACTICE_TARGET answers it rests on
+COVERAGE_WEIGHT = 0.6
+PRACTICE_WEIGHT = 0.4
+PRACTICE_TARGET = 50
+EPOCH = date(1970, 1, 1)
+# Keys per lookup query
+CHUNK = 200
+
+# Counter columns shared by the rollup tables, in delta order
+COUNTERS = ('events', 'milestones', 'questions', 'grade_sum', 'grade_count', 'study_minutes')
+# progress_learners columns with a percentile sketch per role
+SKETCH_METRICS = ('readiness', 'milestones', 'questions', 'study_minutes')
+# Values a sketch may hold per learner before it is rebuilt
+REBUILD_RATIO = 1.25
+
+
+def day_number(timestamp: float) -> int:
+    """UTC day of a unix time, counted from 1970-01-01."""
+    return int(timestamp // DAY)
+
+
+def bucket_of(grain: str, day: int) -> int:
+    """Bucket holding `day`: the day itself, the day its ISO week starts, or the month index."""
+    if grain == 'day':
+        return day
+    if grain == 'week':
+        # 1970-01-01 was a Thursday; weeks start on Monday
+        return day - (day + 3) % 7
+    d = EPOCH + timedelta(days=day)
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+def bucket_start(grain: str, bucket: int) -> date:
+    """First day of a bucket."""
+    if grain == 'month':
+        return date(1970 + bucket // 12, bucket % 12 + 1, 1)
+    return EPOCH + timedelta(days=bucket)
+
+
+def readiness(milestones: int, role_milestones: int, grade_sum: float, grade_count: int) -> Optional[float]:
+    """Readiness score (0-100) for a role, or None when the role has no roadmap."""
+    if not role_milestones:
+        return None
+    coverage = min(1.0, milestones / role_milestones)
+    practice = (grade_sum / grade_count / 5) * min(1.0, grade_count / PRACTICE_TARGET) if grade_count else 0.0
+    return round(100 * (COVERAGE_WEIGHT * coverage + PRACTICE_WEIGHT * practice), 1)
+
+
+def _add(counters: List[float], delta) -> None:
+    for i, amount in enumerate(delta):
+        counters[i] += amount
+
+
+def _in_values(keys: List[Tuple], width: int) -> str:
+    row = '(' + ', '.join('?' * width) + ')'
+    return ', '.join([row] * len(keys))
+
+
+class ProgressRollups:
+    """Keeps the progress summary tables in step with the event table."""
+
+    def __init__(self, milestone_counts: Callable[[Iterable[int]], Dict[int, int]]):
+        # role IDs -> {role_id: number of roadmap milestones}, from the catalogue
+        self._milestone_counts = milestone_counts
+        self._pruned_day = None
+
+    def apply(self, cursor, rows: List[Tuple], last_id: int) -> None:
+        """
+        Fold a batch of just-inserted events, whose last ID is `last_id`, into
+        the summaries. Events stored earlier but never folded (written before
+        the summaries existed) are replayed from the table first.
+        """
+        cursor.execute("SELECT last_event_id FROM progress_rollup_state WHERE id = 1")
+        done = cursor.fetchone()[0]
+        first_id = last_id - len(rows)
+        while done < first_id:
+            cursor.execute('''
+                SELECT id, user_id, type, role_id, ref_id, value, occurred_at, received_at
+                FROM progress_events WHERE id > ? AND id <= ? ORDER BY id LIMIT 5000
+            ''', (done, first_id))
+            missed = cursor.fetchall()
+            if not missed:
+                break
+            self._fold(cursor, [tuple(row)[1:] for row in missed])
+            done = missed[-1][0]
+        self._fold(cursor, rows)
+        cursor.execute("UPDATE progress_rollup_state SET last_event_id = ? WHERE id = 1", (last_id,))
+
+        today = max((day_number(row[5]) for row in rows), default=None)
+        if today is not None and today != self._pruned_day:
+            self.prune(cursor, today)
+
+    def prune(self, cursor, today: int) -> None:
+        """Drop day and week buckets past their retention."""
+        for table in ('progress_rollups', 'progress_cohort_rollups'):
+            cursor.execute(f"DELETE FROM {table} WHERE grain = 'day' AND bucket < ?",
+                           (today - DAY_RETENTION,))
+            cursor.execute(f"DELETE FROM {table} WHERE grain = 'week' AND bucket < ?",
+                           (today - WEEK_RETENTION,))
+        self._pruned_day = today
+
+    # ============== FOLDING ==============
+
+    def _fold(self, cursor, rows: List[Tuple]) -> None:
+        """Apply (user_id, type, role_id, ref_id, value, occurred_at, received_at) rows."""
+        # Sum the batch per learner, role and day first, in the order the days happened
+        daily: Dict[Tuple, List[float]] = {}
+        for user_id, kind, role_id, ref_id, value, occurred_at, _ in sorted(rows, key=lambda row: row[5]):
+            if kind == 'milestone_completed':
+                milestone = 1
+                if ref_id is not None:
+                    # Completing the same milestone again doesn't count
+                    cursor.execute('''
+                        INSERT OR IGNORE INTO progress_milestones (user_id, milestone_id, role_id, completed_at)
+                        VALUES (?, ?, ?, ?)
+                    ''', (user_id, ref_id, role_id, occurred_at))
+                    milestone = cursor.rowcount
+                delta = (1, milestone, 0, 0.0, 0, 0.0)
+            elif kind == 'question_practised':
+                graded = value is not None
+                delta = (1, 0, 1, value if graded else 0.0, int(graded), 0.0)
+            else:
+                delta = (1, 0, 0, 0.0, 0, value or 0.0)
+
+            _add(daily.setdefault((user_id, role_id, day_number(occurred_at)), [0] * 6), delta)
+
+        buckets: Dict[Tuple, List[float]] = {}
+        learners: Dict[Tuple, List] = {}
+        for (user_id, role_id, day), delta in daily.items():
+            for role in (0, role_id) if role_id else (0,):
+                for grain in GRAINS:
+                    _add(buckets.setdefault((user_id, role, grain, bucket_of(grain, day)), [0] * 6), delta)
+                counters, days = learners.setdefault((user_id, role), ([0] * 6, []))
+                _add(counters, delta)
+                if not days or days[-1] != day:
+                    days.append(day)
+
+        cohorts = self._fold_buckets(cursor, buckets)
+        self._fold_learners(cursor, learners)
+        cursor.executemany(f'''
+            INSERT INTO progress_cohort_rollups (role_id, grain, bucket, learners, {', '.join(COUNTERS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (role_id, grain, bucket) DO UPDATE SET
+                learners = learners + excluded.learners,
+                {', '.join(f'{c} = {c} + excluded.{c}' for c in COUNTERS)}
+        ''', [(*key, *counters) for key, counters in cohorts.items()])
+
+    def _fold_buckets(self, cursor, buckets: Dict[Tuple, List[float]]) -> Dict[Tuple, List[float]]:
+        """Add the per-learner bucket deltas; returns the matching cohort deltas."""
+        keys = list(buckets)
+        existing = set()
+        for start in range(0, len(keys), CHUNK):
+            chunk = keys[start:start + CHUNK]
+            # A join on the keys is a primary-key search each; a row-value IN scans the table
+            cursor.execute(f'''
+                WITH keys (user_id, role_id, grain, bucket) AS (VALUES {_in_values(chunk, 4)})
+                SELECT user_id, role_id, grain, bucket FROM keys
+                JOIN progress_rollups USING (user_id, role_id, grain, bucket)
+            ''', [part for key in chunk for part in key])
+            existing.update(tuple(row) for row in cursor.fetchall())
+        cursor.executemany(f'''
+            INSERT INTO progress_rollups (user_id, role_id, grain, bucket, {', '.join(COUNTERS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, role_id, grain, bucket) DO UPDATE SET
+                {', '.join(f'{c} = {c} + excluded.{c}' for c in COUNTERS)}
+        ''', [(*key, *counters) for key, counters in buckets.items()])
+
+        cohorts: Dict[Tuple, List[float]] = {}
+        for key, counters in buckets.items():
+            # [learners, *counters]; a learner's first event in a bucket makes them active in it
+            cohort = cohorts.setdefault(key[1:], [0] * 7)
+            cohort[0] += key not in existing
+            for i, amount in enumerate(counters):
+                cohort[i + 1] += amount
+        return cohorts
+
+    def _fold_learners(self, cursor, learners: Dict[Tuple, Tuple[List[float], List[int]]]) -> None:
+        keys = list(learners)
+        current = {}
+        for start in range(0, len(keys), CHUNK):
+            chunk = keys[start:start + CHUNK]
+            cursor.execute(f'''
+                WITH keys (user_id, role_id) AS (VALUES {_in_values(chunk, 2)})
+                SELECT progress_learners.* FROM keys JOIN progress_learners USING (user_id, role_id)
+            ''', [part for key in chunk for part in key])
+            current.update(((row['user_id'], row['role_id']), dict(row)) for row in cursor.fetchall())
+        role_milestones = self._milestone_counts({role for _, role in keys if role})
+
+        rows, cohorts, sketches = [], {}, {}
+        for key, (counters, days) in learners.items():
+            old = current.get(key)
+            learner = old.copy() if old else {
+                "milestones": 0, "questions": 0, "grade_sum": 0.0, "grade_count": 0, "study_minutes": 0.0,
+                "first_day": None, "last_day": None, "streak": 0, "best_streak": 0, "readiness": None,
+            }
+            _, milestones, questions, grade_sum, grade_count, minutes = counters
+            learner["milestones"] += milestones
+            learner["questions"] += questions
+            learner["grade_sum"] += grade_sum
+            learner["grade_count"] += grade_count
+            learner["study_minutes"] += minutes
+            for day in days:
+                last = learner["last_day"]
+                if last is not None and day <= last:
+                    continue
+                learner["streak"] = learner["streak"] + 1 if last == day - 1 else 1
+                learner["best_streak"] = max(learner["best_streak"], learner["streak"])
+                learner["last_day"] = day
+            learner["first_day"] = min(d for d in (learner["first_day"], days[0]) if d is not None)
+            role = key[1]
+            if role:
+                learner["readiness"] = readiness(learner["milestones"], role_milestones.get(role, 0),
+                                                 learner["grade_sum"], learner["grade_count"])
+            rows.append((*key, learner["milestones"], learner["questions"], learner["grade_sum"],
+                         learner["grade_count"], learner["study_minutes"], learner["first_day"],
+                         learner["last_day"], learner["streak"], learner["best_streak"], learner["readiness"]))
+
+            cohort = cohorts.setdefault(role, [0, 0.0])
+            cohort[0] += old is None
+            cohort[1] += (learner["readiness"] or 0.0) - ((old or {}).get("readiness") or 0.0)
+            for metric in SKETCH_METRICS:
+                value, before = learner[metric], (old or {}).get(metric)
+                if value is not None and value != before:
+                    # [values added, learners with a value added]
+                    sketch = sketches.setdefault((role, metric), (TDigest(), [0]))
+                    sketch[0].add(value)
+                    sketch[1][0] += before is None
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO progress_learners
+                (user_id, role_id, milestones, questions, grade_sum, grade_count, study_minutes,
+                 first_day, last_day, streak, best_streak, readiness)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.executemany('''
+            INSERT INTO progress_cohorts (role_id, learners, readiness_sum) VALUES (?, ?, ?)
+            ON CONFLICT (role_id) DO UPDATE SET
+                learners = learners + excluded.learners,
+                readiness_sum = readiness_sum + excluded.readiness_sum
+        ''', [(role, learners_added, readiness_added) for role, (learners_added, readiness_added) in cohorts.items()])
+        self._fold_sketches(cursor, sketches)
+
+    def _fold_sketches(self, cursor, sketches: Dict[Tuple, Tuple[TDigest, List[int]]]) -> None:
+        """Merge the batch's new metric values into the stored sketches (after progress_learners is written)."""
+        rows = []
+        for (role, metric), (added, (new_learners,)) in sketches.items():
+            cursor.execute("SELECT learners, digest FROM progress_sketches WHERE role_id = ? AND metric = ?",
+                           (role, metric))
+            row = cursor.fetchone()
+            if row is not None:
+                learners = row['learners'] + new_learners
+                digest = TDigest.from_bytes(row['digest'])
+                digest.merge(added)
+            if row is None or digest.total > REBUILD_RATIO * learners:
+                # Also the first sketch of summaries that predate sketches
+                cursor.execute(f"SELECT {metric} FROM progress_learners WHERE role_id = ? AND {metric} IS NOT NULL",
+                               (role,))
+                digest = TDigest()
+                digest.update(value for (value,) in cursor.fetchall())
+                learners = int(digest.total)
+            rows.append((role, metric, learners, digest.to_bytes()))
+        cursor.executemany('''
+            INSERT INTO progress_sketches (role_id, metric, learners, digest) VALUES (?, ?, ?, ?)
+            ON CONFLICT (role_id, metric) DO UPDATE SET
+                learners = excluded.learners, digest = excluded.digest, version = version + 1
+        ''', rows)
@@ -0,0 +1,196 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+
+from repository.progress_repo import ProgressRepository
+from services.progress_rollups import ProgressRollups
+from services.ring_buffer import RingBuffer
+
+EVENT_TYPES = ('milestone_completed', 'question_practised', 'study_time')
+OVERFLOW_POLICIES = ('reject', 'drop-oldest')
+BUFFER_CAPACITY = 65536
+FLUSH_INTERVAL = 0.2
+# Events per transaction; a buffer holding this many wakes the flusher early
+BATCH_SIZE = 5000
+# Events may be reported late (offline clients) but not from the future
+MAX_CLOCK_SKEW = 300
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ProgressService:
+    """
+    Service layer for learners' progress events (milestones completed,
+    questions practised, study time). Requests only validate events and put
+    them in a bounded in-memory ring buffer; a background thread writes the
+    buffer to the progress database every FLUSH_INTERVAL, or as soon as a
+    full batch is waiting, with one executemany transaction per BATCH_SIZE
+    events.
+
+    When the buffer is full, `overflow` decides: "reject" refuses the whole
+    request, so the client backs off and retries, while "drop-oldest" makes
+    room by discarding the oldest buffered events. A batch that fails to
+    write stays at the front of the queue and is retried on the next round.
+    Events still buffered are lost if the process dies; close() flushes them
+    on a clean shutdown.
+
+    With `rollups`, every batch is also folded into the insight summary
+    tables in the same transaction.
+
+    The flusher starts with the first event in each process, so a preloading
+    master never forks with it running.
+    """
+    def __init__(self, repository: ProgressRepository, capacity=BUFFER_CAPACITY,
+                 flush_interval=FLUSH_INTERVAL, overflow='reject', rollups: ProgressRollups = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self._repository = repository
+        self._rollups = rollups
+        self._buffer = RingBuffer(capacity)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._pending = []
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._stats = {"accepted": 0, "rejected": 0, "dropped": 0, "flushed": 0, "batches": 0,
+                       "flush_errors": 0, "last_flush_ms": 0.0, "max_flush_ms": 0.0}
+        self._last_error = None
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+
+    # ============== EVENTS ==============
+
+    @staticmethod
+    def parse_event(user_id, event, now):
+        """
+        Validates one event and returns it as a row for the progress database.
+
+        Args:
+            user_id (str): The learner (validated by the caller).
+            event (dict): {"type", "role_id", "ref_id", "value", "occurred_at"};
+                type is one of EVENT_TYPES, ref_id the milestone, question or
+                study topic, value the minutes studied (required for
+                study_time) or the self-grade 0-5 of a practised question, and
+                occurred_at a unix time (default: now).
+            now (float): Unix time the event was received.
+
+        Returns:
+            tuple: (user_id, type, role_id, ref_id, value, occurred_at, received_at).
+
+        Raises:
+            ValueError: If a field is missing or invalid.
+        """
+        kind = event.get('type')
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"type must be one of {', '.join(EVENT_TYPES)}")
+        for field in ('role_id', 'ref_id'):
+            value = event.get(field)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+                raise ValueError(f"{field} must be an integer")
+        value = event.get('value')
+        if value is not None and not _number(value):
+            raise ValueError("value must be a number")
+        if kind == 'study_time' and (value is None or value <= 0):
+            raise ValueError("study_time needs a positive value (minutes)")
+        if kind == 'question_practised' and value is not None and not 0 <= value <= 5:
+            raise ValueError("question_practised value is a grade from 0 to 5")
+        occurred_at = event.get('occurred_at', now)
+        if not _number(occurred_at) or not 0 <= occurred_at <= now + MAX_CLOCK_SKEW:
+            raise ValueError("occurred_at must be a unix time, not in the future")
+        return (user_id, kind, event.get('role_id'), event.get('ref_id'), value, occurred_at, now)
+
+    def record(self, rows):
+        """
+        Buffers parsed events for the flusher.
+
+        Returns:
+            bool: False if the buffer is full and the overflow policy is
+                "reject" (nothing was buffered), else True.
+        """
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            self._start()
+        lost = self._buffer.put_many(rows, overwrite=self.overflow == 'drop-oldest')
+        if self.overflow == 'reject' and lost:
+            self._count(rejected=lost)
+            return False
+        self._count(accepted=len(rows), dropped=lost)
+        return True
+
+    # ============== FLUSHING ==============
+
+    def _start(self):
+        with self._flush_lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="naviq-progress-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._buffer.wait(BATCH_SIZE, self.flush_interval)
+            if not self.flush():
+                # Don't hammer a database that is failing
+                self._stop.wait(self.flush_interval)
+
+    def flush(self):
+        """Write everything buffered so far; returns False if a batch failed (it is kept for retry)."""
+        with self._flush_lock:
+            while True:
+                batch = self._pending or self._buffer.drain(BATCH_SIZE)
+                if not batch:
+                    return True
+                started = time.perf_counter()
+                try:
+                    self._repository.add_events(batch, self._rollups.apply if self._rollups else None)
+                except Exception as e:
+                    self._pending = batch
+                    self._last_error = f"{type(e).__name__}: {e}"
+                    self._count(flush_errors=1)
+                    return False
+                self._pending = []
+                elapsed = (time.perf_counter() - started) * 1000
+                with self._stats_lock:
+                    self._stats["flushed"] += len(batch)
+                    self._stats["batches"] += 1
+                    self._stats["last_flush_ms"] = round(elapsed, 3)
+                    self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed), 3)
+
+    def close(self):
+        """Stop the flusher and write what is left."""
+        self._stop.set()
+        self._buffer.wake()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def metrics(self):
+        """Ingestion counters and buffer state of this process."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "buffered": len(self._buffer) + len(self._pending),
+            "capacity": self._buffer.capacity,
+            "high_water": self._buffer.high_water,
+            "overflow": self.overflow,
+            "synchronous": self._repository.synchronous,
+            "flush_interval_ms": round(self.flush_interval * 1000),
+            "flusher_running": self._thread is not None and self._thread.is_alive() and self._pid == os.getpid(),
+            "last_error": self._last_error,
+        })
+        return stats
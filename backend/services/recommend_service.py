@@ -0,0 +1,165 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+from repository.db_repo import DatabaseRepository
+from services.sync_service import ReaderLease
+from services.role_vectors import RoleVectors
+
+MAX_SIMILAR = 20
+# Milestone cosine at which two milestones count as covering the same ground
+SHARED_THRESHOLD = 0.3
+# Rebuild (fresh idf and columns) once this share of the roles was updated
+REBUILD_FRACTION = 0.2
+REBUILD_MIN_UPDATES = 20
+
+
+class RecommendService:
+    """
+    Service layer for role recommendations: which roles are closest to a
+    given one, and which milestones of a target role a learner has already
+    covered on their current role's roadmap.
+
+    Both are read from a precomputed RoleVectors structure. Writes are picked
+    up from change_log: only the roles whose row, or one of whose milestones,
+    was logged since the last applied seq are re-read and re-scored (all of
+    them, if the log has been pruned past that seq; the `lease` keeps it
+    from being pruned that far).
+    """
+    def __init__(self, repository: DatabaseRepository, lease: ReaderLease = None):
+        self._repository = repository
+        self._lease = lease
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._milestone_roles = {}
+        self._seq = 0
+        self._version = None
+
+    def _build(self):
+        seq = self._repository.get_last_change()
+        roles = self._repository.get_role_features()
+        vectors = RoleVectors()
+        vectors.build(roles)
+        self._milestone_roles = {milestone['id']: role['id'] for role in roles for milestone in role['milestones']}
+        return vectors, seq
+
+    def refresh(self):
+        """Build on first use, then re-score the roles touched by logged writes."""
+        version = self._repository.get_data_version()
+        if self._vectors is not None and version == self._version:
+            return
+        with self._lock:
+            version = self._repository.get_data_version()
+            if self._vectors is None:
+                self._vectors, self._seq = self._build()
+            elif version != self._version:
+                self._apply_changes()
+                vectors = self._vectors
+                if vectors.updated >= max(REBUILD_MIN_UPDATES, REBUILD_FRACTION * len(vectors)):
+                    self._vectors, self._seq = self._build()
+            self._version = version
+            if self._lease is not None:
+                self._lease.hold(self._seq)
+
+    def _apply_changes(self):
+        while True:
+            changes = self._repository.get_changes(self._seq)
+            if changes is None:
+                # The log was pruned past our seq
+                self._vectors, self._seq = self._build()
+                return
+            if not changes:
+                return
+            touched, milestone_ids = set(), set()
+            for change in changes:
+                if change['table_name'] == 'roles':
+                    touched.add(change['row_id'])
+                elif change['table_name'] == 'milestones':
+                    milestone_ids.add(change['row_id'])
+            # A milestone may have moved roadmaps: its old and its new role both change
+            touched.update(self._milestone_roles[m] for m in milestone_ids if m in self._milestone_roles)
+            touched.update(self._repository.get_milestone_role_ids(milestone_ids).values())
+
+            roles = self._repository.get_role_features(touched)
+            for role_id in touched - {role['id'] for role in roles}:
+                self._vectors.remove(role_id)
+            self._vectors.update(roles)
+            self._milestone_roles = {m: r for m, r in self._milestone_roles.items() if r not in touched}
+            self._milestone_roles.update(
+                (milestone['id'], role['id']) for role in roles for milestone in role['milestones'])
+            self._seq = changes[-1]['seq']
+
+    def _shared(self, role_id, other_id):
+        return self._vectors.shared_milestones(role_id, other_id, SHARED_THRESHOLD)
+
+    def similar_roles(self, role_id, limit=5):
+        """
+        Finds the roles whose content is closest to a role's.
+
+        Args:
+            role_id (int): The role to compare against.
+            limit (int): Number of roles to return (at most MAX_SIMILAR).
+
+        Returns:
+            dict: {"role", "similar"}, with similar roles as {"id", "name",
+                "similarity", "shared_milestones"}, or None if the role doesn't exist.
+        """
+        self.refresh()
+        limit = min(max(limit, 1), MAX_SIMILAR)
+        with self._lock:
+            vectors = self._vectors
+            if role_id not in vectors:
+                return None
+            similar = [
+                {
+                    "id": other_id,
+                    "name": vectors.name(other_id),
+                    "similarity": round(score, 4),
+                    "shared_milestones": len(self._shared(role_id, other_id)),
+                }
+                for other_id, score in vectors.similar(role_id, limit)
+            ]
+            return {"role": {"id": role_id, "name": vectors.name(role_id)}, "similar": similar}
+
+    def shared_milestones(self, role_id, target_id):
+        """
+        Compares the roadmap of a role with the roadmap of a target role.
+
+        Args:
+            role_id (int): The learner's current role.
+            target_id (int): The role they want to move to.
+
+        Returns:
+            dict: {"role", "target", "similarity", "shared", "next"}: matched
+                milestone pairs with their similarity, and the target's
+                milestones not covered yet, in roadmap order. None if either
+                role doesn't exist.
+        """
+        self.refresh()
+        with self._lock:
+            vectors = self._vectors
+            if role_id not in vectors or target_id not in vectors:
+                return None
+            titles = vectors.milestone_titles(role_id)
+            target_titles = vectors.milestone_titles(target_id)
+            matches = self._shared(role_id, target_id)
+            covered = {target_milestone for _, target_milestone, _ in matches}
+            return {
+                "role": {"id": role_id, "name": vectors.name(role_id)},
+                "target": {"id": target_id, "name": vectors.name(target_id)},
+                "similarity": round(vectors.similarity(role_id, target_id), 4),
+                "shared": [
+                    {
+                        "milestone": {"id": milestone, "title": titles[milestone]},
+                        "target_milestone": {"id": target_milestone, "title": target_titles[target_milestone]},
+                        "similarity": round(score, 4),
+                    }
+                    for milestone, target_milestone, score in matches
+                ],
+                "next": [{"id": milestone, "title": title} for milestone, title in target_titles.items()
+                         if milestone not in covered],
+            }
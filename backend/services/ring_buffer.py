@@ -0,0 +1,90 @@
+"""
+Bounded ring buffer for NAVIQ event ingestion
+A fixed array of slots shared by request threads (producers) and one flusher
+thread (consumer). When it is full, a batch is either refused as a whole,
+so the client can retry later, or written over the oldest items.
+"""
+
+import threading
+from typing import List, Sequence
+
+
+class RingBuffer:
+    """Thread-safe FIFO of at most `capacity` items."""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._head = 0      # index of the oldest item
+        self._size = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._woken = False
+        self.high_water = 0
+
+    def __len__(self):
+        return self._size
+
+    def put_many(self, items: Sequence, overwrite: bool = False) -> int:
+        """
+        Append `items` in order and return how many items were lost. Without
+        `overwrite` a batch that doesn't fit is refused whole (all of it is
+        lost); with it, the oldest items make room (only the newest
+        `capacity` of an oversized batch are kept).
+        """
+        n = len(items)
+        with self._lock:
+            free = self.capacity - self._size
+            dropped = 0
+            if n > free:
+                if not overwrite:
+                    return n
+                dropped = n - free
+                if n > self.capacity:
+                    items = items[n - self.capacity:]
+                    n = self.capacity
+                # Advance past the oldest items that get overwritten
+                skip = min(dropped, self._size)
+                for i in range(skip):
+                    self._slots[(self._head + i) % self.capacity] = None
+                self._head = (self._head + skip) % self.capacity
+                self._size -= skip
+            tail = (self._head + self._size) % self.capacity
+            first = min(n, self.capacity - tail)
+            self._slots[tail:tail + first] = items[:first]
+            self._slots[:n - first] = items[first:]
+            self._size += n
+            self.high_water = max(self.high_water, self._size)
+            self._ready.notify()
+            return dropped
+
+    def drain(self, limit: int = None) -> List:
+        """Remove and return up to `limit` of the oldest items (all by default)."""
+        with self._lock:
+            n = self._size if limit is None else min(limit, self._size)
+            end = self._head + n
+            if end <= self.capacity:
+                items = self._slots[self._head:end]
+                self._slots[self._head:end] = [None] * n
+            else:
+                items = self._slots[self._head:] + self._slots[:end - self.capacity]
+                self._slots[self._head:] = [None] * (self.capacity - self._head)
+                self._slots[:end - self.capacity] = [None] * (end - self.capacity)
+            self._head = end % self.capacity
+            self._size -= n
+            return items
+
+    def wait(self, count: int, timeout: float) -> int:
+        """Block until at least `count` items are buffered or `timeout` passes; returns the size."""
+        with self._lock:
+            self._ready.wait_for(lambda: self._woken or self._size >= count, timeout)
+            self._woken = False
+            return self._size
+
+    def wake(self) -> None:
+        """Release a thread blocked in wait()."""
+        with self._lock:
+            self._woken = True
+            self._ready.notify_all()
@@ -1,18 +1,184 @@
-from backend.repository.file_repo import FileRepository
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from collections import OrderedDict
+
+from repository.base import CatalogueRepository
+from services.scheduler import milestone_weights, schedule_days, schedule_days_many, schedule_weeks
+from services.single_flight import SingleFlight
+
 
 class RoadmapService:
     """
     Service layer for handling roadmap generation logic.
     It uses a repository to fetch data, keeping the service
     independent of the data storage implementation.
+
+    Both the day view (get_roadmap) and the week view (generate_roadmap) come
+    from the weighted scheduler. Built responses are memoized per
+    (goal, data version, days) and must be treated as read-only. Concurrent
+    misses for the same response (a cold cache after a deploy or an edit)
+    are coalesced: one request builds it and the others wait for it.
     """
-    def __init__(self, repository: FileRepository):
+    def __init__(self, repository: CatalogueRepository, cache_size=256):
         self._repository = repository
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._version = None
+        self._flight = SingleFlight()
+        self._hits = 0
+        self._misses = 0
+
+    def _memoized(self, kind, goal, days, build):
+        version = self._repository.get_data_version()
+        key = (kind, goal, days)
+        with self._lock:
+            if version != self._version:
+                # Entries built from older data can never be hit again
+                self._cache.clear()
+                self._version = version
+            if key in self._cache:
+                self._hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self._misses += 1
+
+        return self._flight.do((version,) + key, lambda: self._build_and_store(version, key, build))
+
+    def _build_and_store(self, version, key, build):
+        result = build()
+        with self._lock:
+            if version != self._version:
+                return result
+            self._cache[key] = result
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def metrics(self):
+        """Cache hits and misses, and how many misses waited for another request's build."""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "cached": len(self._cache),
+                    "builds": self._flight.stats["calls"], "coalesced": self._flight.stats["coalesced"],
+                    "build_errors": self._flight.stats["errors"], "building": len(self._flight)}
+
+    def get_roadmap(self, goal, days):
+        """
+        Builds the /api/roadmap response: the goal's milestones spread over `days`.
+
+        Returns:
+            dict: The roadmap, or None if the goal has no roadmap.
+        """
+        return self._memoized('days', goal, days, lambda: self._build_day_roadmap(goal, days))
+
+    def _build_day_roadmap(self, goal, days):
+        roadmap = self._repository.get_roadmap_for_role(goal)
+        if not roadmap:
+            return None
+
+        milestones = roadmap.get('milestones', [])
+        return {
+            "goal": goal,
+            "days": days,
+            "overview": roadmap.get('overview', ''),
+            "milestones": self.distribute_milestone_days(milestones, days) if milestones else [],
+        }
+
+    def list_goals(self):
+        """List roles that have a roadmap, with the roadmap overview."""
+        goals = []
+        for role in self._repository.get_all_roles():
+            roadmap = self._repository.get_roadmap_for_role(role['name'])
+            if roadmap:
+                goals.append({
+                    "name": role['name'],
+                    "icon": role['icon'],
+                    "color": role['color'],
+                    "overview": roadmap.get('overview', '')
+                })
+        return goals
+
+    @staticmethod
+    def distribute_milestone_days(milestones, days):
+        """Split `days` across milestones by duration_days and format them for the frontend."""
+        spans = schedule_days(milestone_weights(milestones), days)
+        return RoadmapService._place_milestones(
+            [RoadmapService._format_milestone(m) for m in milestones], spans)
+
+    @staticmethod
+    def _format_milestone(milestone):
+        return {
+            "title": milestone['title'],
+            "details": milestone['details'],
+            "outcomes": milestone.get('outcomes', []),
+            "resources": milestone.get('resources', []),
+        }
+
+    @staticmethod
+    def _place_milestones(formatted, spans):
+        placed = []
+        for milestone, (start_day, end_day) in zip(formatted, spans):
+            placed.append(dict(
+                milestone,
+                startDay=start_day,
+                endDay=end_day,
+                duration=f"Days {start_day}-{end_day}",
+            ))
+        return placed
+
+    def plan_batch(self, requests):
+        """
+        Plans many roadmaps at once, yielding one /api/roadmap response per request.
+
+        Requests are grouped by goal so each roadmap is loaded once, and all the
+        day counts asked for a goal are scheduled in one schedule_days_many()
+        call. Results are yielded goal by goal, not in request order; each one
+        carries the "index" of its request.
+
+        Args:
+            requests: An iterable of (goal, days) pairs.
+
+        Yields:
+            dict: The roadmap, or {"index", "goal", "error"} for unknown goals.
+        """
+        by_goal = OrderedDict()
+        for index, (goal, days) in enumerate(requests):
+            by_goal.setdefault(goal, []).append((index, days))
+
+        for goal, items in by_goal.items():
+            roadmap = self._repository.get_roadmap_for_role(goal) if goal else None
+            if not roadmap:
+                error = "Roadmap not found for this goal" if goal else "Goal is required"
+                for index, _ in items:
+                    yield {"index": index, "goal": goal, "error": error}
+                continue
+
+            milestones = roadmap.get('milestones', [])
+            overview = roadmap.get('overview', '')
+            formatted = [self._format_milestone(m) for m in milestones]
+            unique_days = list(dict.fromkeys(days for _, days in items))
+            spans = dict(zip(unique_days, schedule_days_many(milestone_weights(milestones), unique_days)))
+
+            for index, days in items:
+                yield {
+                    "index": index,
+                    "goal": goal,
+                    "days": days,
+                    "overview": overview,
+                    "milestones": self._place_milestones(formatted, spans[days]) if milestones else [],
+                }
 
     def generate_roadmap(self, goal, days):
         """Generate a structured roadmap response for the given goal and duration."""
-        all_topics = self._repository.get_roadmap_topics()
-        goal_data = all_topics.get(goal)
+        return self._memoized('weeks', goal, days, lambda: self._build_week_roadmap(goal, days))
+
+    def _build_week_roadmap(self, goal, days):
+        goal_data = self._repository.get_roadmap_for_role(goal)
 
         if not goal_data:
             return None
@@ -21,30 +187,19 @@ class RoadmapService:
         if not milestones:
             return None
 
-        num_weeks = max(1, min(days // 7, len(milestones)))
-        weeks = self._build_weeks(milestones, num_weeks)
-
         return {
             "goal": goal,
             "duration": days,
             "overview": goal_data.get("overview", ""),
             "resources": goal_data.get("resources", []),
-            "weeks": weeks,
+            "weeks": self._build_weeks(milestones, days),
         }
 
-    def _build_weeks(self, milestones, num_weeks):
-        """Split milestones into evenly distributed weekly chunks."""
+    def _build_weeks(self, milestones, days):
+        """Group milestones into the weeks they are scheduled in."""
         weeks = []
-        total_items = len(milestones)
-        base = total_items // num_weeks
-        remainder = total_items % num_weeks
-
-        cursor = 0
-        for week_index in range(1, num_weeks + 1):
-            take = base + (1 if week_index <= remainder else 0)
-            slice_items = milestones[cursor:cursor + take]
-            cursor += take
-
+        for week_index, indexes in enumerate(schedule_weeks(milestone_weights(milestones), days), start=1):
+            slice_items = [milestones[i] for i in indexes]
             titles = ", ".join(item.get("title", "") for item in slice_items if item.get("title"))
             weeks.append(
                 {
@@ -53,12 +208,4 @@ class RoadmapService:
                     "focus": slice_items,
                 }
             )
-
-        if cursor < total_items:
-            weeks[-1]["focus"].extend(milestones[cursor:])
-            extra_titles = ", ".join(item.get("title", "") for item in milestones[cursor:])
-            weeks[-1]["summary"] = (
-                weeks[-1]["summary"] + ", " + extra_titles if extra_titles else weeks[-1]["summary"]
-            )
-
         return weeks
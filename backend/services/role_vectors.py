@@ -0,0 +1,276 @@
+"""
+Role similarity for NAVIQ recommendations
+Every role becomes a TF-IDF vector (sublinear tf, smoothed idf, unit length)
+over its name, description and its milestones' titles, details and outcomes;
+every milestone gets a vector over its own text. The role-to-role cosine
+matrix comes from one matrix product at build time, and a changed role only
+recomputes its own row and column.
+
+Updated roles reuse the build's idf (terms new since then get the highest
+idf) and append columns for new terms, so scores drift slightly from a fresh
+build; the owner should rebuild after many updates. Without NumPy role
+vectors are dicts with column postings and products plain loops, which is
+fine for catalogues of a few hundred roles.
+"""
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; vectors are kept as dicts instead
+    np = None
+
+from services.guide_index import tokenize
+
+# Title words count this many times towards the term frequency
+TITLE_WEIGHT = 2
+
+
+def milestone_terms(milestone: Dict) -> Counter:
+    """Term counts of one milestone: title, details and outcomes."""
+    counts = Counter(tokenize(milestone.get('details')))
+    for outcome in milestone.get('outcomes', ()):
+        counts.update(tokenize(outcome))
+    for token in tokenize(milestone.get('title')):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def role_terms(role: Dict) -> Counter:
+    """Term counts of a role: name, description and all of its milestones."""
+    counts = Counter(tokenize(role.get('description')))
+    for token in tokenize(role.get('name')):
+        counts[token] += TITLE_WEIGHT
+    for milestone in role.get('milestones', ()):
+        counts.update(milestone_terms(milestone))
+    return counts
+
+
+def _dot(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(column, 0.0) for column, weight in a.items())
+
+
+class RoleVectors:
+    """Role and milestone vectors with a precomputed role-to-role cosine matrix."""
+
+    def __init__(self):
+        self._idf: Dict[str, float] = {}
+        self._default_idf = 1.0
+        self._columns: Dict[str, int] = {}
+        # Row per role ever seen since the build; removed roles keep a dead row
+        self._role_ids: List[Optional[int]] = []
+        self._rows: Dict[int, int] = {}
+        self._names: Dict[int, str] = {}
+        # NumPy: float32 (rows x column capacity) and (rows x rows) arrays.
+        # Otherwise: a {column: weight} dict per row, column postings
+        # {column: {row: weight}} and the matrix as a list of lists.
+        self._vectors = None
+        self._postings: Dict[int, Dict[int, float]] = {}
+        self._matrix = None
+        # role_id -> (milestone IDs, titles, vectors). With NumPy the vectors
+        # are (sorted columns used by the role, k x len(columns) float32);
+        # otherwise a {column: weight} dict per milestone.
+        self._milestones: Dict[int, Tuple[List[int], List[str], object]] = {}
+        self.updated = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, role_id):
+        return role_id in self._rows
+
+    def name(self, role_id: int) -> Optional[str]:
+        return self._names.get(role_id)
+
+    # ============== VECTORS ==============
+
+    def _vector(self, counts: Counter) -> Dict[int, float]:
+        """Unit TF-IDF vector of term counts as {column: weight}; new terms get a column."""
+        weights = {term: (1 + math.log(tf)) * self._idf.get(term, self._default_idf)
+                   for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vector = {}
+        for term, weight in weights.items():
+            column = self._columns.setdefault(term, len(self._columns))
+            vector[column] = weight / norm
+        return vector
+
+    def _milestone_vectors(self, role: Dict):
+        milestones = role.get('milestones', ())
+        vectors = [self._vector(milestone_terms(milestone)) for milestone in milestones]
+        if np is not None:
+            columns = np.array(sorted(set().union(*vectors)), dtype=np.int64)
+            dense = np.zeros((len(vectors), len(columns)), dtype=np.float32)
+            for i, vector in enumerate(vectors):
+                if vector:
+                    dense[i, np.searchsorted(columns, list(vector))] = list(vector.values())
+            vectors = (columns, dense)
+        return ([milestone['id'] for milestone in milestones],
+                [milestone['title'] for milestone in milestones], vectors)
+
+    def _scores(self, vector: Dict[int, float]) -> List[float]:
+        """Dot products of a (dict) vector with every row, without NumPy."""
+        scores = [0.0] * len(self._role_ids)
+        for column, weight in vector.items():
+            for row, other in self._postings.get(column, {}).items():
+                scores[row] += weight * other
+        return scores
+
+    def _fill(self, row: int, vector: Dict[int, float]) -> None:
+        """Write a dict vector into its row of the NumPy matrix, growing the columns if needed."""
+        width = self._vectors.shape[1]
+        if len(self._columns) > width:
+            grown = np.zeros((self._vectors.shape[0], max(len(self._columns), 2 * width)), dtype=np.float32)
+            grown[:, :width] = self._vectors
+            self._vectors = grown
+        self._vectors[row] = 0
+        if vector:
+            self._vectors[row, list(vector)] = list(vector.values())
+
+    def build(self, roles: List[Dict]) -> None:
+        """Rebuild vocabulary, idf, vectors and the similarity matrix from role features."""
+        counts = [role_terms(role) for role in roles]
+        df = Counter(term for role_counts in counts for term in role_counts)
+        n = len(roles)
+        self._idf = {term: math.log((1 + n) / (1 + freq)) + 1 for term, freq in df.items()}
+        self._default_idf = math.log(1 + n) + 1
+        self._columns = {term: i for i, term in enumerate(sorted(df))}
+        self._role_ids = [role['id'] for role in roles]
+        self._rows = {role['id']: row for row, role in enumerate(roles)}
+        self._names = {role['id']: role['name'] for role in roles}
+        self._milestones = {role['id']: self._milestone_vectors(role) for role in roles}
+        vectors = [self._vector(role_counts) for role_counts in counts]
+        if np is not None:
+            self._vectors = np.zeros((n, len(self._columns)), dtype=np.float32)
+            for row, vector in enumerate(vectors):
+                self._fill(row, vector)
+            self._matrix = self._vectors @ self._vectors.T
+        else:
+            self._vectors = vectors
+            self._postings = {}
+            for row, vector in enumerate(vectors):
+                for column, weight in vector.items():
+                    self._postings.setdefault(column, {})[row] = weight
+            self._matrix = [self._scores(vector) for vector in vectors]
+        self.updated = 0
+
+    def _set_row(self, row: int, vector: Dict[int, float]) -> None:
+        """Store a row's vector and refresh its row and column of the matrix."""
+        if np is not None:
+            self._fill(row, vector)
+            scores = self._vectors @ self._vectors[row]
+            self._matrix[row, :] = scores
+            self._matrix[:, row] = scores
+            return
+        for column in self._vectors[row]:
+            self._postings[column].pop(row, None)
+        self._vectors[row] = vector
+        for column, weight in vector.items():
+            self._postings.setdefault(column, {})[row] = weight
+        scores = self._scores(vector)
+        self._matrix[row] = scores
+        for other, score in enumerate(scores):
+            self._matrix[other][row] = score
+
+    def _add_row(self, role_id: int) -> int:
+        row = len(self._role_ids)
+        self._role_ids.append(role_id)
+        self._rows[role_id] = row
+        if np is not None:
+            self._vectors = np.vstack([self._vectors, np.zeros((1, self._vectors.shape[1]), dtype=np.float32)])
+            matrix = np.zeros((row + 1, row + 1), dtype=np.float32)
+            matrix[:row, :row] = self._matrix
+            self._matrix = matrix
+        else:
+            self._vectors.append({})
+            for scores in self._matrix:
+                scores.append(0.0)
+            self._matrix.append([0.0] * (row + 1))
+        return row
+
+    def update(self, roles: Iterable[Dict]) -> None:
+        """Add or replace roles from their features."""
+        for role in roles:
+            row = self._rows.get(role['id'])
+            if row is None:
+                row = self._add_row(role['id'])
+            self._names[role['id']] = role['name']
+            self._milestones[role['id']] = self._milestone_vectors(role)
+            self._set_row(row, self._vector(role_terms(role)))
+            self.updated += 1
+
+    def remove(self, role_id: int) -> None:
+        row = self._rows.pop(role_id, None)
+        if row is None:
+            return
+        self._role_ids[row] = None
+        self._names.pop(role_id, None)
+        self._milestones.pop(role_id, None)
+        self._set_row(row, {})
+        self.updated += 1
+
+    # ============== LOOKUPS ==============
+
+    def similarity(self, role_id: int, other_id: int) -> float:
+        row, other = self._rows[role_id], self._rows[other_id]
+        return float(self._matrix[row, other] if np is not None else self._matrix[row][other])
+
+    def similar(self, role_id: int, limit: int = 5) -> List[Tuple[int, float]]:
+        """(role_id, cosine) of the most similar other roles, best first."""
+        row = self._rows.get(role_id)
+        if row is None:
+            return []
+        scores = self._matrix[row]
+        if np is not None:
+            order = np.argsort(-scores, kind='stable')[:limit + 1].tolist()
+        else:
+            order = sorted(range(len(scores)), key=lambda other: -scores[other])[:limit + 1]
+        return [(self._role_ids[other], float(scores[other])) for other in order
+                if other != row and self._role_ids[other] is not None and scores[other] > 0][:limit]
+
+    def shared_milestones(self, role_id: int, other_id: int, threshold: float) -> List[Tuple[int, int, float]]:
+        """
+        Pairs (milestone of role_id, milestone of other_id, cosine) at or above
+        `threshold`, each milestone used at most once, best pairs first.
+        """
+        if role_id not in self._milestones or other_id not in self._milestones:
+            return []
+        ids, _, vectors = self._milestones[role_id]
+        other_ids, _, other_vectors = self._milestones[other_id]
+        if np is not None:
+            # Only the columns both roles use contribute to the products
+            (columns, dense), (other_columns, other_dense) = vectors, other_vectors
+            _, mine, theirs = np.intersect1d(columns, other_columns, assume_unique=True, return_indices=True)
+            scores = dense[:, mine] @ other_dense[:, theirs].T
+            rows, cols = np.nonzero(scores >= threshold)
+            values = scores[rows, cols]
+            order = np.lexsort((cols, rows, -values))
+            pairs = zip(values[order].tolist(), rows[order].tolist(), cols[order].tolist())
+        else:
+            pairs = []
+            for i, vector in enumerate(vectors):
+                for j, other in enumerate(other_vectors):
+                    score = _dot(vector, other)
+                    if score >= threshold:
+                        pairs.append((score, i, j))
+            pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+        used, used_other, matches = set(), set(), []
+        most = min(len(ids), len(other_ids))
+        for score, i, j in pairs:
+            if i not in used and j not in used_other:
+                used.add(i)
+                used_other.add(j)
+                matches.append((ids[i], other_ids[j], score))
+                if len(matches) == most:
+                    break
+        return matches
+
+    def milestone_titles(self, role_id: int) -> Dict[int, str]:
+        if role_id not in self._milestones:
+            return {}
+        ids, titles, _ = self._milestones[role_id]
+        return dict(zip(ids, titles))
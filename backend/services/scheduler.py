@@ -0,0 +1,131 @@
+"""
+Roadmap scheduling for NAVIQ
+Spreads a roadmap's milestones over a number of days in proportion to each
+milestone's duration_days weight.
+
+Days are allocated with the largest-remainder method, so the allocation
+always sums to exactly `days`, and every milestone gets at least one day
+whenever there are at least as many days as milestones. The week view is
+derived from the day schedule, so both views always agree.
+
+schedule_days_many() schedules one roadmap for many day counts at once; with
+NumPy installed it does so in a handful of array operations.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; schedule_days_many falls back to a loop
+    np = None
+
+DEFAULT_WEIGHT = 7
+DAYS_PER_WEEK = 7
+# Below this many day counts the per-call overhead of NumPy is not worth it
+VECTORIZE_MIN = 8
+
+
+def milestone_weights(milestones: Sequence[Dict]) -> Tuple[int, ...]:
+    """Return each milestone's duration_days weight (DEFAULT_WEIGHT when unset)."""
+    weights = []
+    for milestone in milestones:
+        weight = milestone.get('duration_days')
+        weights.append(weight if isinstance(weight, int) and weight > 0 else DEFAULT_WEIGHT)
+    return tuple(weights)
+
+
+@lru_cache(maxsize=1024)
+def allocate(weights: Tuple[int, ...], total: int) -> Tuple[int, ...]:
+    """Split `total` units across `weights` proportionally (largest remainder)."""
+    count = len(weights)
+    if count == 0 or total <= 0:
+        return (0,) * count
+
+    weight_sum = sum(weights)
+    # Integer arithmetic: quota_i = total * w_i / weight_sum
+    shares = [total * w // weight_sum for w in weights]
+    remainders = [total * w % weight_sum for w in weights]
+    leftover = total - sum(shares)
+    # Largest remainder first; ties go to the earlier milestone
+    for i in sorted(range(count), key=lambda i: (-remainders[i], i))[:leftover]:
+        shares[i] += 1
+
+    if total >= count:
+        # Give starved milestones a day from the largest allocations
+        for i in range(count):
+            if shares[i] == 0:
+                donor = max(range(count), key=lambda j: (shares[j], -j))
+                shares[donor] -= 1
+                shares[i] = 1
+    return tuple(shares)
+
+
+@lru_cache(maxsize=1024)
+def schedule_days(weights: Tuple[int, ...], days: int) -> Tuple[Tuple[int, int], ...]:
+    """Return a (start_day, end_day) pair per milestone, 1-based and inclusive.
+
+    When there are fewer days than milestones, milestones without a day of
+    their own share the start day of the milestone after them (the last day
+    when none follows).
+    """
+    spans = []
+    cursor = 1
+    for share in allocate(weights, days):
+        if share:
+            spans.append((cursor, cursor + share - 1))
+            cursor += share
+        else:
+            day = max(1, min(cursor, days))
+            spans.append((day, day))
+    return tuple(spans)
+
+
+def schedule_days_many(weights: Tuple[int, ...], days_list: Sequence[int]) -> List[Tuple[Tuple[int, int], ...]]:
+    """Return schedule_days(weights, days) for every entry of `days_list`."""
+    if np is None or len(days_list) < VECTORIZE_MIN or not weights:
+        return [schedule_days(weights, days) for days in days_list]
+
+    count = len(weights)
+    w = np.asarray(weights, dtype=np.int64)
+    totals = np.asarray(days_list, dtype=np.int64)
+    clamped = np.maximum(totals, 0)
+
+    # Largest remainder for every row at once, same tie-break as allocate()
+    quota = clamped[:, None] * w[None, :]
+    shares = quota // w.sum()
+    remainders = quota % w.sum()
+    leftover = clamped - shares.sum(axis=1)
+    order = np.argsort(-remainders, axis=1, kind='stable')
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(np.arange(count), order.shape), axis=1)
+    shares += rank < leftover[:, None]
+
+    # Starved milestones are rare; reuse the scalar fix-up for those rows
+    for row in np.flatnonzero((clamped >= count) & (shares == 0).any(axis=1)):
+        shares[row] = allocate(weights, int(totals[row]))
+
+    ends = np.cumsum(shares, axis=1)
+    starts = ends - shares + 1
+    shared_day = np.clip(starts, 1, np.maximum(totals, 1)[:, None])
+    empty = shares == 0
+    starts = np.where(empty, shared_day, starts).tolist()
+    ends = np.where(empty, shared_day, ends).tolist()
+    return [tuple(zip(row_starts, row_ends)) for row_starts, row_ends in zip(starts, ends)]
+
+
+@lru_cache(maxsize=1024)
+def schedule_weeks(weights: Tuple[int, ...], days: int) -> Tuple[Tuple[int, ...], ...]:
+    """Return, per week, the indexes of the milestones active during it.
+
+    There are max(1, days // 7) weeks; the last one absorbs any leftover days.
+    A milestone longer than a week appears in every week it overlaps.
+    """
+    num_weeks = max(1, days // DAYS_PER_WEEK)
+    weeks: List[List[int]] = [[] for _ in range(num_weeks)]
+    for index, (start, end) in enumerate(schedule_days(weights, max(days, 1))):
+        first = min((start - 1) // DAYS_PER_WEEK, num_weeks - 1)
+        last = min((end - 1) // DAYS_PER_WEEK, num_weeks - 1)
+        for week in range(first, last + 1):
+            weeks[week].append(index)
+    return tuple(tuple(week) for week in weeks)
@@ -0,0 +1,86 @@
+import os
+import re
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import SEARCH_KINDS
+from repository.db_repo import DatabaseRepository
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+KIND_IDS = {name: kind for kind, name in SEARCH_KINDS.items()}
+MAX_PER_PAGE = 50
+MAX_PAGE = 100
+
+
+class SearchService:
+    """
+    Service layer for full-text search over questions, study material and milestones.
+    Search always runs against SQLite's FTS5 index, whichever backend serves
+    the other reads.
+    """
+    def __init__(self, repository: DatabaseRepository):
+        self._repository = repository
+
+    @staticmethod
+    def build_match(text):
+        """
+        Turns free text into an FTS5 query: every word must match.
+        Words are quoted, so FTS5 operators in user input are treated as text.
+        """
+        words = _WORD.findall(text or '')
+        return ' '.join(f'"{word}"' for word in words)
+
+    def search(self, text, role=None, difficulty=None, kind=None, page=1, per_page=20):
+        """
+        Searches the index, best match first.
+
+        Args:
+            text (str): Free-text query.
+            role (str, optional): Only return results for this role name.
+            difficulty (str, optional): Only return questions of this difficulty.
+            kind (str, optional): One of question, study_topic, study_resource, milestone.
+            page (int): 1-based page number.
+            per_page (int): Results per page (at most MAX_PER_PAGE).
+
+        Returns:
+            dict: {"query", "page", "per_page", "has_more", "results"}.
+        """
+        page = min(max(page, 1), MAX_PAGE)
+        per_page = min(max(per_page, 1), MAX_PER_PAGE)
+        response = {"query": text, "page": page, "per_page": per_page, "has_more": False, "results": []}
+
+        match = self.build_match(text)
+        if not match:
+            return response
+
+        role_id = None
+        if role:
+            found = self._repository.get_role_by_name(role)
+            if not found:
+                return response
+            role_id = found['id']
+
+        # Fetch one extra row to learn whether another page exists
+        rows = self._repository.search(
+            match, role_id=role_id, difficulty=difficulty, kind=KIND_IDS.get(kind),
+            limit=per_page + 1, offset=(page - 1) * per_page,
+        )
+        response["has_more"] = len(rows) > per_page
+        rows = rows[:per_page]
+
+        role_names = self._repository.get_role_names({row['role_id'] for row in rows if row['role_id']})
+        response["results"] = [
+            {
+                "kind": SEARCH_KINDS[row['rowid'] % 8],
+                "id": row['rowid'] // 8,
+                "title": row['title'],
+                "snippet": row['body_snippet'] if '<mark>' in row['body_snippet'] else row['title_snippet'],
+                "role": role_names.get(row['role_id']),
+                "difficulty": row['difficulty'],
+                "score": round(-row['score'], 4),
+            }
+            for row in rows
+        ]
+        return response
@@ -0,0 +1,65 @@
+"""
+Request coalescing for NAVIQ
+SingleFlight runs a function at most once at a time per key: the first
+caller computes, and callers arriving for the same key while it runs wait
+for its result instead of repeating the work. Nothing is kept afterwards,
+so an error reaches the callers that were waiting for it and the next
+caller tries again. Waiters block on a threading.Event, which works the
+same under threaded and gevent workers.
+"""
+
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"calls": 0, "coalesced": 0, "errors": 0}
+
+    def __len__(self):
+        """Number of calls in flight."""
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn(), or the result of the call for `key` already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+                leader = True
+            else:
+                self.stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,92 @@
+"""
+Spaced repetition for NAVIQ interview practice
+Cards are scheduled with SM-2: a passed review (grade 3-5 of 0-5) pushes the
+next one out by 1 day, then 6 days, then the previous interval times the
+card's ease (capped at MAX_INTERVAL days), which rises with easy answers
+and falls with hard ones. A failed review restarts the card and brings it
+back after RELEARN_SECONDS, so it is practised again in the same session.
+
+DueQueue keeps one learner's cards for one role in a binary heap keyed by due
+time. Rescheduling pushes a new entry and leaves the old one to be skipped
+when it surfaces, so every operation is O(log n) in the deck's size.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DAY = 86400
+START_EASE = 2.5
+MIN_EASE = 1.3
+# Lowest grade that counts as a successful recall
+PASS_GRADE = 3
+MAX_GRADE = 5
+RELEARN_SECONDS = 600
+# Longest interval in days; without a cap the interval grows geometrically
+# and a long enough run of good answers schedules the card past year 9999
+MAX_INTERVAL = 3650.0
+
+
+class Card(NamedTuple):
+    repetitions: int = 0
+    interval: float = 0.0   # days
+    ease: float = START_EASE
+    due: float = 0.0        # unix time
+    lapses: int = 0
+
+
+def review(card: Card, grade: int, now: float) -> Card:
+    """The card after a review graded 0 (blackout) to 5 (perfect) at `now`."""
+    if not 0 <= grade <= MAX_GRADE:
+        raise ValueError(f"grade must be between 0 and {MAX_GRADE}")
+    if grade < PASS_GRADE:
+        # SM-2 starts the repetitions over without touching the ease
+        return Card(0, 0.0, card.ease, now + RELEARN_SECONDS, card.lapses + 1)
+    miss = MAX_GRADE - grade
+    ease = max(MIN_EASE, card.ease + 0.1 - miss * (0.08 + miss * 0.02))
+    repetitions = card.repetitions + 1
+    if repetitions == 1:
+        interval = 1.0
+    elif repetitions == 2:
+        interval = 6.0
+    else:
+        interval = min(round(card.interval * ease, 2), MAX_INTERVAL)
+    return Card(repetitions, interval, ease, now + interval * DAY, card.lapses)
+
+
+class DueQueue:
+    """A learner's cards for one role, ordered by due time."""
+
+    def __init__(self, cards: Iterable[Tuple[int, float]] = ()):
+        # question_id -> current due; heap entries whose due differs are stale
+        self._due: Dict[int, float] = dict(cards)
+        self._heap: List[Tuple[float, int]] = [(due, key) for key, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def _settle(self) -> None:
+        """Drop stale entries off the top of the heap."""
+        heap = self._heap
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def push(self, key: int, due: float) -> None:
+        """Add a card or move it to a new due time."""
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, key))
+        # Compact once stale entries outnumber live ones
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, key) for key, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, key: int) -> None:
+        self._due.pop(key, None)
+
+    def peek(self) -> Optional[Tuple[float, int]]:
+        """(due, question_id) of the card due first, or None when empty."""
+        self._settle()
+        return self._heap[0] if self._heap else None
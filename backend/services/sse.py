@@ -0,0 +1,29 @@
+"""
+Server-Sent Events formatting for NAVIQ
+Helpers that turn events into text/event-stream frames for streaming responses.
+"""
+
+import json
+
+# Headers for every event stream: no caching, and no proxy buffering (nginx)
+# so each frame reaches the client as soon as it is written
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(event: str = None, data=None, event_id=None, retry: int = None) -> str:
+    """Format one SSE frame; `data` is sent as compact JSON."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    if retry is not None:
+        lines.append(f"retry: {int(retry)}")
+    if data is not None:
+        lines.append("data: " + json.dumps(data, separators=(',', ':')))
+    return "\n".join(lines) + "\n\n"
+
+
+def comment(text: str = "") -> str:
+    """Format an SSE comment, ignored by clients (used to open or keep alive a stream)."""
+    return f": {text}\n\n"
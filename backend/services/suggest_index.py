@@ -0,0 +1,187 @@
+"""
+Typeahead index for NAVIQ
+A prefix trie over the words of every label plus a trigram index for typo
+tolerant matching. Entries can be added and removed one at a time, so the
+index follows catalogue changes without being rebuilt.
+"""
+
+import heapq
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+# Ranked results cached per trie node; deeper pages are computed on demand
+TOP_CACHE = 32
+
+
+def normalize(text: str) -> List[str]:
+    """Split text into casefolded words."""
+    return _WORD.findall((text or '').casefold())
+
+
+def trigrams(text: str) -> Counter:
+    """Character trigrams of the normalized text, padded at word edges."""
+    padded = f"  {' '.join(normalize(text))} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _Node:
+    __slots__ = ('children', 'ids', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        # entry key -> number of the entry's words passing through this node
+        self.ids: Dict[Hashable, int] = {}
+        self.top: Optional[List[Hashable]] = None
+
+
+class SuggestIndex:
+    """Prefix trie plus trigram index over labelled entries."""
+
+    def __init__(self):
+        self._root = _Node()
+        self._entries: Dict[Hashable, Dict] = {}
+        self._rank: Dict[Hashable, Tuple] = {}
+        self._trigrams: Dict[Hashable, Counter] = {}
+        self._sizes: Dict[Hashable, int] = {}
+        # trigram -> {entry key: occurrences of the trigram in the label}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return self._entries.keys()
+
+    def add(self, key: Hashable, label: str, payload: Dict, priority: int = 0) -> None:
+        """Index `label` under `key`; `payload` is returned with matches."""
+        if key in self._entries:
+            self.remove(key)
+        self._entries[key] = payload
+        self._rank[key] = (priority, len(label), label.casefold())
+
+        for word in set(normalize(label)):
+            node = self._root
+            for char in word:
+                node = node.children.setdefault(char, _Node())
+                node.ids[key] = node.ids.get(key, 0) + 1
+                node.top = None
+
+        grams = trigrams(label)
+        self._trigrams[key] = grams
+        self._sizes[key] = sum(grams.values())
+        for gram, count in grams.items():
+            self._postings.setdefault(gram, {})[key] = count
+
+    def remove(self, key: Hashable) -> None:
+        """Drop an entry; unknown keys are ignored."""
+        payload = self._entries.pop(key, None)
+        if payload is None:
+            return
+        label = self._rank.pop(key)[2]
+        for word in set(normalize(label)):
+            node = self._root
+            path = []
+            for char in word:
+                child = node.children.get(char)
+                if child is None:
+                    break
+                path.append((node, char, child))
+                node = child
+            for parent, char, child in reversed(path):
+                count = child.ids.get(key, 0) - 1
+                if count > 0:
+                    child.ids[key] = count
+                else:
+                    child.ids.pop(key, None)
+                child.top = None
+                if not child.ids and not child.children:
+                    del parent.children[char]
+
+        del self._sizes[key]
+        for gram in self._trigrams.pop(key):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._postings[gram]
+
+    def _node(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _ranked(self, node: _Node, limit: int) -> List[Hashable]:
+        if limit <= TOP_CACHE:
+            if node.top is None:
+                node.top = heapq.nsmallest(TOP_CACHE, node.ids, key=self._rank.__getitem__)
+            return node.top[:limit]
+        return heapq.nsmallest(limit, node.ids, key=self._rank.__getitem__)
+
+    def prefix(self, text: str, limit: int = 10, accept=None) -> List[Dict]:
+        """Entries whose words start with every word of `text`, best ranked first."""
+        words = normalize(text)
+        if not words:
+            return []
+        nodes = [self._node(word) for word in words]
+        if any(node is None for node in nodes):
+            return []
+
+        if len(nodes) == 1 and accept is None:
+            return [self._entries[key] for key in self._ranked(nodes[0], limit)]
+
+        nodes.sort(key=lambda node: len(node.ids))
+        candidates = (key for key in nodes[0].ids if all(key in node.ids for node in nodes[1:]))
+        if accept is not None:
+            candidates = (key for key in candidates if accept(self._entries[key]))
+        return [self._entries[key] for key in heapq.nsmallest(limit, candidates, key=self._rank.__getitem__)]
+
+    def fuzzy(self, text: str, limit: int = 10, threshold: float = 0.3,
+              accept=None) -> List[Tuple[float, Dict]]:
+        """Entries whose trigrams overlap `text`, as (dice similarity, payload), best first."""
+        if not normalize(text):
+            return []
+        query = trigrams(text)
+        shared: Counter = Counter()
+        for gram, count in query.items():
+            postings = self._postings.get(gram)
+            if not postings:
+                continue
+            if count == 1:
+                # The common case; Counter.update counts the keys in C
+                shared.update(postings.keys())
+            else:
+                for key, occurrences in postings.items():
+                    shared[key] += min(count, occurrences)
+
+        query_size = sum(query.values())
+        sizes = self._sizes
+        scored = []
+        for key, overlap in shared.items():
+            if accept is not None and not accept(self._entries[key]):
+                continue
+            score = 2.0 * overlap / (query_size + sizes[key])
+            if score >= threshold:
+                scored.append((score, key))
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], self._rank[item[1]]))
+        return [(round(score, 4), self._entries[key]) for score, key in best]
+
+    def sync(self, entries: Iterable[Tuple[Hashable, str, Dict, int]]) -> Tuple[int, int]:
+        """Make the index hold exactly `entries`; returns (added, removed)."""
+        wanted = {key: (label, payload, priority) for key, label, payload, priority in entries}
+        stale = [key for key in self._entries if key not in wanted]
+        for key in stale:
+            self.remove(key)
+        added = 0
+        for key, (label, payload, priority) in wanted.items():
+            if key not in self._entries or self._entries[key] != payload:
+                self.add(key, label, payload, priority)
+                added += 1
+        return added, len(stale)
@@ -0,0 +1,322 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+from repository.base import CatalogueRepository
+from repository.db_repo import DatabaseRepository
+from services.sync_service import ReaderLease
+from services.suggest_index import SuggestIndex, normalize
+
+# Ranking priority per kind: roles first, then study topics, then milestones
+KIND_PRIORITY = {"role": 0, "study_topic": 1, "milestone": 2}
+MAX_SUGGESTIONS = 25
+# Minimum trigram similarity for a suggestion, and for resolving a role name
+SUGGEST_THRESHOLD = 0.3
+RESOLVE_THRESHOLD = 0.45
+# A fuzzy role match must beat the runner-up by this much to be used
+RESOLVE_MARGIN = 0.1
+
+_UNBUILT = object()
+
+
+class SuggestService:
+    """
+    Service layer for typeahead suggestions and loose role-name resolution.
+    It uses a repository to fetch data, keeping the service
+    independent of the data storage implementation.
+
+    Role names, study topic titles and milestone titles live in a SuggestIndex.
+    Entries come in groups, one per role, study topic and roadmap. With a
+    `change_log` (the catalogue database), a data version change reads the
+    change_log entries since the last refresh and re-reads only the rows and
+    roadmaps they touch, as the guide does; when the log was pruned past the
+    index, or without a change_log (the file backends), the catalogue is
+    re-read and diffed against the index. The `lease` keeps the log from
+    being pruned past the index. Rows are read without holding the index
+    lock, so lookups keep answering from the previous entries until the
+    changes are applied.
+    """
+    def __init__(self, repository: CatalogueRepository, change_log: DatabaseRepository = None,
+                 lease: ReaderLease = None):
+        # With a change log, every read goes to it so rows and seqs agree
+        self._repository = change_log or repository
+        self._change_log = change_log
+        self._lease = lease
+        self._refresh_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._index = SuggestIndex()
+        # Roles alone, so role resolution does not scan milestone postings
+        self._role_index = SuggestIndex()
+        self._roles = {}
+        self._version = _UNBUILT
+        self._seq = None
+        # group -> entries; key -> {group: entry} for keys several groups share
+        self._groups = {}
+        self._owners = {}
+        # role ID -> name, and the roles of roadmap and milestone IDs
+        self._role_names_by_id = {}
+        self._roadmap_roles = {}
+        self._milestone_roles = {}
+
+    def refresh(self):
+        """Bring the index up to date with the repository's current data version."""
+        version = self._repository.get_data_version()
+        if version == self._version:
+            return
+        ready = self._version is not _UNBUILT
+        if not self._refresh_lock.acquire(blocking=ready):
+            # Someone else is applying the changes; the old entries are still usable
+            return
+        try:
+            version = self._repository.get_data_version()
+            if version != self._version:
+                if self._change_log is None or self._seq is None or not self._apply_changes():
+                    self._rebuild()
+                self._version = version
+                if self._lease is not None and self._seq is not None:
+                    self._lease.hold(self._seq)
+        finally:
+            self._refresh_lock.release()
+
+    # ============== ENTRIES ==============
+
+    @staticmethod
+    def _role_entries(role):
+        name = role['name']
+        return [(("role", name), name, {"kind": "role", "id": role.get('id'), "label": name},
+                 KIND_PRIORITY["role"])]
+
+    @staticmethod
+    def _topic_entries(topic):
+        title = topic.get('title')
+        if not title:
+            return []
+        return [(("study_topic", title), title, {"kind": "study_topic", "id": topic.get('id'), "label": title},
+                 KIND_PRIORITY["study_topic"])]
+
+    def _roadmap_entries(self, role_id, role_name):
+        roadmap = self._repository.get_roadmap_for_role(role_name) or {}
+        if roadmap.get('id') is not None:
+            self._roadmap_roles[roadmap['id']] = role_id
+        entries = []
+        for milestone in roadmap.get('milestones', []):
+            if milestone.get('id') is not None:
+                self._milestone_roles[milestone['id']] = role_id
+            title = milestone.get('title')
+            if title:
+                entries.append((("milestone", role_name, title), title,
+                                {"kind": "milestone", "id": milestone.get('id'), "label": title,
+                                 "role": role_name},
+                                KIND_PRIORITY["milestone"]))
+        return entries
+
+    # ============== FULL BUILD ==============
+
+    def _rebuild(self):
+        """Re-read the whole catalogue and diff it against the index."""
+        seq = self._change_log.get_last_change() if self._change_log is not None else None
+        self._roadmap_roles = {}
+        self._milestone_roles = {}
+        roles = self._repository.get_all_roles()
+        groups = {("role", role['id']): self._role_entries(role) for role in roles}
+        for topic in self._repository.get_all_study_topics():
+            groups[("study_topic", topic.get('id', topic.get('title')))] = self._topic_entries(topic)
+        for role in roles:
+            groups[("roadmap", role['id'])] = self._roadmap_entries(role['id'], role['name'])
+
+        owners = {}
+        for group, group_entries in groups.items():
+            for entry in group_entries:
+                owners.setdefault(entry[0], {})[group] = entry
+        entries = [self._owned_entry(key_owners) for key_owners in owners.values()]
+        with self._index_lock:
+            self._index.sync(entries)
+            self._role_index.sync(entry for entry in entries if entry[0][0] == "role")
+            self._roles = self._role_names()
+        self._groups = groups
+        self._owners = owners
+        self._role_names_by_id = {role['id']: role['name'] for role in roles}
+        self._seq = seq
+
+    # ============== INCREMENTAL ==============
+
+    def _apply_changes(self):
+        """
+        Re-read the groups that change_log entries after the last seq touch and
+        apply them. Returns False if the log was pruned past the index.
+        """
+        seq = self._seq
+        touched = {}
+        while True:
+            changes = self._change_log.get_changes(seq)
+            if changes is None:
+                return False
+            if not changes:
+                break
+            for change in changes:
+                touched.setdefault(change['table_name'], set()).add(change['row_id'])
+            seq = changes[-1]['seq']
+        if not touched:
+            self._seq = seq
+            return True
+
+        groups = {}
+        roadmap_roles = set()
+        role_ids = touched.get('roles', ())
+        if role_ids:
+            found = {row['id']: row for row in self._change_log.get_rows('roles', role_ids)}
+            for role_id in role_ids:
+                role = found.get(role_id)
+                groups[("role", role_id)] = self._role_entries(role) if role else []
+                if role:
+                    self._role_names_by_id[role_id] = role['name']
+                else:
+                    self._role_names_by_id.pop(role_id, None)
+                # Milestone keys carry the role name
+                roadmap_roles.add(role_id)
+
+        topic_ids = touched.get('study_topics', ())
+        if topic_ids:
+            found = {row['id']: row for row in self._change_log.get_rows('study_topics', topic_ids)}
+            for topic_id in topic_ids:
+                topic = found.get(topic_id)
+                groups[("study_topic", topic_id)] = self._topic_entries(topic) if topic else []
+
+        roadmap_ids = set(touched.get('roadmaps', ()))
+        milestone_ids = touched.get('milestones', ())
+        if milestone_ids:
+            for row in self._change_log.get_rows('milestones', milestone_ids):
+                roadmap_ids.add(row['roadmap_id'])
+            # Deleted milestones are found through the roadmap they were read from
+            roadmap_roles.update(self._milestone_roles[m] for m in milestone_ids if m in self._milestone_roles)
+        if roadmap_ids:
+            for row in self._change_log.get_rows('roadmaps', roadmap_ids):
+                roadmap_roles.add(row['role_id'])
+            roadmap_roles.update(self._roadmap_roles[r] for r in roadmap_ids if r in self._roadmap_roles)
+
+        for role_id in roadmap_roles:
+            name = self._role_names_by_id.get(role_id)
+            groups[("roadmap", role_id)] = self._roadmap_entries(role_id, name) if name else []
+
+        with self._index_lock:
+            for group, entries in groups.items():
+                self._replace_group(group, entries)
+            self._roles = self._role_names()
+        self._seq = seq
+        return True
+
+    @staticmethod
+    def _owned_entry(owners):
+        """The entry indexed for a key several groups share: the lowest group's."""
+        return owners[min(owners)]
+
+    def _replace_group(self, group, entries):
+        """Swap one group's entries in the indexes (index lock held)."""
+        keys = set()
+        for entry in self._groups.pop(group, ()):
+            keys.add(entry[0])
+            owners = self._owners.get(entry[0])
+            if owners is not None:
+                owners.pop(group, None)
+        if entries:
+            self._groups[group] = entries
+        for entry in entries:
+            keys.add(entry[0])
+            self._owners.setdefault(entry[0], {})[group] = entry
+
+        for key in keys:
+            owners = self._owners.get(key)
+            indexes = (self._index, self._role_index) if key[0] == "role" else (self._index,)
+            if not owners:
+                self._owners.pop(key, None)
+                for index in indexes:
+                    index.remove(key)
+                continue
+            _, label, payload, priority = self._owned_entry(owners)
+            for index in indexes:
+                index.add(key, label, payload, priority)
+
+    def _role_names(self):
+        """Map casefolded and word-normalized role names to the canonical name."""
+        roles = {}
+        for _, name in self._role_index.keys():
+            roles.setdefault(name.casefold(), name)
+            roles.setdefault(' '.join(normalize(name)), name)
+        return roles
+
+    def suggest(self, text, limit=10, kind=None):
+        """
+        Suggests labels for a partially typed query.
+
+        Every word of the query is matched as a word prefix; when that yields
+        fewer than `limit` results, typo-tolerant trigram matches fill the rest.
+        Milestone titles shared by several roadmaps are returned once.
+
+        Args:
+            text (str): The query typed so far.
+            limit (int): Maximum number of suggestions (capped at MAX_SUGGESTIONS).
+            kind (str, optional): Only suggest this kind (role, study_topic, milestone).
+
+        Returns:
+            list: Suggestions as {"kind", "id", "label", "match"} (milestones add "role").
+        """
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        self.refresh()
+        accept = (lambda entry: entry["kind"] == kind) if kind else None
+
+        results = []
+        seen = set()
+
+        def take(entries, match):
+            for entry in entries:
+                key = (entry["kind"], entry["label"].casefold())
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append(dict(entry, match=match))
+                if len(results) >= limit:
+                    return True
+            return False
+
+        # Over-fetch so that duplicate milestone titles do not leave the page short
+        with self._index_lock:
+            if take(self._index.prefix(text, limit * 2, accept), "prefix"):
+                return results
+            fuzzy = self._index.fuzzy(text, limit * 2, SUGGEST_THRESHOLD, accept)
+        take((entry for _, entry in fuzzy), "fuzzy")
+        return results
+
+    def resolve_role(self, name):
+        """
+        Maps a loosely typed role name onto a known role name.
+
+        Tries, in order: the exact name, a case-insensitive match, a unique role
+        whose words start with the given words ("python dev"), and finally the
+        closest role by trigram similarity ("Pyhton Developer") when it is both
+        close enough and clearly better than the runner-up.
+
+        Returns:
+            str: The canonical role name, or None if nothing matches well enough.
+        """
+        if not name or not name.strip():
+            return None
+        self.refresh()
+        roles = self._roles
+        for folded in (name.casefold(), ' '.join(normalize(name))):
+            if folded in roles:
+                return roles[folded]
+
+        with self._index_lock:
+            prefixed = self._role_index.prefix(name, 2)
+            if len(prefixed) == 1:
+                return prefixed[0]["label"]
+            candidates = self._role_index.fuzzy(name, 2, RESOLVE_THRESHOLD)
+        if not candidates:
+            return None
+        if len(candidates) > 1 and candidates[0][0] - candidates[1][0] < RESOLVE_MARGIN:
+            return None
+        return candidates[0][1]["label"]
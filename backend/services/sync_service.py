@@ -0,0 +1,161 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+from repository.db_repo import DatabaseRepository
+from repository.sync_repo import SyncRepository
+
+DAY = 86400
+# Page size of a sync response, counted in change_log entries
+SYNC_PAGE = 1000
+MAX_SYNC_PAGE = 10000
+# Clients not seen for this long stop holding back pruning (and must reload)
+CLIENT_TTL = 30 * DAY
+# The newest entries are always kept, so a cache that is a little behind
+# catches up instead of rebuilding
+KEEP_CHANGES = 10000
+# Pruning rewrites the catalogue database, which every cache watches, so it
+# runs at most this often per worker and only with this many entries to drop
+PRUNE_INTERVAL = 300
+PRUNE_MIN = 1000
+# In-process change_log readers hold pruning back for this long after they
+# last recorded their seq (so an exited worker stops holding it), and record
+# it at most this often
+READER_TTL = DAY
+READER_RENEW = 60
+
+
+class SyncService:
+    """
+    Service layer for delta sync. change_log (kept by triggers on every
+    catalogue table) numbers each write; its seq is the data version a client
+    holds. A sync returns the rows written since the client's version,
+    compacted to one change per row: an insert or update with the current
+    row, or a tombstone. Rows created and deleted since then are left out.
+
+    Clients that pass an ID are tracked, and the log is pruned up to the
+    oldest version any of them, or any in-process reader holding a
+    ReaderLease, still holds (never the last KEEP_CHANGES entries). A client
+    behind the pruned point must reload.
+    """
+    def __init__(self, repository: DatabaseRepository, clients: SyncRepository):
+        self._repository = repository
+        self._clients = clients
+        self._pruned_at = 0.0
+
+    def version(self):
+        """Returns the current data version (the last change_log seq)."""
+        return self._repository.get_last_change()
+
+    def changes(self, since, client_id=None, limit=SYNC_PAGE, now=None):
+        """
+        Collects the changes after a version.
+
+        Args:
+            since (int): The version the client holds.
+            client_id (str, optional): Tracks the client at `since`.
+            limit (int): Most change_log entries to cover (the response has
+                at most this many changes).
+            now (float, optional): Unix time (default: the current time).
+
+        Returns:
+            dict: {"version", "changes", "more"}, where changes are
+                {"table", "id", "op", "row"} (no row for op "delete"),
+                oldest first, and version is the one to pass next time.
+                None if the client must reload: entries it needs have been
+                pruned, or it is ahead of the log.
+        """
+        now = time.time() if now is None else now
+        limit = min(max(limit, 1), MAX_SYNC_PAGE)
+        entries = self._repository.get_changes(since, limit + 1)
+        if entries is None or (not entries and since > self._repository.get_last_change()):
+            return None
+        more = len(entries) > limit
+        entries = entries[:limit]
+
+        # (table, id) -> [first op, last seq]
+        touched = {}
+        for entry in entries:
+            key = (entry['table_name'], entry['row_id'])
+            if key in touched:
+                touched[key][1] = entry['seq']
+            else:
+                touched[key] = [entry['op'], entry['seq']]
+        ids = {}
+        for table, row_id in touched:
+            ids.setdefault(table, []).append(row_id)
+        rows = {(table, row['id']): row
+                for table, row_ids in ids.items() for row in self._repository.get_rows(table, row_ids)}
+
+        changes = []
+        for (table, row_id), (first_op, _) in sorted(touched.items(), key=lambda item: item[1][1]):
+            row = rows.get((table, row_id))
+            if row is not None:
+                changes.append({"table": table, "id": row_id, "op": "insert" if first_op == 'insert' else "update",
+                                "row": row})
+            elif first_op != 'insert':
+                changes.append({"table": table, "id": row_id, "op": "delete"})
+
+        if client_id is not None:
+            self._clients.record_client(client_id, since, now)
+            self.prune(now)
+        return {"version": entries[-1]['seq'] if entries else since, "changes": changes, "more": more}
+
+    def prune(self, now=None, force=False):
+        """
+        Prunes change_log up to the oldest version a tracked client holds, at
+        most every PRUNE_INTERVAL (unless `force`). Returns the number of
+        entries deleted.
+        """
+        now = time.time() if now is None else now
+        if not force and now - self._pruned_at < PRUNE_INTERVAL:
+            return 0
+        self._pruned_at = now
+        self._clients.expire_clients(now - CLIENT_TTL)
+        self._clients.expire_readers(now)
+        through = self._repository.get_last_change() - KEEP_CHANGES
+        for oldest in (self._clients.get_min_client_version(now - CLIENT_TTL),
+                       self._clients.get_min_reader_version(now)):
+            if oldest is not None:
+                through = min(through, oldest)
+        return self._repository.prune_changes(max(through, 0), 1 if force else PRUNE_MIN)
+
+    def status(self, now=None):
+        """Current version, pruned point, tracked clients and in-process readers."""
+        now = time.time() if now is None else now
+        return {
+            "version": self.version(),
+            "pruned_through": self._repository.get_pruned_change(),
+            "clients": self._clients.count_clients(now - CLIENT_TTL),
+            "readers": self._clients.count_readers(now),
+        }
+
+
+class ReaderLease:
+    """
+    Keeps change_log from being pruned past an in-process reader (a cache
+    that applies the log incrementally), so the reader catches up instead of
+    rebuilding on a request. The reader calls hold() with the seq it has
+    applied; the seq is recorded as "<name>:<pid>" at most every
+    READER_RENEW seconds. A recorded seq behind the reader's only holds back
+    more, so skipping the writes in between is safe. A reader left idle for
+    READER_TTL stops holding pruning back and may have to rebuild.
+    """
+    def __init__(self, clients: SyncRepository, name):
+        self._clients = clients
+        self._name = name
+        self._pid = None
+        self._recorded_at = 0.0
+
+    def hold(self, seq, now=None):
+        now = time.time() if now is None else now
+        pid = os.getpid()
+        # A forked worker records under its own ID straight away
+        if pid == self._pid and now - self._recorded_at < READER_RENEW:
+            return
+        self._clients.record_reader(f"{self._name}:{pid}", seq, now + READER_TTL)
+        self._pid, self._recorded_at = pid, now
@@ -0,0 +1,170 @@
+"""
+t-digest quantile sketches for NAVIQ
+A mergeable summary of a stream of numbers that answers rank queries ("what
+share of learners scored below x?") with small relative error, most
+accurate near the extremes where "top 5%" style answers live.
+
+Values are held as weighted centroids, sorted by mean. Compressing merges
+neighbours as long as the k1 scale function allows, which keeps at most
+about COMPRESSION centroids whatever the number of values, so a sketch
+serialises to a couple of kilobytes and a query is a binary search over a
+bounded array. Equal values always share a centroid, which keeps ranks
+exact for small integer counts. Two sketches merge by compressing their centroids together,
+so partial sketches built by different workers or batches combine into the
+same summary one sketch of all their values would be.
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional
+
+COMPRESSION = 100
+# Values buffered before they are merged into the centroids
+BUFFER_SIZE = 5 * COMPRESSION
+
+
+class TDigest:
+    """Merging t-digest of weighted values."""
+
+    def __init__(self, compression: int = COMPRESSION):
+        self.compression = compression
+        self._means = []
+        self._weights = []
+        self._buffer = []
+        self._mids = []      # weight below each centroid's mean, counting half of its own
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        """Number of centroids (after compressing)."""
+        self._flush()
+        return len(self._means)
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.total += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= BUFFER_SIZE:
+            self._flush()
+
+    def update(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'TDigest') -> None:
+        """Add all of `other`'s values to this sketch."""
+        other._flush()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._flush()
+
+    # ============== COMPRESSION ==============
+
+    def _q_limit(self, q: float) -> float:
+        """Largest quantile a centroid starting at quantile q may reach: k1(q) + 1, inverted."""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        items = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+        total = self.total
+        means, weights = [], []
+        mean, weight = items[0]
+        below = 0.0
+        limit = total * self._q_limit(0.0)
+        for value, w in items[1:]:
+            # Equal values always share a centroid, so ranks at ties stay exact
+            if value == mean or below + weight + w <= limit:
+                weight += w
+                mean += (value - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                below += weight
+                limit = total * self._q_limit(below / total)
+                mean, weight = value, w
+        means.append(mean)
+        weights.append(weight)
+        self._means, self._weights = means, weights
+
+        mids, below = [], 0.0
+        for w in weights:
+            mids.append(below + w / 2)
+            below += w
+        self._mids = mids
+
+    # ============== QUERIES ==============
+
+    def cdf(self, value: float) -> Optional[float]:
+        """
+        Share of the weight below `value`, counting half of the weight equal to
+        it (None when empty). Ranks between centroid means are interpolated.
+        """
+        self._flush()
+        if not self.total:
+            return None
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+        means, mids = self._means, self._mids
+        lo, hi = bisect_left(means, value), bisect_right(means, value)
+        if lo < hi:
+            # Centroids at exactly this value: everything below them plus half of theirs
+            below = mids[lo] - self._weights[lo] / 2
+            return (below + (mids[hi - 1] + self._weights[hi - 1] / 2 - below) / 2) / self.total
+        # Interpolate between the neighbouring means (or the min / max)
+        x0, y0 = (means[lo - 1], mids[lo - 1]) if lo else (self.min, 0.0)
+        x1, y1 = (means[lo], mids[lo]) if lo < len(means) else (self.max, self.total)
+        if x1 <= x0:
+            return y1 / self.total
+        return (y0 + (y1 - y0) * (value - x0) / (x1 - x0)) / self.total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0-1), or None when empty."""
+        self._flush()
+        if not self.total:
+            return None
+        target = min(max(q, 0.0), 1.0) * self.total
+        means, mids = self._means, self._mids
+        i = bisect_left(mids, target)
+        x0, y0 = (means[i - 1], mids[i - 1]) if i else (self.min, 0.0)
+        x1, y1 = (means[i], mids[i]) if i < len(means) else (self.max, self.total)
+        if y1 <= y0:
+            return x1
+        return x0 + (x1 - x0) * (target - y0) / (y1 - y0)
+
+    # ============== SERIALISATION ==============
+
+    def to_bytes(self) -> bytes:
+        """Compact form: min, max, then each centroid's mean and weight, as doubles."""
+        self._flush()
+        packed = array('d', (self.min, self.max))
+        for mean, weight in zip(self._means, self._weights):
+            packed.append(mean)
+            packed.append(weight)
+        return packed.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, compression: int = COMPRESSION) -> 'TDigest':
+        packed = array('d')
+        packed.frombytes(data)
+        digest = cls(compression)
+        if len(packed) > 2:
+            digest._buffer = list(zip(packed[2::2], packed[3::2]))
+            digest.total = math.fsum(packed[3::2])
+            digest.min, digest.max = packed[0], packed[1]
+            digest._flush()
+        return digest
@@ -0,0 +1,54 @@
+"""
+Shared test fixtures for NAVIQ
+Points every database path at a temporary directory before the app modules
+are imported, and hands each test its own copy of a seeded catalogue.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Must happen before database.db_setup reads the paths at import time
+_TEMPLATE_DIR = tempfile.mkdtemp(prefix="naviq-tests-")
+os.environ["NAVIQ_DB_PATH"] = os.path.join(_TEMPLATE_DIR, "naviq.db")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_setup import DB_PATH, init_database, init_practice_database, init_sync_database
+from database.seed_data import seed_database
+
+
+@pytest.fixture(scope="session")
+def seeded_template():
+    """The seeded catalogue database, built once per session."""
+    init_database()
+    seed_database()
+    yield DB_PATH
+    shutil.rmtree(_TEMPLATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def catalogue_db(seeded_template, tmp_path):
+    """Path to a private copy of the seeded catalogue database."""
+    path = tmp_path / "naviq.db"
+    shutil.copy(seeded_template, path)
+    return path
+
+
+@pytest.fixture
+def practice_db(tmp_path):
+    """Path to an empty practice database."""
+    path = tmp_path / "naviq-practice.db"
+    init_practice_database(path)
+    return path
+
+
+@pytest.fixture
+def sync_db(tmp_path):
+    """Path to an empty sync database."""
+    path = tmp_path / "naviq-sync.db"
+    init_sync_database(path)
+    return path
@@ -0,0 +1,112 @@
+import pytest
+
+from repository.db_repo import DatabaseRepository
+from repository.practice_repo import PracticeRepository
+from services import practice_service
+from services.practice_service import PracticeService
+
+NOW = 1_700_000_000.0
+USER = "learner"
+
+
+@pytest.fixture
+def repository(catalogue_db):
+    return DatabaseRepository(catalogue_db)
+
+
+@pytest.fixture
+def role_id(repository):
+    # The role with the most questions, so the deck has a middle to start from
+    counts = {}
+    for role in repository.get_all_roles():
+        low, high = repository.get_question_id_range(role['id']) or (0, -1)
+        counts[role['id']] = high - low
+    return max(counts, key=counts.get)
+
+
+def _service(repository, practice_db):
+    return PracticeService(repository, PracticeRepository(practice_db))
+
+
+def _question_ids(repository, role_id):
+    ids, after = [], 0
+    while (question_id := repository.next_question_id(role_id, after)) is not None:
+        ids.append(question_id)
+        after = question_id
+    return ids
+
+
+def _drain(service, role_id, now=NOW):
+    """Answer every new question perfectly; returns the order they came in."""
+    seen = []
+    while True:
+        result = service.next_question(USER, role_id, now)
+        if result["question"] is None:
+            return seen, result
+        assert result["card"]["state"] == "new"
+        seen.append(result["question"]["id"])
+        service.record_answer(USER, result["question"]["id"], 5, now=now)
+
+
+def test_deck_wraps_around_from_its_start(repository, practice_db, role_id, monkeypatch):
+    ids = _question_ids(repository, role_id)
+    start = ids[len(ids) // 2]
+    monkeypatch.setattr(practice_service.random, "randint", lambda low, high: start)
+
+    seen, result = _drain(_service(repository, practice_db), role_id)
+
+    middle = ids.index(start)
+    assert seen == ids[middle:] + ids[:middle]
+    assert result["next_due"] is not None
+
+
+def test_questions_added_after_the_wrap_are_picked_up(repository, practice_db, role_id, monkeypatch):
+    ids = _question_ids(repository, role_id)
+    monkeypatch.setattr(practice_service.random, "randint", lambda low, high: ids[1])
+    service = _service(repository, practice_db)
+    _drain(service, role_id)
+
+    added = repository.add_question(role_id, "What changed since the deck wrapped?")
+    seen, _ = _drain(service, role_id)
+    assert seen == [added]
+
+
+def test_cards_answered_out_of_order_are_skipped(repository, practice_db, role_id, monkeypatch):
+    ids = _question_ids(repository, role_id)
+    monkeypatch.setattr(practice_service.random, "randint", lambda low, high: ids[0])
+    service = _service(repository, practice_db)
+    service.record_answer(USER, ids[2], 5, now=NOW)
+
+    seen, _ = _drain(service, role_id)
+    assert seen == ids[:2] + ids[3:]
+
+
+def test_another_workers_answers_are_applied_without_a_reload(repository, practice_db, role_id, monkeypatch):
+    ids = _question_ids(repository, role_id)
+    monkeypatch.setattr(practice_service.random, "randint", lambda low, high: ids[0])
+    first, second = _service(repository, practice_db), _service(repository, practice_db)
+    assert first.next_question(USER, role_id, NOW)["question"]["id"] == ids[0]
+
+    second.record_answer(USER, ids[0], 5, now=NOW)
+    second.record_answer(USER, ids[1], 0, now=NOW)
+
+    reloads = []
+    monkeypatch.setattr(first._practice, "get_deck_cards", lambda *args: reloads.append(args) or [])
+    result = first.next_question(USER, role_id, NOW + 3600)
+    # The failed card is due again within the session, ahead of new questions
+    assert result["question"]["id"] == ids[1]
+    assert result["card"]["state"] == "relearning"
+    assert reloads == []
+
+
+def test_a_deck_behind_the_change_log_is_reloaded(repository, practice_db, role_id, monkeypatch):
+    monkeypatch.setattr("repository.practice_repo.DECK_CHANGES_KEPT", 2)
+    ids = _question_ids(repository, role_id)
+    first, second = _service(repository, practice_db), _service(repository, practice_db)
+    first.next_question(USER, role_id, NOW)
+    for question_id in ids[:3]:
+        second.record_answer(USER, question_id, 5, now=NOW)
+
+    deck = first._deck(USER, role_id)
+    assert all(question_id in deck.queue for question_id in ids[:3])
+    assert deck.version == second._deck(USER, role_id).version
@@ -0,0 +1,97 @@
+import random
+import sqlite3
+
+import pytest
+
+from repository.db_repo import DatabaseRepository
+
+
+@pytest.fixture
+def repository(catalogue_db):
+    return DatabaseRepository(catalogue_db)
+
+
+@pytest.fixture
+def conn(catalogue_db):
+    conn = sqlite3.connect(str(catalogue_db))
+    yield conn
+    conn.close()
+
+
+def _assert_consistent(repository):
+    assert repository.check_roadmap_documents() == []
+    for role in repository.get_all_roles():
+        assert repository.get_roadmap_for_role(role['name']) == repository.assemble_roadmap(role['name'])
+
+
+def _ids(conn, table):
+    return [row[0] for row in conn.execute(f"SELECT id FROM {table}")]
+
+
+def test_seeded_documents_are_consistent(repository):
+    _assert_consistent(repository)
+
+
+def test_repository_writes_keep_documents_current(repository):
+    role_id = repository.add_role("Document Tester")
+    roadmap_id = repository.add_roadmap(role_id, "First overview")
+    _assert_consistent(repository)
+
+    first = repository.add_milestone(roadmap_id, "Second step", order_index=2, outcomes=["b"], resources=["r"])
+    repository.add_milestone(roadmap_id, "First step", order_index=1, duration_days=3)
+    _assert_consistent(repository)
+    assert [m['title'] for m in repository.get_roadmap_for_role("Document Tester")['milestones']] == \
+        ["First step", "Second step"]
+
+    repository.update_role(role_id, name="Renamed Tester")
+    _assert_consistent(repository)
+    assert repository.get_roadmap_for_role("Document Tester") is None
+    assert repository.get_roadmap_for_role("Renamed Tester")['milestones'][1]['id'] == first
+
+    repository.delete_role(role_id)
+    _assert_consistent(repository)
+
+
+def test_a_later_roadmap_does_not_replace_the_first(repository):
+    role = next(role for role in repository.get_all_roles() if repository.get_roadmap_for_role(role['name']))
+    before = repository.get_roadmap_for_role(role['name'])
+    repository.add_roadmap(role['id'], "A second roadmap")
+    _assert_consistent(repository)
+    assert repository.get_roadmap_for_role(role['name'])['id'] == before['id']
+
+
+def test_random_table_writes_keep_documents_current(repository, conn):
+    rng = random.Random(13)
+    writes = [
+        lambda: conn.execute("UPDATE milestones SET title = ?, order_index = ? WHERE id = ?",
+                             (f"Title {rng.random()}", rng.randint(0, 9), rng.choice(_ids(conn, 'milestones')))),
+        lambda: conn.execute("UPDATE milestones SET roadmap_id = ? WHERE id = ?",
+                             (rng.choice(_ids(conn, 'roadmaps')), rng.choice(_ids(conn, 'milestones')))),
+        lambda: conn.execute("DELETE FROM milestones WHERE id = ?", (rng.choice(_ids(conn, 'milestones')),)),
+        lambda: conn.execute("INSERT INTO milestone_outcomes (milestone_id, outcome) VALUES (?, ?)",
+                             (rng.choice(_ids(conn, 'milestones')), f"Outcome {rng.random()}")),
+        lambda: conn.execute("DELETE FROM milestone_outcomes WHERE id = ?",
+                             (rng.choice(_ids(conn, 'milestone_outcomes')),)),
+        lambda: conn.execute("INSERT INTO milestone_resources (milestone_id, resource) VALUES (?, ?)",
+                             (rng.choice(_ids(conn, 'milestones')), f"Resource {rng.random()}")),
+        lambda: conn.execute("UPDATE milestone_resources SET milestone_id = ? WHERE id = ?",
+                             (rng.choice(_ids(conn, 'milestones')), rng.choice(_ids(conn, 'milestone_resources')))),
+        lambda: conn.execute("UPDATE roadmaps SET overview = ? WHERE id = ?",
+                             (f"Overview {rng.random()}", rng.choice(_ids(conn, 'roadmaps')))),
+        lambda: conn.execute("UPDATE roles SET name = name || ' II' WHERE id = ?", (rng.choice(_ids(conn, 'roles')),)),
+    ]
+    for _ in range(60):
+        rng.choice(writes)()
+        conn.commit()
+        _assert_consistent(repository)
+
+
+def test_rebuild_repairs_a_damaged_table(repository, conn):
+    role = next(role['name'] for role in repository.get_all_roles() if repository.get_roadmap_for_role(role['name']))
+    conn.execute("UPDATE roadmap_documents SET document = '{}' WHERE role_name = ?", (role,))
+    conn.execute("INSERT INTO roadmap_documents (role_id, role_name, document) VALUES (-1, 'Nobody', '{}')")
+    conn.commit()
+    assert sorted(p['problem'] for p in repository.check_roadmap_documents()) == ["orphaned", "stale"]
+
+    repository.rebuild_roadmap_documents()
+    _assert_consistent(repository)
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from services import scheduler
+from services.scheduler import VECTORIZE_MIN, allocate, schedule_days, schedule_days_many
+
+
+def _cases(seed, count):
+    rng = random.Random(seed)
+    for _ in range(count):
+        weights = tuple(rng.choice([1, 1, 2, 3, 5, 7, 14, 30, 90]) for _ in range(rng.randint(1, 12)))
+        # Around the milestone count, where days run short, and well past it
+        days_list = [rng.randint(-2, len(weights) + 3) for _ in range(VECTORIZE_MIN)]
+        days_list += [rng.randint(1, 400) for _ in range(VECTORIZE_MIN)]
+        yield weights, days_list
+
+
+def test_allocate_sums_to_days_and_starves_nobody():
+    for weights, days_list in _cases(1, 200):
+        for days in days_list:
+            shares = allocate(weights, days)
+            assert sum(shares) == max(days, 0)
+            if days >= len(weights):
+                assert min(shares) >= 1
+
+
+def test_schedule_days_is_contiguous():
+    for weights, days_list in _cases(2, 200):
+        for days in days_list:
+            if days < len(weights):
+                continue
+            spans = schedule_days(weights, days)
+            assert spans[0][0] == 1 and spans[-1][1] == days
+            for (_, end), (start, _) in zip(spans, spans[1:]):
+                assert start == end + 1
+
+
+def test_vectorized_matches_scalar():
+    pytest.importorskip("numpy")
+    for weights, days_list in _cases(3, 300):
+        assert len(days_list) >= VECTORIZE_MIN
+        assert schedule_days_many(weights, days_list) == [schedule_days(weights, days) for days in days_list]
+
+
+def test_fallback_without_numpy_matches_scalar(monkeypatch):
+    monkeypatch.setattr(scheduler, "np", None)
+    for weights, days_list in _cases(4, 50):
+        assert schedule_days_many(weights, days_list) == [schedule_days(weights, days) for days in days_list]
+
+
+def test_fewer_days_than_milestones_share_the_next_start():
+    # One day per milestone is impossible: the zero-day ones share a day
+    spans = schedule_days((7, 7, 7, 7), 2)
+    assert all(1 <= start <= end <= 2 for start, end in spans)
+    assert schedule_days((), 10) == ()
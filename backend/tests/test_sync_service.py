@@ -0,0 +1,124 @@
+import pytest
+
+from repository.db_repo import DatabaseRepository
+from repository.sync_repo import SyncRepository
+from services import sync_service
+from services.sync_service import READER_RENEW, READER_TTL, ReaderLease, SyncService
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def repository(catalogue_db):
+    return DatabaseRepository(catalogue_db)
+
+
+@pytest.fixture
+def clients(sync_db):
+    return SyncRepository(sync_db)
+
+
+@pytest.fixture
+def service(repository, clients, monkeypatch):
+    # Let every entry be prunable, so tests see exactly what the holders keep
+    monkeypatch.setattr(sync_service, "KEEP_CHANGES", 0)
+    return SyncService(repository, clients)
+
+
+def _changes(service, since, **kwargs):
+    return {(change["table"], change["id"]): change for change in service.changes(since, now=NOW, **kwargs)["changes"]}
+
+
+def test_changes_are_compacted_to_one_per_row(repository, service):
+    role_id = repository.get_all_roles()[0]['id']
+    since = service.version()
+
+    added = repository.add_role("Compaction Tester")
+    repository.update_role(added, description="updated twice")
+    gone = repository.add_role("Short Lived")
+    repository.delete_role(gone)
+    repository.update_role(role_id, description="first")
+    repository.update_role(role_id, description="second")
+
+    changes = _changes(service, since)
+    assert changes[("roles", added)]["op"] == "insert"
+    assert changes[("roles", added)]["row"]["description"] == "updated twice"
+    assert ("roles", gone) not in changes
+    assert changes[("roles", role_id)]["op"] == "update"
+    assert changes[("roles", role_id)]["row"]["description"] == "second"
+
+
+def test_deleting_a_known_row_leaves_a_tombstone(repository, service):
+    since = service.version()
+    role_id = repository.add_role("Tombstone")
+    version = service.changes(since, now=NOW)["version"]
+    repository.delete_role(role_id)
+    assert _changes(service, version)[("roles", role_id)] == {"table": "roles", "id": role_id, "op": "delete"}
+
+
+def test_pages_continue_from_the_returned_version(repository, service):
+    since = service.version()
+    for i in range(5):
+        repository.add_role(f"Paged {i}")
+    seen, version = [], since
+    while True:
+        page = service.changes(version, limit=2, now=NOW)
+        seen.extend(change["id"] for change in page["changes"])
+        version = page["version"]
+        if not page["more"]:
+            break
+    assert len(seen) == 5 and version == service.version()
+
+
+def test_prune_stops_at_the_oldest_client(repository, service):
+    since = service.version()
+    repository.add_role("Before the client")
+    service.changes(since, client_id="phone", now=NOW)
+    repository.add_role("After the client")
+
+    service.prune(now=NOW, force=True)
+    assert repository.get_pruned_change() == since
+    assert service.changes(since, now=NOW) is not None
+    assert service.changes(since - 1, now=NOW) is None
+
+
+def test_clients_past_their_ttl_stop_holding_the_log(repository, service):
+    since = service.version()
+    service.changes(since, client_id="phone", now=NOW)
+    repository.add_role("Written later")
+    later = NOW + sync_service.CLIENT_TTL + 1
+    service.prune(now=later, force=True)
+    assert repository.get_pruned_change() == service.version()
+    assert service.status(now=later)["clients"] == 0
+
+
+def test_prune_stops_at_an_in_process_reader(repository, clients, service):
+    lease = ReaderLease(clients, "cache")
+    seq = repository.get_last_change()
+    lease.hold(seq, now=NOW)
+    repository.add_role("Not yet applied")
+
+    assert service.status(now=NOW)["readers"] == 1
+    service.prune(now=NOW, force=True)
+    assert repository.get_changes(seq) is not None
+
+    # An expired lease no longer counts
+    service.prune(now=NOW + READER_TTL + 1, force=True)
+    assert repository.get_changes(seq) is None
+
+
+def test_reader_lease_is_renewed_at_most_every_interval(repository, clients, service):
+    lease = ReaderLease(clients, "cache")
+    lease.hold(1, now=NOW)
+    lease.hold(5, now=NOW + READER_RENEW / 2)
+    assert clients.get_min_reader_version(NOW) == 1
+    lease.hold(5, now=NOW + READER_RENEW)
+    assert clients.get_min_reader_version(NOW) == 5
+
+
+def test_prune_changes_honours_min_entries(repository):
+    through = repository.get_last_change()
+    assert repository.prune_changes(through, min_entries=through + 1) == 0
+    assert repository.get_pruned_change() == 0
+    assert repository.prune_changes(through) == through
+    assert repository.get_changes(through) == []
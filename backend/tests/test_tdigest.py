@@ -0,0 +1,79 @@
+import random
+from bisect import bisect_left, bisect_right
+
+import pytest
+
+from services.tdigest import TDigest
+
+
+def _exact_cdf(values, value):
+    """Share below `value`, counting half of the values equal to it (as TDigest.cdf does)."""
+    below, upto = bisect_left(values, value), bisect_right(values, value)
+    return (below + (upto - below) / 2) / len(values)
+
+
+def _digest(values):
+    digest = TDigest()
+    digest.update(values)
+    return digest
+
+
+def test_empty_digest_answers_none():
+    digest = TDigest()
+    assert digest.cdf(1.0) is None
+    assert digest.quantile(0.5) is None
+
+
+def test_cdf_is_close_and_tight_at_the_tails():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(20000))
+    digest = _digest(values)
+    assert len(digest) <= 2 * digest.compression
+    for q in (0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999):
+        value = values[int(q * len(values))]
+        error = abs(digest.cdf(value) - _exact_cdf(values, value))
+        # k1 keeps centroids small near the extremes
+        assert error <= (0.002 if q <= 0.01 or q >= 0.99 else 0.01)
+    assert digest.cdf(values[0] - 1) == 0.0
+    assert digest.cdf(values[-1] + 1) == 1.0
+
+
+def test_small_integer_counts_rank_exactly():
+    rng = random.Random(11)
+    values = sorted(rng.randint(0, 20) for _ in range(5000))
+    digest = _digest(values)
+    for value in range(21):
+        assert digest.cdf(value) == pytest.approx(_exact_cdf(values, value))
+
+
+def test_merge_matches_one_digest_of_all_values():
+    rng = random.Random(3)
+    parts = [[rng.gauss(50, 15) for _ in range(rng.randint(1, 4000))] for _ in range(8)]
+    merged = TDigest()
+    for part in parts:
+        merged.merge(_digest(part))
+    values = sorted(value for part in parts for value in part)
+    whole = _digest(values)
+
+    assert merged.total == len(values)
+    assert (merged.min, merged.max) == (values[0], values[-1])
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        value = values[int(q * len(values))]
+        assert merged.cdf(value) == pytest.approx(whole.cdf(value), abs=0.01)
+        assert merged.cdf(value) == pytest.approx(_exact_cdf(values, value), abs=0.01)
+
+
+def test_merging_an_empty_digest_changes_nothing():
+    digest = _digest([1.0, 2.0, 3.0])
+    before = digest.cdf(2.0)
+    digest.merge(TDigest())
+    assert digest.cdf(2.0) == before
+    assert (digest.min, digest.max, digest.total) == (1.0, 3.0, 3.0)
+
+
+def test_bytes_round_trip():
+    rng = random.Random(5)
+    digest = _digest(rng.random() for _ in range(3000))
+    restored = TDigest.from_bytes(digest.to_bytes())
+    for value in (0.01, 0.3, 0.5, 0.97):
+        assert restored.cdf(value) == pytest.approx(digest.cdf(value))
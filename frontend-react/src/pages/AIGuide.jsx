@@ -7,6 +7,7 @@ import {
   HiOutlineLightBulb
 } from 'react-icons/hi'
 import ParticleCanvas from '../components/canvas/ParticleCanvas'
+import api from '../services/api'
 
 const PROMPT_CHIPS = [
   'Guide me step by step',
@@ -76,7 +77,7 @@ export default function AIGuide() {
   }, [messages])
 
   const generateResponse = (userMessage) => {
-    // Simulate AI response based on keywords
+    // Offline fallback when the guide API is unreachable
     const lowerMessage = userMessage.toLowerCase()
     
     if (lowerMessage.includes('learn') || lowerMessage.includes('next')) {
@@ -115,12 +116,30 @@ export default function AIGuide() {
     setInput('')
     setIsTyping(true)
 
-    // Simulate AI response delay
-    setTimeout(() => {
-      const response = generateResponse(userMessage.content)
-      setMessages(prev => [...prev, { role: 'assistant', content: response }])
+    // The reply grows as answer chunks arrive
+    let streamed = ''
+    const showReply = (content) => setMessages(prev => {
+      const last = prev[prev.length - 1]
+      return last.streaming
+        ? [...prev.slice(0, -1), { ...last, content }]
+        : [...prev, { role: 'assistant', content, streaming: true }]
+    })
+
+    try {
+      await api.streamGuideAnswer(userMessage.content, {
+        onChunk: (text) => {
+          streamed += text
+          setIsTyping(false)
+          showReply(streamed)
+        },
+      })
+    } catch (error) {
+      console.error(error)
+      if (!streamed) showReply(generateResponse(userMessage.content))
+    } finally {
+      setMessages(prev => prev.map(m => (m.streaming ? { role: m.role, content: m.content } : m)))
       setIsTyping(false)
-    }, 1000 + Math.random() * 1000)
+    }
   }
 
   const handleChipClick = (prompt) => {
@@ -121,6 +121,34 @@ class ApiService {
     })
   }
 
+  // AI Guide API
+  async getGuideAnswer(question, role = null) {
+    const params = new URLSearchParams({ q: question })
+    if (role) params.set('role', role)
+    return this.fetch(`/api/guide?${params}`)
+  }
+
+  // Streams the answer over Server-Sent Events; resolves once the server says done
+  streamGuideAnswer(question, { role = null, onSources, onChunk } = {}) {
+    const params = new URLSearchParams({ q: question })
+    if (role) params.set('role', role)
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${API_BASE_URL}/api/guide/stream?${params}`)
+      source.addEventListener('retrieval', (e) => onSources?.(JSON.parse(e.data).sources))
+      source.addEventListener('chunk', (e) => onChunk?.(JSON.parse(e.data).text))
+      source.addEventListener('done', () => {
+        source.close()
+        resolve()
+      })
+      source.onerror = () => {
+        // EventSource reconnects by default; a guide answer is never resumed
+        source.close()
+        reject(new Error('Guide stream failed'))
+      }
+    })
+  }
+
   // Health Check
   async healthCheck() {
     return this.fetch('/health')